@@ -0,0 +1,51 @@
+"""
+End-user identity forwarded to backend services.
+
+The User Service keeps a caller's reads on the primary database for a while after that
+caller writes (read-your-writes). Callers are end users, not BFF processes: one user's
+requests land on any BFF worker, and one worker serves many users. CallerIdMiddleware
+reads the id the client sends in the BFF_CALLER_ID_HEADER header (a session id, say) and
+every gRPC call made while serving that request carries it as x-caller-id metadata.
+Requests without the header aren't pinned to the primary.
+"""
+import os
+from contextvars import ContextVar
+from typing import Optional
+
+CALLER_ID_METADATA = "x-caller-id"
+
+# Longer values are ignored rather than forwarded
+_MAX_LENGTH = 128
+
+_current_caller_id: ContextVar[Optional[str]] = ContextVar("current_caller_id", default=None)
+
+
+def current_caller_id() -> Optional[str]:
+    """The end-user id of the request being served, if its client sent one."""
+    return _current_caller_id.get()
+
+
+class CallerIdMiddleware:
+    """ASGI middleware that makes the caller id header of a request its caller id."""
+
+    def __init__(self, app, header: Optional[str] = None):
+        self.app = app
+        self.header = (header or os.getenv("BFF_CALLER_ID_HEADER", "x-session-id")).lower().encode()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        caller_id = None
+        for name, value in scope.get("headers") or ():
+            if name == self.header:
+                value = value.decode("latin-1").strip()
+                if value and len(value) <= _MAX_LENGTH:
+                    caller_id = value
+                break
+        token = _current_caller_id.set(caller_id)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _current_caller_id.reset(token)
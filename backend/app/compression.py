@@ -0,0 +1,253 @@
+"""
+Response compression for the BFF's HTTP responses, and the metrics every compression layer
+(HTTP, gRPC server, gRPC client) reports into.
+
+Metrics, labelled by layer and algorithm:
+  compression_payload_bytes_total          uncompressed bytes of every payload sent compressed
+  compression_sampled_input_bytes_total    uncompressed bytes of the payloads whose compression was measured
+  compression_sampled_output_bytes_total   compressed bytes of those payloads
+  compression_sampled_seconds              time spent compressing them
+  compression_skipped_total                payloads left uncompressed, by reason
+
+HTTP bodies are compressed here, so every one is measured. gRPC messages are compressed
+inside gRPC core, so a sample of them is compressed again with zlib to measure the ratio
+and cost. Bytes saved ~= payload x (1 - output / input); CPU spent ~= payload x seconds / input.
+"""
+import os
+import time
+import zlib
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from app.observability.metrics import registry
+
+payload_bytes_counter = registry.counter(
+    "compression_payload_bytes_total", "Uncompressed bytes of payloads sent compressed"
+)
+sampled_input_counter = registry.counter(
+    "compression_sampled_input_bytes_total", "Uncompressed bytes of payloads whose compression was measured"
+)
+sampled_output_counter = registry.counter(
+    "compression_sampled_output_bytes_total", "Compressed bytes of payloads whose compression was measured"
+)
+sampled_seconds_histogram = registry.histogram(
+    "compression_sampled_seconds", "Time spent compressing one measured payload"
+)
+skipped_counter = registry.counter(
+    "compression_skipped_total", "Payloads sent uncompressed, by reason"
+)
+
+# wbits selecting the container zlib writes
+_WBITS = {"gzip": 16 + zlib.MAX_WBITS, "deflate": zlib.MAX_WBITS}
+
+
+def record_compression(layer: str, algorithm: str, payload_bytes: int, measured: Optional[Tuple[int, float]] = None):
+    """Count a compressed payload; measured is (compressed bytes, seconds) when its compression was timed."""
+    payload_bytes_counter.inc(payload_bytes, layer=layer, algorithm=algorithm)
+    if measured is not None:
+        output_bytes, seconds = measured
+        sampled_input_counter.inc(payload_bytes, layer=layer, algorithm=algorithm)
+        sampled_output_counter.inc(output_bytes, layer=layer, algorithm=algorithm)
+        sampled_seconds_histogram.observe(seconds, layer=layer, algorithm=algorithm)
+
+
+def compress(data: bytes, algorithm: str, level: int = 6) -> Tuple[bytes, float]:
+    """Compress data as a gzip or zlib (HTTP "deflate") stream; returns (compressed, seconds)."""
+    started = time.perf_counter()
+    compressor = zlib.compressobj(level, zlib.DEFLATED, _WBITS[algorithm])
+    compressed = compressor.compress(data) + compressor.flush()
+    return compressed, time.perf_counter() - started
+
+
+@dataclass
+class HttpCompressionConfig:
+    """Negotiated (Accept-Encoding) compression of HTTP responses of at least min_bytes."""
+    enabled: bool = os.getenv("HTTP_COMPRESSION", "true").lower() == "true"
+    min_bytes: int = int(os.getenv("HTTP_COMPRESSION_MIN_BYTES", "1024"))
+    level: int = int(os.getenv("HTTP_COMPRESSION_LEVEL", "6"))
+
+
+_COMPRESSIBLE_TYPES = ("text/", "application/json", "application/graphql-response+json", "application/javascript")
+
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """Preferred of gzip/deflate in an Accept-Encoding header, honouring q-values (q=0 refuses)."""
+    qvalues: Dict[str, float] = {}
+    wildcard_q = None
+    for part in accept_encoding.split(","):
+        coding, *params = part.split(";")
+        coding = coding.strip().lower()
+        q = 1.0
+        for param in params:
+            name, _, value = param.strip().partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if coding == "*":
+            wildcard_q = q
+        elif coding in _WBITS:
+            qvalues[coding] = q
+    # * only covers the codings not listed explicitly
+    if wildcard_q is not None:
+        for coding in _WBITS:
+            qvalues.setdefault(coding, wildcard_q)
+
+    best, best_q = None, 0.0
+    # On equal q-values, gzip (listed first in _WBITS) wins
+    for coding in _WBITS:
+        q = qvalues.get(coding, 0.0)
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+class CompressionMiddleware:
+    """
+    ASGI middleware compressing compressible (JSON, text) responses the client accepts.
+
+    Bodies sent in one message are compressed only when at least min_bytes long; streamed
+    bodies are compressed chunk by chunk. Already-encoded, partial (206) and bodiless
+    responses are passed through. Strong ETags become weak, as the bytes on the wire no
+    longer match the identity representation they were computed for. So that a client sees
+    one form of a validator, every response to a client accepting gzip/deflate gets the weak
+    form: compressed ones, ones too small to compress and 304s alike.
+    """
+
+    def __init__(self, app, config: Optional[HttpCompressionConfig] = None):
+        self.app = app
+        self.config = config or HttpCompressionConfig()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.config.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        request_headers = {key.lower(): value for key, value in scope.get("headers", [])}
+        algorithm = negotiate_encoding(request_headers.get(b"accept-encoding", b"").decode("latin-1"))
+        config = self.config
+        start_message: Optional[Dict] = None
+        compressor = None
+        payload_bytes = 0
+        output_bytes = 0
+        seconds = 0.0
+        passthrough = False
+
+        def skip(reason: str):
+            skipped_counter.inc(layer="http", reason=reason)
+
+        async def send_wrapper(message):
+            nonlocal start_message, compressor, payload_bytes, output_bytes, seconds, passthrough
+            if message["type"] == "http.response.start":
+                start_message = message
+                return
+            if passthrough:
+                await send(message)
+                return
+            if message["type"] != "http.response.body":
+                # e.g. http.response.pathsend (FileResponse): the server sends the body itself
+                if compressor is None:
+                    headers = _Headers(start_message.get("headers", []))
+                    headers.add_vary()
+                    passthrough = True
+                    await send({**start_message, "headers": headers.raw})
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+            if compressor is None:
+                headers = _Headers(start_message.get("headers", []))
+                reason = _skip_reason(start_message["status"], headers, algorithm)
+                if reason is None and not more_body and len(body) < config.min_bytes:
+                    reason = "below_threshold"
+                if reason is not None:
+                    if reason != "not_compressible":
+                        skip(reason)
+                    # A 304 carries the Vary and ETag form its 200 would have had
+                    if reason in ("below_threshold", "not_accepted") or start_message["status"] == 304:
+                        headers.add_vary()
+                        if algorithm is not None:
+                            headers.weaken_etag()
+                        start_message = {**start_message, "headers": headers.raw}
+                    passthrough = True
+                    await send(start_message)
+                    await send(message)
+                    return
+
+                headers.set("content-encoding", algorithm)
+                headers.remove("content-length")
+                headers.add_vary()
+                headers.weaken_etag()
+                if not more_body:
+                    compressed, seconds = compress(body, algorithm, config.level)
+                    headers.set("content-length", str(len(compressed)))
+                    record_compression("http", algorithm, len(body), (len(compressed), seconds))
+                    await send({**start_message, "headers": headers.raw})
+                    await send({"type": "http.response.body", "body": compressed})
+                    return
+                compressor = zlib.compressobj(config.level, zlib.DEFLATED, _WBITS[algorithm])
+                await send({**start_message, "headers": headers.raw})
+
+            started = time.perf_counter()
+            chunk = compressor.compress(body)
+            if not more_body:
+                chunk += compressor.flush()
+            elif chunk == b"" and body:
+                # Don't hold streamed data back until zlib's buffer fills
+                chunk = compressor.flush(zlib.Z_SYNC_FLUSH)
+            seconds += time.perf_counter() - started
+            payload_bytes += len(body)
+            output_bytes += len(chunk)
+            if not more_body:
+                record_compression("http", algorithm, payload_bytes, (output_bytes, seconds))
+            await send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+
+        await self.app(scope, receive, send_wrapper)
+
+
+def _skip_reason(status: int, headers: "_Headers", algorithm: Optional[str]) -> Optional[str]:
+    content_type = headers.get("content-type") or ""
+    if status < 200 or status in (204, 206, 304) or headers.get("content-encoding"):
+        return "not_compressible"
+    if not content_type.startswith(_COMPRESSIBLE_TYPES):
+        return "not_compressible"
+    if algorithm is None:
+        return "not_accepted"
+    return None
+
+
+class _Headers:
+    """Minimal mutable view over ASGI raw headers."""
+
+    def __init__(self, raw: List[Tuple[bytes, bytes]]):
+        self.raw = list(raw)
+
+    def get(self, name: str) -> Optional[str]:
+        key = name.encode("latin-1")
+        for header, value in self.raw:
+            if header.lower() == key:
+                return value.decode("latin-1")
+        return None
+
+    def remove(self, name: str):
+        key = name.encode("latin-1")
+        self.raw = [(header, value) for header, value in self.raw if header.lower() != key]
+
+    def set(self, name: str, value: str):
+        self.remove(name)
+        self.raw.append((name.encode("latin-1"), value.encode("latin-1")))
+
+    def add_vary(self):
+        vary = self.get("vary")
+        if vary is None:
+            self.set("vary", "Accept-Encoding")
+        elif "accept-encoding" not in vary.lower():
+            self.set("vary", f"{vary}, Accept-Encoding")
+
+    def weaken_etag(self):
+        etag = self.get("etag")
+        if etag is not None and not etag.startswith("W/"):
+            self.set("etag", f"W/{etag}")
@@ -0,0 +1,234 @@
+"""
+Background exports of the users table.
+
+An export walks the user service with keyset-paginated GetUsers calls (chunk_size users
+per call, ordered by id) and appends each chunk to a gzip-compressed NDJSON or CSV file,
+so only one chunk is ever held in memory and no RPC runs for longer than a page. Chunks
+are idempotent, so transient gRPC failures are retried.
+
+Jobs are files, not process state: <directory>/<id>.json holds the job (and the pid of the
+worker running it) and <id>.<format>.gz the finished export, so any BFF worker on the host
+can report on and serve a job started by another. A job whose worker died is reported as
+failed. The export is not a point-in-time snapshot: users created behind the cursor while
+it runs are missed, ones created ahead of it are included.
+"""
+import asyncio
+import csv
+import gzip
+import json
+import logging
+import os
+import re
+import secrets
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import IO, List, Optional, Set
+
+import grpc
+
+from app.models.user import ExportFormat, ExportStatus, User, UserExport
+from app.observability.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+CSV_COLUMNS = ("id", "name", "email", "is_active", "updated_at")
+
+_JOB_ID = re.compile(r"[0-9a-f]{32}")
+_CHUNK_ATTEMPTS = 3
+_RETRYABLE_CODES = frozenset({grpc.StatusCode.UNAVAILABLE, grpc.StatusCode.DEADLINE_EXCEEDED})
+
+exports_counter = registry.counter("user_exports_total", "Finished user exports, by format and status")
+export_rows_counter = registry.counter("user_export_rows_total", "Users written to export files, by format")
+export_duration_histogram = registry.histogram(
+    "user_export_duration_seconds", "Wall time of completed user exports",
+    buckets=(0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 300.0, 900.0, 3600.0)
+)
+
+
+@dataclass
+class ExportConfig:
+    """Where export files go, how they are produced and how long they are kept."""
+    directory: str = os.getenv("USER_EXPORT_DIR", "exports")
+    chunk_size: int = int(os.getenv("USER_EXPORT_CHUNK_SIZE", "1000"))
+    # Deadline of each chunk's GetUsers call; the adaptive default is learned from small pages
+    chunk_timeout_seconds: float = float(os.getenv("USER_EXPORT_CHUNK_TIMEOUT_SECONDS", "30"))
+    max_running: int = int(os.getenv("USER_EXPORT_MAX_RUNNING", "2"))
+    ttl_seconds: float = float(os.getenv("USER_EXPORT_TTL_SECONDS", "86400"))
+    compression_level: int = int(os.getenv("USER_EXPORT_COMPRESSION_LEVEL", "6"))
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class ExportManager:
+    """Starts export jobs in the background and reads their state back from disk."""
+
+    def __init__(self, config: Optional[ExportConfig] = None):
+        self.config = config or ExportConfig()
+        self._slots = asyncio.Semaphore(max(self.config.max_running, 1))
+        self._tasks: Set[asyncio.Task] = set()
+
+    def _path(self, job_id: str, suffix: str) -> str:
+        return os.path.join(self.config.directory, f"{job_id}{suffix}")
+
+    def file_path(self, job: UserExport) -> str:
+        """Path of a completed export's file."""
+        return self._path(job.id, f".{job.format.value}.gz")
+
+    def file_name(self, job: UserExport) -> str:
+        return f"users-{job.created_at:%Y%m%dT%H%M%SZ}.{job.format.value}.gz"
+
+    async def start(self, client, export_format: ExportFormat) -> UserExport:
+        """Record a new job and run it in the background; returns it while still pending."""
+        await asyncio.to_thread(self._prepare)
+        job = UserExport(id=secrets.token_hex(16), format=export_format, created_at=_now())
+        await asyncio.to_thread(self._save, job)
+        task = asyncio.create_task(self._run(client, job), name=f"user-export-{job.id}")
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return job
+
+    def get(self, job_id: str) -> Optional[UserExport]:
+        """The job's current state, or None for unknown (or purged) ids."""
+        if not _JOB_ID.fullmatch(job_id):
+            return None
+        try:
+            with open(self._path(job_id, ".json"), encoding="utf-8") as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            return None
+        job = UserExport.model_validate(state["job"])
+        if job.status in (ExportStatus.PENDING, ExportStatus.RUNNING) and not _pid_alive(state["pid"]):
+            job.status = ExportStatus.FAILED
+            job.error = "The worker running this export stopped"
+        return job
+
+    async def shutdown(self):
+        """Cancel running jobs; they are recorded as failed."""
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    async def _run(self, client, job: UserExport):
+        part_path = self._path(job.id, ".part")
+        started = time.monotonic()
+        try:
+            async with self._slots:
+                job.status = ExportStatus.RUNNING
+                job.started_at = _now()
+                await asyncio.to_thread(self._save, job)
+                handle = await asyncio.to_thread(
+                    gzip.open, part_path, "wt",
+                    compresslevel=self.config.compression_level, encoding="utf-8", newline=""
+                )
+                try:
+                    after_id = 0
+                    while True:
+                        users = await self._fetch_chunk(client, after_id)
+                        if not users:
+                            break
+                        await asyncio.to_thread(self._write_chunk, handle, job, users)
+                        after_id = users[-1].id
+                        if len(users) < self.config.chunk_size:
+                            break
+                finally:
+                    await asyncio.to_thread(handle.close)
+                job.size_bytes = await asyncio.to_thread(self._publish, part_path, job)
+                job.status = ExportStatus.COMPLETED
+                export_duration_histogram.observe(time.monotonic() - started)
+        except asyncio.CancelledError:
+            job.status = ExportStatus.FAILED
+            job.error = "The export was cancelled"
+            raise
+        except grpc.RpcError as e:
+            job.status = ExportStatus.FAILED
+            job.error = f"gRPC error: {e.code().name} - {e.details()}"
+        except Exception as e:
+            logger.exception(f"User export {job.id} failed")
+            job.status = ExportStatus.FAILED
+            job.error = str(e)
+        finally:
+            job.finished_at = _now()
+            exports_counter.inc(format=job.format.value, status=job.status.value)
+            await asyncio.to_thread(self._finish, job, part_path)
+            logger.info(f"User export {job.id} {job.status.value}: {job.rows} rows")
+
+    async def _fetch_chunk(self, client, after_id: int) -> List[User]:
+        for attempt in range(1, _CHUNK_ATTEMPTS + 1):
+            try:
+                return await client.get_users_after(
+                    after_id, self.config.chunk_size, timeout=self.config.chunk_timeout_seconds
+                )
+            except grpc.RpcError as e:
+                if e.code() not in _RETRYABLE_CODES or attempt == _CHUNK_ATTEMPTS:
+                    raise
+                logger.warning(f"Export chunk after id {after_id} failed ({e.code().name}), retrying")
+                await asyncio.sleep(0.5 * attempt)
+
+    def _write_chunk(self, handle: IO[str], job: UserExport, users: List[User]):
+        if job.format == ExportFormat.CSV:
+            writer = csv.writer(handle)
+            if job.rows == 0:
+                writer.writerow(CSV_COLUMNS)
+            writer.writerows(
+                (user.id, user.name, user.email, user.is_active, user.updated_at.isoformat() if user.updated_at else "")
+                for user in users
+            )
+        else:
+            handle.writelines(user.model_dump_json() + "\n" for user in users)
+        job.rows += len(users)
+        export_rows_counter.inc(len(users), format=job.format.value)
+        self._save(job)
+
+    def _publish(self, part_path: str, job: UserExport) -> int:
+        """Move the finished file into place; returns its size."""
+        os.replace(part_path, self.file_path(job))
+        return os.path.getsize(self.file_path(job))
+
+    def _finish(self, job: UserExport, part_path: str):
+        """Drop the partial file of a failed export and record the job's final state."""
+        if job.status != ExportStatus.COMPLETED and os.path.exists(part_path):
+            os.remove(part_path)
+        self._save(job)
+
+    def _save(self, job: UserExport):
+        # Written to a temporary file and renamed so readers never see a partial job
+        path = self._path(job.id, ".json")
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump({"pid": os.getpid(), "job": job.model_dump(mode="json")}, f)
+        os.replace(temp_path, path)
+
+    def _prepare(self):
+        """Create the export directory and delete finished exports older than ttl_seconds."""
+        os.makedirs(self.config.directory, exist_ok=True)
+        cutoff = time.time() - self.config.ttl_seconds
+        for name in os.listdir(self.config.directory):
+            job_id, extension = os.path.splitext(name)
+            if extension != ".json":
+                continue
+            try:
+                if os.path.getmtime(os.path.join(self.config.directory, name)) >= cutoff:
+                    continue
+                job = self.get(job_id)
+                if job is None or job.status in (ExportStatus.PENDING, ExportStatus.RUNNING):
+                    continue
+                for path in (self.file_path(job), self._path(job_id, ".part"), self._path(job_id, ".json")):
+                    if os.path.exists(path):
+                        os.remove(path)
+            except OSError as e:
+                logger.warning(f"Could not purge expired export {job_id}: {e}")
+
+export_manager = ExportManager()
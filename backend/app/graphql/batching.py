@@ -0,0 +1,151 @@
+"""
+HTTP operation batching for the GraphQL endpoint.
+
+A POST whose JSON body is an array of {query, variables, operationName} objects is run as
+a batch: every operation shares the request's context (and so its DataLoaders and their
+caches) and the response is an array of results in the same order. Queries run
+concurrently; a batch containing a mutation runs its operations one after another, in
+order, so side effects happen in the order the client sent them.
+
+Batches are rejected up front (400) when they have more than max_operations operations or
+their total cost, the number of fields the operations select, exceeds max_cost.
+"""
+import asyncio
+import os
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from graphql import (
+    DocumentNode,
+    FieldNode,
+    FragmentDefinitionNode,
+    FragmentSpreadNode,
+    GraphQLError,
+    OperationDefinitionNode,
+    SelectionSetNode,
+    parse,
+)
+from graphql.language import OperationType as GraphQLOperationType
+from strawberry.fastapi import GraphQLRouter
+from strawberry.http.exceptions import HTTPException
+
+from app.graphql.strawberry_adapter import UNSET, execute_operation
+from app.observability.metrics import registry, SIZE_BUCKETS
+
+batch_size_histogram = registry.histogram(
+    "graphql_batch_operations", "Operations per batched GraphQL request", buckets=SIZE_BUCKETS
+)
+batch_cost_histogram = registry.histogram(
+    "graphql_batch_cost", "Fields selected by all operations of a batched GraphQL request", buckets=SIZE_BUCKETS
+)
+
+
+@dataclass
+class GraphQLBatchingConfig:
+    """Limits for array-of-operations requests; max_operations=0 turns batching off."""
+    max_operations: int = int(os.getenv("GRAPHQL_BATCH_MAX_OPERATIONS", "10"))
+    max_cost: int = int(os.getenv("GRAPHQL_BATCH_MAX_COST", "500"))
+
+
+def _selection_cost(
+    selection_set: Optional[SelectionSetNode],
+    fragments: Dict[str, FragmentDefinitionNode],
+    visiting: frozenset = frozenset()
+) -> int:
+    if selection_set is None:
+        return 0
+    cost = 0
+    for selection in selection_set.selections:
+        if isinstance(selection, FieldNode):
+            cost += 1 + _selection_cost(selection.selection_set, fragments, visiting)
+        elif isinstance(selection, FragmentSpreadNode):
+            # Cycles are invalid GraphQL and left for validation to report
+            name = selection.name.value
+            if name in fragments and name not in visiting:
+                cost += _selection_cost(fragments[name].selection_set, fragments, visiting | {name})
+        else:
+            cost += _selection_cost(selection.selection_set, fragments, visiting)
+    return cost
+
+
+def _operations(document: DocumentNode, operation_name: Optional[str]) -> List[OperationDefinitionNode]:
+    operations = [
+        definition for definition in document.definitions if isinstance(definition, OperationDefinitionNode)
+    ]
+    if operation_name:
+        operations = [op for op in operations if op.name is not None and op.name.value == operation_name]
+    return operations
+
+
+def operation_cost(document: DocumentNode, operation_name: Optional[str] = None) -> int:
+    """Number of fields the operation selects, fragments expanded."""
+    fragments = {
+        definition.name.value: definition
+        for definition in document.definitions
+        if isinstance(definition, FragmentDefinitionNode)
+    }
+    return sum(_selection_cost(op.selection_set, fragments) for op in _operations(document, operation_name))
+
+
+class BatchingGraphQLRouter(GraphQLRouter):
+    """GraphQLRouter that also accepts a JSON array of operations in one POST."""
+
+    def __init__(self, *args, batching: Optional[GraphQLBatchingConfig] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.batching = batching or GraphQLBatchingConfig()
+
+    async def run(self, request, context=UNSET, root_value=UNSET):
+        if not self.is_websocket_request(request) and request.method == "POST":
+            body = await request.body()
+            if body.lstrip()[:1] == b"[":
+                return await self._run_batch(request, body, context, root_value)
+        return await super().run(request, context=context, root_value=root_value)
+
+    async def _run_batch(self, request, body: bytes, context, root_value):
+        if self.batching.max_operations <= 0:
+            raise HTTPException(400, "Batched GraphQL requests are not enabled")
+        operations = self.parse_json(body)
+        if not operations:
+            raise HTTPException(400, "A batched GraphQL request needs at least one operation")
+        if len(operations) > self.batching.max_operations:
+            raise HTTPException(
+                400, f"Batch has {len(operations)} operations; at most {self.batching.max_operations} are allowed"
+            )
+
+        documents: List[Optional[DocumentNode]] = []
+        for operation in operations:
+            if not isinstance(operation, dict) or not isinstance(operation.get("query"), str):
+                raise HTTPException(400, "Every operation in a batch must be an object with a `query` string")
+            if not isinstance(operation.get("variables"), (dict, type(None))):
+                raise HTTPException(400, "The GraphQL operation's `variables` must be an object or null, if provided.")
+            try:
+                documents.append(parse(operation["query"]))
+            except GraphQLError:
+                # Reported in that operation's result by schema.execute
+                documents.append(None)
+
+        cost = sum(
+            operation_cost(document, operation.get("operationName"))
+            for operation, document in zip(operations, documents)
+            if document is not None
+        )
+        batch_size_histogram.observe(len(operations))
+        batch_cost_histogram.observe(cost)
+        if cost > self.batching.max_cost:
+            raise HTTPException(400, f"Batch cost {cost} exceeds the limit of {self.batching.max_cost}")
+
+        def execute(operation: Dict[str, Any]):
+            return execute_operation(self, request, operation, context, root_value)
+
+        has_mutation = any(
+            op.operation == GraphQLOperationType.MUTATION
+            for operation, document in zip(operations, documents)
+            if document is not None
+            for op in _operations(document, operation.get("operationName"))
+        )
+        if has_mutation:
+            results = [await execute(operation) for operation in operations]
+        else:
+            results = await asyncio.gather(*(execute(operation) for operation in operations))
+
+        return self.create_response(response_data=results, sub_response=await self.get_sub_response(request))
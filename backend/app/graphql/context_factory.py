@@ -1,11 +1,18 @@
-from app.grpc.clients.user_service_client import UserServiceClient
-from app.grpc.config.grpc_config import GrpcServicesConfig
+from typing import List, Optional
+from strawberry.dataloader import DataLoader
+from app.grpc.clients.grpc_client import user_client
+from app.models.user import User
 
-# Singleton clients (created once per process)
-config = GrpcServicesConfig()
-user_client = UserServiceClient(config.user_service_host, config.user_service_port)
+# BatchGetUsers accepts at most this many ids per call
+USER_LOADER_MAX_BATCH_SIZE = 100
+
+async def load_users(user_ids: List[int]) -> List[Optional[User]]:
+    found = {user.id: user for user in await user_client.batch_get_users(user_ids)}
+    return [found.get(user_id) for user_id in user_ids]
 
 async def get_context():
     return {
-        "user_service_client": user_client
+        "user_service_client": user_client,
+        # One loader per HTTP request: every operation of a batched request shares its cache
+        "user_loader": DataLoader(load_fn=load_users, max_batch_size=USER_LOADER_MAX_BATCH_SIZE)
     }
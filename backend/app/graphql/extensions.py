@@ -0,0 +1,17 @@
+from strawberry.extensions import SchemaExtension
+from app.observability.tracing import tracer
+
+
+class TracingExtension(SchemaExtension):
+    """Wraps GraphQL execution in a span so resolver gRPC calls nest under it."""
+
+    def on_execute(self):
+        if not tracer.enabled:
+            yield
+            return
+        with tracer.start_as_current_span("graphql.execute") as span:
+            span.set_attribute("graphql.operation.name", self.execution_context.operation_name or "")
+            yield
+            result = self.execution_context.result
+            if result is not None and result.errors:
+                span.set_attribute("graphql.errors", len(result.errors))
@@ -1,6 +1,7 @@
 import strawberry
 from app.graphql.user.queries import UserQueries
 from app.graphql.user.mutations import UserMutations
+from app.graphql.extensions import TracingExtension
 
 @strawberry.type
 class Query(UserQueries):
@@ -10,4 +11,4 @@ class Query(UserQueries):
 class Mutation(UserMutations):
     pass
 
-schema = strawberry.Schema(query=Query, mutation=Mutation)
+schema = strawberry.Schema(query=Query, mutation=Mutation, extensions=[TracingExtension])
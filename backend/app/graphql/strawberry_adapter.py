@@ -0,0 +1,37 @@
+"""
+The strawberry internals BatchingGraphQLRouter relies on, kept in one place.
+
+Written against strawberry-graphql 0.275 (the floor in pyproject.toml). Running one
+operation of a batch the way GraphQLRouter runs a single POST needs its private
+process_result/_handle_errors hooks and the schema exceptions it translates; a strawberry
+upgrade that moves any of them should only need changes here.
+"""
+from typing import Any, Dict
+
+from strawberry.schema.exceptions import CannotGetOperationTypeError, InvalidOperationTypeError
+from strawberry.types.graphql import OperationType
+from strawberry.types.unset import UNSET
+
+__all__ = ["UNSET", "execute_operation"]
+
+
+async def execute_operation(router, request, operation: Dict[str, Any], context, root_value) -> Dict[str, Any]:
+    """Run one {query, variables, operationName, extensions} operation; returns its response data."""
+    try:
+        result = await router.schema.execute(
+            operation["query"],
+            root_value=root_value,
+            variable_values=operation.get("variables"),
+            context_value=context,
+            operation_name=operation.get("operationName"),
+            allowed_operation_types=OperationType.from_http("POST"),
+            operation_extensions=operation.get("extensions"),
+        )
+    except CannotGetOperationTypeError as e:
+        return {"data": None, "errors": [{"message": e.as_http_error_reason()}]}
+    except InvalidOperationTypeError as e:
+        return {"data": None, "errors": [{"message": e.as_http_error_reason("POST")}]}
+    response_data = await router.process_result(request=request, result=result)
+    if result.errors:
+        router._handle_errors(result.errors, response_data)
+    return response_data
@@ -1,3 +1,4 @@
+from typing import Optional
 import strawberry
 from .types import UserType, UserInput
 from app.grpc.clients.user_service_client import UserServiceClient
@@ -6,9 +7,14 @@ from strawberry.types import Info
 @strawberry.type
 class UserMutations:
     @strawberry.field
-    async def create_user(self, user_input: UserInput, info: Info) -> UserType:
+    async def create_user(
+        self,
+        user_input: UserInput,
+        info: Info,
+        idempotency_key: Optional[str] = None
+    ) -> UserType:
         client: UserServiceClient = info.context["user_service_client"]
-        user = await client.create_user_from_input(user_input)
+        user = await client.create_user_from_input(user_input, idempotency_key=idempotency_key)
         return UserType(
             id=user.id,
             name=user.name,
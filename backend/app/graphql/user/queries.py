@@ -1,16 +1,32 @@
 import strawberry
-from typing import List
-from .types import UserType
+from typing import List, Optional
+from .types import UserType, UserConnection, UserSearchResult, TotalCountMode, SearchMatchMode
 from app.grpc.clients.user_service_client import UserServiceClient
+from app.models.user import User
+from strawberry.dataloader import DataLoader
 from strawberry.types import Info
+from strawberry.types.nodes import FragmentSpread, InlineFragment, SelectedField
+
+
+def _is_selected(selections, field_name: str) -> bool:
+    """Whether field_name is requested directly or through fragments"""
+    for selection in selections:
+        if isinstance(selection, SelectedField):
+            if selection.name == field_name:
+                return True
+        elif isinstance(selection, (FragmentSpread, InlineFragment)):
+            if _is_selected(selection.selections, field_name):
+                return True
+    return False
 
 @strawberry.type
 class UserQueries:
     @strawberry.field
     async def user(self, id: int, info: Info) -> UserType:
-        client: UserServiceClient = info.context["user_service_client"]
+        # Lookups from all operations of the request are coalesced into BatchGetUsers calls
+        loader: DataLoader[int, Optional[User]] = info.context["user_loader"]
         try:
-            user = await client.get_user(id)
+            user = await loader.load(id)
         except Exception:
             raise strawberry.exceptions.GraphQLError("User not found")
         if not user:
@@ -35,3 +51,64 @@ class UserQueries:
             )
             for user in users
         ]
+
+    @strawberry.field
+    async def users_connection(
+        self,
+        info: Info,
+        limit: int = 10,
+        offset: int = 0,
+        total_count_mode: TotalCountMode = TotalCountMode.EXACT
+    ) -> UserConnection:
+        client: UserServiceClient = info.context["user_service_client"]
+        # Only ask the user service to count when the client selected totalCount
+        want_total = _is_selected(info.selected_fields[0].selections, "totalCount")
+        page = await client.get_users_page(
+            limit=limit,
+            offset=offset,
+            include_total=total_count_mode if want_total else None
+        )
+        return UserConnection(
+            nodes=[
+                UserType(
+                    id=user.id,
+                    name=user.name,
+                    email=user.email,
+                    is_active=user.is_active
+                )
+                for user in page.users
+            ],
+            total_count=page.total_count,
+            total_is_estimate=page.total_is_estimate
+        )
+
+    @strawberry.field
+    async def search_users(
+        self,
+        info: Info,
+        query: str,
+        match: SearchMatchMode = SearchMatchMode.PREFIX,
+        is_active: Optional[bool] = None,
+        limit: int = 20,
+        after_id: int = 0
+    ) -> UserSearchResult:
+        client: UserServiceClient = info.context["user_service_client"]
+        page = await client.search_users(
+            query,
+            match=match,
+            is_active=is_active,
+            limit=limit,
+            after_id=after_id
+        )
+        return UserSearchResult(
+            users=[
+                UserType(
+                    id=user.id,
+                    name=user.name,
+                    email=user.email,
+                    is_active=user.is_active
+                )
+                for user in page.users
+            ],
+            next_after_id=page.next_after_id
+        )
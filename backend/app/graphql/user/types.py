@@ -1,3 +1,7 @@
-from app.models.user import UserType, UserInput
+from app.models.user import (
+    UserType, UserInput, UserConnection, UserSearchResult, TotalCountMode, SearchMatchMode
+)
 
-__all__ = ["UserType", "UserInput"]
+__all__ = [
+    "UserType", "UserInput", "UserConnection", "UserSearchResult", "TotalCountMode", "SearchMatchMode"
+]
@@ -1,9 +1,16 @@
 import grpc
-from typing import Optional, Callable, Any, Type
+from typing import Optional, Callable, Any, List, Sequence, Tuple, Type
 from abc import ABC, abstractmethod
 import weakref
 import logging
 import asyncio
+import random
+import time
+from app.caller import CALLER_ID_METADATA, current_caller_id
+from app.grpc.clients.latency import AdaptiveDeadlines, latency_key
+from app.grpc.compression import CompressionPolicy
+from app.observability.metrics import registry
+from app.observability.tracing import tracer, SPAN_KIND_CLIENT, STATUS_ERROR
 
 logger = logging.getLogger(__name__)
 
@@ -23,6 +30,13 @@ class MethodNotFoundError(GrpcClientError):
     pass
 
 
+_UNTRACKED_LATENCY_CODES = (grpc.StatusCode.UNAVAILABLE, grpc.StatusCode.CANCELLED)
+
+stream_reconnects_counter = registry.counter(
+    "grpc_client_stream_reconnects_total", "Change feed streams re-established after ending, by method"
+)
+
+
 class BaseGrpcClient(ABC):
     _instances = weakref.WeakSet()
 
@@ -43,6 +57,9 @@ class BaseGrpcClient(ABC):
         self.channel_options = channel_options
         self.channel: Optional[grpc.aio.Channel] = None
         self.stub: Optional[Any] = None
+        self.in_flight = 0
+        self.deadlines = AdaptiveDeadlines(self.__class__.__name__)
+        self.compression = CompressionPolicy.from_env("GRPC")
         self._instances.add(self)
 
     @property
@@ -108,7 +125,8 @@ class BaseGrpcClient(ABC):
         method_name: str,
         request: Any,
         to_model: Optional[Callable] = None,
-        timeout: Optional[float] = None
+        timeout: Optional[float] = None,
+        metadata: Optional[Sequence[Tuple[str, str]]] = None
     ):
         """
         Unified gRPC call helper
@@ -117,7 +135,8 @@ class BaseGrpcClient(ABC):
             method_name: Name of the gRPC method to call
             request: Request message
             to_model: Optional function to convert response to domain model
-            timeout: Optional timeout in seconds
+            timeout: Optional timeout in seconds; defaults to the method's adaptive deadline
+            metadata: Optional extra invocation metadata
 
         Returns:
             Response message or converted model
@@ -127,6 +146,7 @@ class BaseGrpcClient(ABC):
             MethodNotFoundError: If method doesn't exist
             grpc.RpcError: For gRPC specific errors
         """
+        self.in_flight += 1
         try:
             await self._ensure_connected()
 
@@ -136,8 +156,32 @@ class BaseGrpcClient(ABC):
 
             method = getattr(self.stub, method_name)
 
+            # Callers that don't pass a timeout get the deadline learned for this method and page size
+            deadline_key = latency_key(method_name, request)
+            if timeout is None:
+                timeout = self.deadlines.default_timeout(deadline_key)
+
+            # Reads stay on the primary for a while after this end user's own writes
+            caller_id = current_caller_id()
+            if caller_id is not None:
+                metadata = (*(metadata or ()), (CALLER_ID_METADATA, caller_id))
+
+            # Large requests of methods covered by the compression policy go out compressed
+            compression = self.compression.compression_for(method_name, request, "grpc_client")
+
             # Make the gRPC call
-            response = await method(request, timeout=timeout)
+            started = time.perf_counter()
+            try:
+                if tracer.enabled:
+                    response = await self._traced_call(method_name, method, request, timeout, metadata, compression)
+                else:
+                    response = await method(request, timeout=timeout, metadata=metadata, compression=compression)
+            except grpc.RpcError as e:
+                # Connection failures say nothing about how long the method takes to serve
+                if e.code() not in _UNTRACKED_LATENCY_CODES:
+                    self.deadlines.record(deadline_key, time.perf_counter() - started)
+                raise
+            self.deadlines.record(deadline_key, time.perf_counter() - started)
 
             # Convert response if converter provided
             if to_model:
@@ -152,12 +196,36 @@ class BaseGrpcClient(ABC):
         except Exception as e:
             logger.error(f"Unexpected error in gRPC call {method_name}: {e}")
             raise GrpcClientError(f"Unexpected error in {method_name}: {e}") from e
+        finally:
+            self.in_flight -= 1
+
+    async def _traced_call(
+        self,
+        method_name: str,
+        method: Callable,
+        request: Any,
+        timeout: Optional[float],
+        metadata: Optional[Sequence[Tuple[str, str]]] = None,
+        compression: Optional[grpc.Compression] = None
+    ):
+        """Invoke method inside a client span and propagate its context in the metadata"""
+        with tracer.start_as_current_span(f"grpc.client {method_name}", kind=SPAN_KIND_CLIENT) as span:
+            span.set_attribute("rpc.method", method_name)
+            span.set_attribute("net.peer.name", self.address)
+            call_metadata: List[Tuple[str, str]] = list(metadata or ()) + (tracer.inject(span) or [])
+            try:
+                return await method(request, timeout=timeout, metadata=call_metadata, compression=compression)
+            except grpc.RpcError as e:
+                span.set_attribute("rpc.grpc.status_code", e.code().name)
+                span.set_status(STATUS_ERROR, e.details() or "")
+                raise
 
     async def call_with_model(
         self,
         method_name: str,
         request: Any,
-        timeout: Optional[float] = None
+        timeout: Optional[float] = None,
+        metadata: Optional[Sequence[Tuple[str, str]]] = None
     ):
         """
         Call gRPC method and automatically convert response to domain model
@@ -166,6 +234,7 @@ class BaseGrpcClient(ABC):
             method_name: Name of the gRPC method to call
             request: Request message
             timeout: Optional timeout in seconds
+            metadata: Optional extra invocation metadata
 
         Returns:
             Converted domain model
@@ -174,14 +243,16 @@ class BaseGrpcClient(ABC):
             method_name,
             request,
             to_model=self.protobuf_to_model,
-            timeout=timeout
+            timeout=timeout,
+            metadata=metadata
         )
 
     async def call_raw(
         self,
         method_name: str,
         request: Any,
-        timeout: Optional[float] = None
+        timeout: Optional[float] = None,
+        metadata: Optional[Sequence[Tuple[str, str]]] = None
     ):
         """
         Call gRPC method and return raw protobuf response
@@ -190,11 +261,68 @@ class BaseGrpcClient(ABC):
             method_name: Name of the gRPC method to call
             request: Request message
             timeout: Optional timeout in seconds
+            metadata: Optional extra invocation metadata
 
         Returns:
             Raw protobuf response
         """
-        return await self._call(method_name, request, timeout=timeout)
+        return await self._call(method_name, request, timeout=timeout, metadata=metadata)
+
+    async def subscribe(
+        self,
+        method_name: str,
+        make_request: Callable[[str, int], Any],
+        handle_event: Callable[[Any], None],
+        max_backoff: float = 30.0,
+        on_disconnect: Optional[Callable[[], None]] = None
+    ):
+        """
+        Follow a server-streaming change feed until cancelled, reconnecting when it ends
+
+        Events must carry epoch and sequence fields. Every (re)connect sends
+        make_request(epoch, sequence) of the last event handled, ("", 0) at first, so the
+        server can replay what was missed meanwhile or tell the subscriber to start over.
+        Stream calls are not counted as in-flight, so drain_all doesn't wait for them.
+
+        Args:
+            method_name: Name of the server-streaming gRPC method
+            make_request: Builds the request from the last epoch and sequence
+            handle_event: Called with every event, in order
+            max_backoff: Upper bound in seconds on the wait between reconnects
+            on_disconnect: Called whenever a stream ends or fails, before reconnecting
+        """
+        epoch, sequence = "", 0
+        backoff = 0.5
+        while True:
+            call = None
+            try:
+                await self._ensure_connected()
+                call = getattr(self.stub, method_name)(make_request(epoch, sequence))
+                async for event in call:
+                    handle_event(event)
+                    epoch, sequence = event.epoch, event.sequence
+                    backoff = 0.5
+                logger.info(f"{method_name} stream from {self.address} ended, reconnecting")
+            except grpc.RpcError as e:
+                if e.code() == grpc.StatusCode.UNIMPLEMENTED:
+                    logger.warning(f"{self.address} doesn't serve {method_name}: {e.details()}")
+                    return
+                logger.warning(f"{method_name} stream from {self.address} failed: {e.code().name}: {e.details()}")
+            except ConnectionError as e:
+                logger.warning(f"{method_name} stream from {self.address} failed: {e}")
+            finally:
+                if call is not None:
+                    call.cancel()
+                if on_disconnect is not None:
+                    on_disconnect()
+            stream_reconnects_counter.inc(method=method_name)
+            # Jittered, so subscribers of a restarted server don't all come back at once
+            await asyncio.sleep(random.uniform(backoff / 2, backoff))
+            backoff = min(backoff * 2, max_backoff)
+
+    async def watch(self):
+        """Subclasses with a change feed follow it here (see subscribe) until cancelled"""
+        return None
 
     async def health_check(self, timeout: float = 5.0) -> bool:
         """
@@ -223,6 +351,80 @@ class BaseGrpcClient(ABC):
             logger.warning(f"Health check failed for {self.address}: {e}")
             return False
 
+    @classmethod
+    def latency_report(cls) -> dict:
+        """
+        Adaptive deadlines and the latency quantiles behind them for every client instance
+
+        Returns:
+            {"<ClientClass>@<address>": {method: {"samples", "p50", "p90", "p99", "deadline"}}}
+        """
+        return {
+            f"{instance.__class__.__name__}@{instance.address}": instance.deadlines.snapshot()
+            for instance in list(cls._instances)
+        }
+
+    @classmethod
+    async def prewarm_all(cls, timeout: float = 5.0) -> int:
+        """
+        Connect every client instance and wait for its channel to become ready
+
+        Args:
+            timeout: Maximum seconds to wait for all channels together
+
+        Returns:
+            Number of channels that were not ready in time (they keep connecting in the background)
+        """
+        instances = list(cls._instances)
+        for instance in instances:
+            await instance._ensure_connected()
+        results = await asyncio.gather(
+            *(asyncio.wait_for(instance.channel.channel_ready(), timeout) for instance in instances),
+            return_exceptions=True
+        )
+        not_ready = [
+            instance.address for instance, result in zip(instances, results) if isinstance(result, BaseException)
+        ]
+        if not_ready:
+            logger.warning(f"gRPC channels not ready after {timeout}s: {', '.join(not_ready)}")
+        return len(not_ready)
+
+    @classmethod
+    def watch_all(cls) -> List[asyncio.Task]:
+        """
+        Start watch() of every client instance in the background
+
+        Returns:
+            The tasks; cancel them at shutdown
+        """
+        return [
+            asyncio.create_task(instance.watch(), name=f"{instance.__class__.__name__}@{instance.address} watch")
+            for instance in list(cls._instances)
+        ]
+
+    @classmethod
+    async def drain_all(cls, timeout: float = 10.0) -> int:
+        """
+        Wait for outstanding calls on every client instance to finish
+
+        Args:
+            timeout: Maximum seconds to wait
+
+        Returns:
+            Number of calls still outstanding when the wait ended
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        outstanding = sum(instance.in_flight for instance in list(cls._instances))
+        if outstanding:
+            logger.info(f"Waiting up to {timeout}s for {outstanding} outstanding gRPC calls")
+        while outstanding and loop.time() < deadline:
+            await asyncio.sleep(0.05)
+            outstanding = sum(instance.in_flight for instance in list(cls._instances))
+        if outstanding:
+            logger.warning(f"{outstanding} gRPC calls still outstanding after {timeout}s; closing channels")
+        return outstanding
+
     @classmethod
     async def cleanup_all(cls):
         """Clean up all client instances"""
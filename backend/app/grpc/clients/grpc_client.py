@@ -2,7 +2,7 @@ from typing import AsyncGenerator
 from app.grpc.clients.user_service_client import UserServiceClient
 from app.grpc.config.grpc_config import GrpcServicesConfig
 
-# Singleton clients (created once per process)
+# Singleton clients (created once per process, shared by REST and GraphQL)
 config = GrpcServicesConfig()
 user_client = UserServiceClient(config.user_service_host, config.user_service_port)
 
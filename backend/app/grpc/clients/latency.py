@@ -0,0 +1,173 @@
+"""
+Per-method latency tracking and the adaptive default deadlines derived from it.
+
+Latencies go into log-bucketed sketches (the DDSketch layout): a value v lands in bucket
+ceil(log_gamma(v)), so any quantile is reported within relative_accuracy of the true value
+while memory only grows with the logarithm of the latency range. Sketches are kept per
+time slice and merged over a sliding window, so old slow periods age out.
+
+Requests with a limit field are tracked per page-size bucket (GetUsers[limit<=10],
+GetUsers[limit<=1000], GetUsers[unbounded], ...): a large page must not get the deadline
+learned from small ones.
+"""
+import math
+import time
+from collections import deque
+from typing import Deque, Dict, Optional, Tuple
+
+from app.grpc.config.grpc_config import AdaptiveDeadlineConfig
+from app.observability.metrics import registry
+
+REPORTED_QUANTILES = (0.5, 0.9, 0.99)
+
+# Upper bounds of the page-size buckets of requests with a limit field
+LIMIT_BUCKETS = (10, 100, 1000)
+
+latency_quantile_gauge = registry.gauge(
+    "grpc_client_latency_quantile_seconds", "Client-observed RPC latency quantiles over the sliding window"
+)
+latency_samples_gauge = registry.gauge(
+    "grpc_client_latency_window_samples", "RPC latencies currently in the sliding window"
+)
+deadline_gauge = registry.gauge(
+    "grpc_client_default_deadline_seconds", "Deadline applied to calls made without an explicit timeout"
+)
+
+
+class LatencySketch:
+    """Mergeable log-bucket histogram with bounded relative error on quantiles."""
+
+    def __init__(self, relative_accuracy: float = 0.01, min_value: float = 1e-6):
+        self.relative_accuracy = relative_accuracy
+        self.min_value = min_value
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.buckets: Dict[int, int] = {}
+        self.count = 0
+
+    def add(self, value: float):
+        key = math.ceil(math.log(max(value, self.min_value)) / self._log_gamma)
+        self.buckets[key] = self.buckets.get(key, 0) + 1
+        self.count += 1
+
+    def merge(self, other: "LatencySketch"):
+        for key, count in other.buckets.items():
+            self.buckets[key] = self.buckets.get(key, 0) + count
+        self.count += other.count
+
+    def quantile(self, q: float) -> Optional[float]:
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        seen = 0
+        for key in sorted(self.buckets):
+            seen += self.buckets[key]
+            if seen > rank:
+                return 2 * self.gamma ** key / (self.gamma + 1)
+        return None
+
+
+class SlidingWindowSketch:
+    """LatencySketch over the last window_seconds, rotated in `slices` steps."""
+
+    def __init__(self, window_seconds: float = 60.0, slices: int = 6, relative_accuracy: float = 0.01):
+        self.slice_seconds = window_seconds / slices
+        self.slices = slices
+        self.relative_accuracy = relative_accuracy
+        self._slices: Deque[Tuple[float, LatencySketch]] = deque()
+
+    def _current(self, now: float) -> LatencySketch:
+        if not self._slices or now - self._slices[-1][0] >= self.slice_seconds:
+            self._slices.append((now, LatencySketch(self.relative_accuracy)))
+        while self._slices and now - self._slices[0][0] >= self.slice_seconds * self.slices:
+            self._slices.popleft()
+        return self._slices[-1][1]
+
+    def add(self, value: float, now: Optional[float] = None):
+        self._current(time.monotonic() if now is None else now).add(value)
+
+    def merged(self, now: Optional[float] = None) -> LatencySketch:
+        now = time.monotonic() if now is None else now
+        merged = LatencySketch(self.relative_accuracy)
+        for started, sketch in self._slices:
+            if now - started < self.slice_seconds * self.slices:
+                merged.merge(sketch)
+        return merged
+
+
+def latency_key(method: str, request=None) -> str:
+    """The method, plus the page-size bucket when the request has a limit (0 = no limit)."""
+    limit = getattr(request, "limit", None)
+    if not isinstance(limit, int):
+        return method
+    if limit <= 0:
+        return f"{method}[unbounded]"
+    for bound in LIMIT_BUCKETS:
+        if limit <= bound:
+            return f"{method}[limit<={bound}]"
+    return f"{method}[limit>{LIMIT_BUCKETS[-1]}]"
+
+
+class AdaptiveDeadlines:
+    """
+    Learns a default deadline per RPC method (and page-size bucket, see latency_key) from
+    its recent latencies.
+
+    The deadline is multiplier x p99 clamped to [min_seconds, max_seconds]; until a method
+    has min_samples latencies in the window, max_seconds is used. Values are recomputed at
+    most every refresh_seconds and published as gauges labelled by client and method.
+    """
+
+    def __init__(self, client: str, config: Optional[AdaptiveDeadlineConfig] = None):
+        self.client = client
+        self.config = config or AdaptiveDeadlineConfig()
+        self._sketches: Dict[str, SlidingWindowSketch] = {}
+        # method -> (computed at, deadline)
+        self._deadlines: Dict[str, Tuple[float, float]] = {}
+
+    def record(self, method: str, seconds: float):
+        sketch = self._sketches.get(method)
+        if sketch is None:
+            sketch = self._sketches[method] = SlidingWindowSketch(
+                self.config.window_seconds, relative_accuracy=self.config.relative_accuracy
+            )
+        sketch.add(seconds)
+
+    def default_timeout(self, method: str) -> Optional[float]:
+        if not self.config.enabled:
+            return None
+        now = time.monotonic()
+        cached = self._deadlines.get(method)
+        if cached is not None and now - cached[0] < self.config.refresh_seconds:
+            return cached[1]
+        return self._refresh(method, now)["deadline"]
+
+    def _refresh(self, method: str, now: float) -> Dict:
+        config = self.config
+        sketch = self._sketches.get(method)
+        merged = sketch.merged(now) if sketch else LatencySketch(config.relative_accuracy)
+        quantiles = {q: merged.quantile(q) for q in REPORTED_QUANTILES}
+
+        if merged.count >= config.min_samples:
+            deadline = min(max(config.multiplier * quantiles[0.99], config.min_seconds), config.max_seconds)
+        else:
+            deadline = config.max_seconds
+        self._deadlines[method] = (now, deadline)
+
+        labels = {"client": self.client, "method": method}
+        latency_samples_gauge.set(merged.count, **labels)
+        deadline_gauge.set(deadline, **labels)
+        for q, value in quantiles.items():
+            if value is not None:
+                latency_quantile_gauge.set(value, quantile=q, **labels)
+
+        return {
+            "samples": merged.count,
+            **{f"p{round(q * 100)}": value for q, value in quantiles.items()},
+            "deadline": deadline,
+        }
+
+    def snapshot(self) -> Dict[str, Dict]:
+        """Current deadline and window quantiles per method, refreshing the gauges."""
+        now = time.monotonic()
+        return {method: self._refresh(method, now) for method in sorted(self._sketches)}
@@ -0,0 +1,279 @@
+"""
+Cross-process cache of serialized messages keyed by integer id, in a memory-mapped file.
+
+Every BFF worker on a host maps the same file (USER_CACHE_PATH, set by the launcher), so
+they share one hot set instead of each warming its own copy. Without a path the table is
+an anonymous mapping private to the process.
+
+Layout: a header, then fixed-size slots grouped into buckets of WAYS slots, then one
+reference byte per slot. A key lives in bucket hash(key) % buckets, in whichever of its
+ways is free (set-associative). When a bucket is full, the CLOCK algorithm picks the way
+to evict: a hit sets the slot's reference byte, the bucket's hand clears reference bytes
+as it passes and evicts the first slot whose byte is already clear.
+
+Reads take no locks. Each slot has a sequence number that writers make odd before they
+change the slot and even again after. A reader that sees an odd number, or a different
+number after copying the slot, retries. Writers lock one of `stripes` byte ranges of the
+file with fcntl (buckets map to stripes), plus a thread lock because fcntl locks belong
+to the process.
+
+Entries expire after ttl_seconds. Every entry records the table's generation when it was
+written, and bumping the generation (invalidate_all) drops everything at once.
+
+A value read from the service can arrive after a newer one (or a deletion) was cached, so
+puts are conditional: a put carrying a lower version than the cached entry is skipped, a
+deleted key leaves a tombstone that refuses puts until it expires, and a put made with the
+generation read before the value was fetched is skipped when the generation moved on.
+"""
+import fcntl
+import logging
+import mmap
+import os
+import struct
+import threading
+import time
+from typing import Optional
+
+from app.observability.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"USRCACH2"
+WAYS = 8
+
+# magic, slots, slot size, stripes, generation
+_HEADER = struct.Struct("<8sIIIQ")
+_HEADER_SIZE = 64
+_GENERATION_OFFSET = 20
+# sequence, used, key, expires at (epoch seconds), generation, version, payload length
+_SLOT = struct.Struct("<IIqdQqI")
+_SEQUENCE = struct.Struct("<I")
+_GENERATION = struct.Struct("<Q")
+
+# Values of a slot's used field
+_FREE = 0
+_VALUE = 1
+_TOMBSTONE = 2
+# Version of a tombstone: higher than any put's
+_MAX_VERSION = (1 << 63) - 1
+
+_READ_ATTEMPTS = 4
+# Stripe locks live past the end of the table so they never overlap data
+_LOCK_BASE = 1 << 40
+
+cache_requests_counter = registry.counter("user_cache_requests_total", "Shared user cache lookups, by result")
+cache_evictions_counter = registry.counter("user_cache_evictions_total", "Entries evicted from the shared user cache")
+cache_skipped_counter = registry.counter(
+    "user_cache_skipped_total", "Values not cached, by reason (too large, stale version or generation)"
+)
+
+
+class SharedCache:
+    """Fixed-size, set-associative hash table of bytes in a (shared) memory map."""
+
+    def __init__(
+        self,
+        path: Optional[str],
+        slots: int = 65536,
+        slot_size: int = 512,
+        ttl_seconds: float = 30.0,
+        stripes: int = 64
+    ):
+        self.buckets = max(slots // WAYS, 1)
+        self.slots = self.buckets * WAYS
+        self.slot_size = slot_size
+        self.capacity = slot_size - _SLOT.size
+        if self.capacity <= 0:
+            raise ValueError(f"slot_size must be larger than {_SLOT.size} bytes")
+        self.ttl_seconds = ttl_seconds
+        self.stripes = stripes
+        self._slots_offset = _HEADER_SIZE
+        self._refs_offset = self._slots_offset + self.slots * slot_size
+        self._hands_offset = self._refs_offset + self.slots
+        size = self._hands_offset + self.buckets
+        self._thread_locks = [threading.Lock() for _ in range(stripes)]
+
+        self._fd: Optional[int] = None
+        if path is not None:
+            self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+            # Whichever process gets here first sizes and initializes the file
+            fcntl.lockf(self._fd, fcntl.LOCK_EX)
+            try:
+                existing_size = os.fstat(self._fd).st_size
+                if existing_size == 0:
+                    os.ftruncate(self._fd, size)
+                if existing_size in (0, size):
+                    self._map = mmap.mmap(self._fd, size)
+                    if _HEADER.unpack_from(self._map, 0)[:4] != (MAGIC, self.slots, slot_size, stripes):
+                        self._initialize()
+                else:
+                    # Resizing would pull the mapping from under the processes using it
+                    logger.warning(f"{path} was created with other cache settings; using a private cache")
+                    os.close(self._fd)
+                    self._fd = None
+            finally:
+                if self._fd is not None:
+                    fcntl.lockf(self._fd, fcntl.LOCK_UN)
+        if self._fd is None:
+            self._map = mmap.mmap(-1, size)
+            self._initialize()
+
+    def _initialize(self):
+        self._map[:] = bytes(len(self._map))
+        _HEADER.pack_into(self._map, 0, MAGIC, self.slots, self.slot_size, self.stripes, 0)
+
+    @property
+    def generation(self) -> int:
+        return _GENERATION.unpack_from(self._map, _GENERATION_OFFSET)[0]
+
+    def _bucket(self, key: int) -> int:
+        # Fibonacci hashing spreads sequential ids over the buckets
+        return ((key * 0x9E3779B97F4A7C15) & 0xFFFFFFFFFFFFFFFF) % self.buckets
+
+    def _slot_offset(self, slot: int) -> int:
+        return self._slots_offset + slot * self.slot_size
+
+    def _lock(self, bucket: int):
+        return _StripeLock(self, bucket % self.stripes)
+
+    def get(self, key: int) -> Optional[bytes]:
+        """The value cached for key, or None when absent, expired or invalidated."""
+        bucket = self._bucket(key)
+        generation = self.generation
+        now = time.time()
+        for slot in range(bucket * WAYS, (bucket + 1) * WAYS):
+            offset = self._slot_offset(slot)
+            for _ in range(_READ_ATTEMPTS):
+                sequence, used, slot_key, expires_at, slot_generation, _, length = _SLOT.unpack_from(self._map, offset)
+                if sequence & 1:
+                    continue
+                if not used or slot_key != key:
+                    break
+                value = self._map[offset + _SLOT.size:offset + _SLOT.size + min(length, self.capacity)]
+                if _SEQUENCE.unpack_from(self._map, offset)[0] != sequence:
+                    continue
+                if expires_at <= now or slot_generation != generation:
+                    cache_requests_counter.inc(result="expired")
+                    return None
+                if used == _TOMBSTONE:
+                    cache_requests_counter.inc(result="deleted")
+                    return None
+                self._map[self._refs_offset + slot] = 1
+                cache_requests_counter.inc(result="hit")
+                return value
+            # Falling out of the retries (a slot rewritten throughout) moves on to the next way
+        cache_requests_counter.inc(result="miss")
+        return None
+
+    def put(self, key: int, value: bytes, version: int = 0, generation: Optional[int] = None):
+        """
+        Cache value for key, evicting another entry of its bucket if needed.
+
+        Skipped when the cached entry for key has a higher version (or is a tombstone), or
+        when generation (read before the value was fetched) is no longer current.
+        """
+        if len(value) > self.capacity:
+            cache_skipped_counter.inc(reason="too_large")
+            return
+        self._store(key, _VALUE, value, version, generation)
+
+    def invalidate(self, key: int):
+        """Drop key in every process and refuse puts of it until the entry would have expired."""
+        self._store(key, _TOMBSTONE, b"", _MAX_VERSION, None)
+
+    def _store(self, key: int, used: int, value: bytes, version: int, generation: Optional[int]):
+        bucket = self._bucket(key)
+        first = bucket * WAYS
+        with self._lock(bucket):
+            current_generation = self.generation
+            if generation is not None and generation != current_generation:
+                cache_skipped_counter.inc(reason="stale_generation")
+                return
+            now = time.time()
+            target = None
+            free = None
+            for slot in range(first, first + WAYS):
+                _, slot_used, slot_key, expires_at, slot_generation, slot_version, _ = _SLOT.unpack_from(
+                    self._map, self._slot_offset(slot)
+                )
+                live = slot_used and expires_at > now and slot_generation == current_generation
+                if slot_used and slot_key == key:
+                    if live and slot_version > version:
+                        cache_skipped_counter.inc(reason="stale_version")
+                        return
+                    target = slot
+                    break
+                if free is None and not live:
+                    free = slot
+            if target is None:
+                target = free if free is not None else self._evict(bucket)
+            self._write(target, used, key, now + self.ttl_seconds, current_generation, version, value)
+
+    def invalidate_all(self):
+        """Drop every entry in every process by moving to the next generation."""
+        with _StripeLock(self, self.stripes):
+            _GENERATION.pack_into(self._map, _GENERATION_OFFSET, self.generation + 1)
+
+    def _evict(self, bucket: int) -> int:
+        """CLOCK within the bucket: the first way whose reference byte is clear."""
+        hand_offset = self._hands_offset + bucket
+        hand = self._map[hand_offset]
+        for step in range(2 * WAYS):
+            slot = bucket * WAYS + (hand + step) % WAYS
+            if self._map[self._refs_offset + slot]:
+                self._map[self._refs_offset + slot] = 0
+                continue
+            self._map[hand_offset] = (hand + step + 1) % WAYS
+            cache_evictions_counter.inc()
+            return slot
+        # Unreachable: the first pass clears every reference byte
+        return bucket * WAYS + hand
+
+    def _write(self, slot: int, used: int, key: int, expires_at: float, generation: int, version: int, value: bytes):
+        offset = self._slot_offset(slot)
+        sequence = _SEQUENCE.unpack_from(self._map, offset)[0]
+        _SEQUENCE.pack_into(self._map, offset, (sequence + 1) & 0xFFFFFFFF)
+        self._map[offset + _SLOT.size:offset + _SLOT.size + len(value)] = value
+        _SLOT.pack_into(
+            self._map, offset, (sequence + 1) & 0xFFFFFFFF, used, key, expires_at, generation, version, len(value)
+        )
+        self._map[self._refs_offset + slot] = 0
+        _SEQUENCE.pack_into(self._map, offset, (sequence + 2) & 0xFFFFFFFF)
+
+    def close(self):
+        self._map.close()
+        if self._fd is not None:
+            os.close(self._fd)
+
+
+class _StripeLock:
+    """Thread lock plus, for file-backed tables, an fcntl lock on the stripe's byte."""
+
+    def __init__(self, cache: SharedCache, stripe: int):
+        self.cache = cache
+        self.stripe = stripe
+        self.thread_lock = cache._thread_locks[stripe % cache.stripes]
+
+    def __enter__(self):
+        self.thread_lock.acquire()
+        if self.cache._fd is not None:
+            fcntl.lockf(self.cache._fd, fcntl.LOCK_EX, 1, _LOCK_BASE + self.stripe)
+        return self
+
+    def __exit__(self, *exc):
+        if self.cache._fd is not None:
+            fcntl.lockf(self.cache._fd, fcntl.LOCK_UN, 1, _LOCK_BASE + self.stripe)
+        self.thread_lock.release()
+
+
+def create_user_cache() -> Optional[SharedCache]:
+    """The user cache configured by USER_CACHE_*; None when USER_CACHE_TTL_SECONDS is 0."""
+    ttl_seconds = float(os.getenv("USER_CACHE_TTL_SECONDS", "30"))
+    if ttl_seconds <= 0:
+        return None
+    return SharedCache(
+        os.getenv("USER_CACHE_PATH") or None,
+        slots=int(os.getenv("USER_CACHE_SLOTS", "65536")),
+        slot_size=int(os.getenv("USER_CACHE_SLOT_BYTES", "512")),
+        ttl_seconds=ttl_seconds,
+    )
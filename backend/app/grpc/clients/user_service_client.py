@@ -1,11 +1,41 @@
+import logging
+import os
+from datetime import datetime, timedelta, timezone
 from typing import List, Optional, Union
 from generated import user_pb2
 from generated import user_pb2_grpc
-from app.models.user import User, UserCreate, UserInput
+from app.models.user import (
+    User, UserCreate, UserInput, UserPage, UserSearchPage, TotalCountMode, SearchMatchMode
+)
 from app.grpc.clients.base_client import BaseGrpcClient
+from app.grpc.clients.shared_cache import create_user_cache
+from app.observability.loop_monitor import offload
+
+logger = logging.getLogger(__name__)
+
+_TOTAL_COUNT_MODES = {
+    None: user_pb2.TOTAL_COUNT_NONE,
+    TotalCountMode.EXACT: user_pb2.TOTAL_COUNT_EXACT,
+    TotalCountMode.ESTIMATE: user_pb2.TOTAL_COUNT_ESTIMATE,
+}
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+_SEARCH_MATCH_MODES = {
+    SearchMatchMode.PREFIX: user_pb2.SEARCH_MATCH_PREFIX,
+    SearchMatchMode.SUBSTRING: user_pb2.SEARCH_MATCH_SUBSTRING,
+}
 
 
 class UserServiceClient(BaseGrpcClient):
+    def __init__(self, host: str, port: int, **channel_options):
+        super().__init__(host, port, **channel_options)
+        # Shared by every worker on the host when the launcher sets USER_CACHE_PATH
+        self.cache = create_user_cache()
+        # Following WatchUsers, the cache is only used while the feed is live (see watch)
+        self._cache_needs_feed = os.getenv("USER_CACHE_WATCH", "true").lower() == "true"
+        self._feed_live = False
+
     @property
     def stub_class(self):
         return user_pb2_grpc.UserServiceStub
@@ -16,10 +46,12 @@ class UserServiceClient(BaseGrpcClient):
             id=proto.id,
             name=proto.name,
             email=proto.email,
-            is_active=proto.is_active
+            is_active=proto.is_active,
+            updated_at=_EPOCH + timedelta(microseconds=proto.version) if proto.version else None
         )
 
     def protobuf_to_model_list(self, protos: List[user_pb2.User]) -> List[User]:
+        """Convert a list of user protobufs; callers offload large lists to a worker thread"""
         return [self.protobuf_to_model(user) for user in protos]
 
     def _create_user_request(self, user_data: Union[UserCreate, UserInput]) -> user_pb2.CreateUserRequest:
@@ -29,17 +61,129 @@ class UserServiceClient(BaseGrpcClient):
             email=user_data.email
         )
 
+    @property
+    def _cache_usable(self) -> bool:
+        """Without a live feed nothing would invalidate what this worker reads or writes"""
+        return self.cache is not None and (self._feed_live or not self._cache_needs_feed)
+
+    def _cached_user(self, user_id: int) -> Optional[user_pb2.User]:
+        data = self.cache.get(user_id) if self._cache_usable else None
+        return user_pb2.User.FromString(data) if data is not None else None
+
+    def _cache_generation(self) -> Optional[int]:
+        """Read before fetching users, so a reset while the call is in flight drops its puts"""
+        return self.cache.generation if self.cache is not None else None
+
+    def _cache_users(self, users, generation: Optional[int] = None):
+        if self._cache_usable:
+            for user in users:
+                # A response racing a newer WatchUsers event must not overwrite it
+                self.cache.put(user.id, user.SerializeToString(), version=user.version, generation=generation)
+
+    async def watch(self):
+        """
+        Keep the user cache in step with the WatchUsers change feed
+
+        The cache is bypassed until the first event of a stream arrives (a RESET for a new
+        subscriber) and whenever the stream is down, e.g. refused because the service
+        already serves USER_WATCH_MAX_STREAMS streams.
+        """
+        if self.cache is None or not self._cache_needs_feed:
+            return
+        await self.subscribe(
+            "WatchUsers",
+            lambda epoch, sequence: user_pb2.WatchUsersRequest(epoch=epoch, after_sequence=sequence),
+            self._apply_user_event,
+            on_disconnect=self._feed_down
+        )
+        logger.warning("User cache relies on USER_CACHE_TTL_SECONDS alone; the service has no change feed")
+        self._cache_needs_feed = False
+
+    def _feed_down(self):
+        self._feed_live = False
+
+    def _apply_user_event(self, event: user_pb2.UserEvent):
+        self._feed_live = True
+        if event.type == user_pb2.USER_EVENT_RESET:
+            self.cache.invalidate_all()
+        elif event.type == user_pb2.USER_EVENT_DELETED:
+            self.cache.invalidate(event.user.id)
+        elif event.type in (user_pb2.USER_EVENT_CREATED, user_pb2.USER_EVENT_UPDATED):
+            self.cache.put(event.user.id, event.user.SerializeToString(), version=event.user.version)
+
     async def get_user(self, user_id: int, timeout: Optional[float] = None) -> User:
+        cached = self._cached_user(user_id)
+        if cached is not None:
+            return self.protobuf_to_model(cached)
+        generation = self._cache_generation()
         request = user_pb2.GetUserRequest(id=user_id)
-        return await self.call_with_model("GetUser", request, timeout=timeout)
+        response = await self.call_raw("GetUser", request, timeout=timeout)
+        self._cache_users([response], generation)
+        return self.protobuf_to_model(response)
+
+    async def get_user_if_modified(
+        self,
+        user_id: int,
+        known_version: datetime,
+        timeout: Optional[float] = None
+    ) -> Optional[User]:
+        """Fetch a user unless known_version (its updated_at) is still current; None means unchanged"""
+        request = user_pb2.GetUserIfModifiedRequest(
+            id=user_id,
+            known_version=(known_version - _EPOCH) // timedelta(microseconds=1)
+        )
+        generation = self._cache_generation()
+        response = await self.call_raw("GetUserIfModified", request, timeout=timeout)
+        if response.not_modified:
+            return None
+        self._cache_users([response.user], generation)
+        return self.protobuf_to_model(response.user)
+
+    async def batch_get_users(self, user_ids: List[int], timeout: Optional[float] = None) -> List[User]:
+        """Fetch up to 100 users by id in one call; ids that don't exist are left out"""
+        found = {}
+        for user_id in user_ids:
+            cached = self._cached_user(user_id)
+            if cached is not None:
+                found[user_id] = cached
+        missing = [user_id for user_id in user_ids if user_id not in found]
+        if missing:
+            generation = self._cache_generation()
+            request = user_pb2.BatchGetUsersRequest(ids=missing)
+            response = await self.call_raw("BatchGetUsers", request, timeout=timeout)
+            self._cache_users(response.users, generation)
+            found.update((user.id, user) for user in response.users)
+        users = [found[user_id] for user_id in dict.fromkeys(user_ids) if user_id in found]
+        return await offload(self.protobuf_to_model_list, users)
+
+    @staticmethod
+    def _idempotency_metadata(idempotency_key: Optional[str]):
+        return [("idempotency-key", idempotency_key)] if idempotency_key else None
 
-    async def create_user(self, user_data: UserCreate, timeout: Optional[float] = None) -> User:
+    async def create_user(
+        self,
+        user_data: UserCreate,
+        timeout: Optional[float] = None,
+        idempotency_key: Optional[str] = None
+    ) -> User:
+        """Create a user; retries with the same idempotency_key get the first attempt's result"""
         request = self._create_user_request(user_data)
-        return await self.call_with_model("CreateUser", request, timeout=timeout)
+        metadata = self._idempotency_metadata(idempotency_key)
+        response = await self.call_raw("CreateUser", request, timeout=timeout, metadata=metadata)
+        self._cache_users([response])
+        return self.protobuf_to_model(response)
 
-    async def create_user_from_input(self, user_input: UserInput, timeout: Optional[float] = None) -> User:
+    async def create_user_from_input(
+        self,
+        user_input: UserInput,
+        timeout: Optional[float] = None,
+        idempotency_key: Optional[str] = None
+    ) -> User:
         request = self._create_user_request(user_input)
-        return await self.call_with_model("CreateUser", request, timeout=timeout)
+        metadata = self._idempotency_metadata(idempotency_key)
+        response = await self.call_raw("CreateUser", request, timeout=timeout, metadata=metadata)
+        self._cache_users([response])
+        return self.protobuf_to_model(response)
 
     async def get_users(
         self,
@@ -49,4 +193,59 @@ class UserServiceClient(BaseGrpcClient):
     ) -> List[User]:
         request = user_pb2.GetUsersRequest(limit=limit, offset=offset)
         response = await self.call_raw("GetUsers", request, timeout=timeout)
-        return self.protobuf_to_model_list(response.users)
+        return await offload(self.protobuf_to_model_list, response.users)
+
+    async def get_users_after(
+        self,
+        after_id: int,
+        limit: int,
+        timeout: Optional[float] = None
+    ) -> List[User]:
+        """Up to limit users with an id greater than after_id, in id order (keyset pagination)"""
+        request = user_pb2.GetUsersRequest(limit=limit, after_id=after_id)
+        response = await self.call_raw("GetUsers", request, timeout=timeout)
+        return await offload(self.protobuf_to_model_list, response.users)
+
+    async def get_users_page(
+        self,
+        limit: int = 10,
+        offset: int = 0,
+        include_total: Optional[TotalCountMode] = None,
+        timeout: Optional[float] = None
+    ) -> UserPage:
+        """Fetch a page of users, optionally with the total user count"""
+        request = user_pb2.GetUsersRequest(
+            limit=limit,
+            offset=offset,
+            include_total=_TOTAL_COUNT_MODES[include_total]
+        )
+        response = await self.call_raw("GetUsers", request, timeout=timeout)
+        return UserPage(
+            users=await offload(self.protobuf_to_model_list, response.users),
+            total_count=response.total_count if include_total else None,
+            total_is_estimate=response.total_is_estimate
+        )
+
+    async def search_users(
+        self,
+        query: str,
+        match: SearchMatchMode = SearchMatchMode.PREFIX,
+        is_active: Optional[bool] = None,
+        limit: int = 20,
+        after_id: int = 0,
+        timeout: Optional[float] = None
+    ) -> UserSearchPage:
+        """Search users by name/email; pass next_after_id back as after_id for the next page"""
+        request = user_pb2.SearchUsersRequest(
+            query=query,
+            match=_SEARCH_MATCH_MODES[match],
+            limit=limit,
+            after_id=after_id
+        )
+        if is_active is not None:
+            request.is_active = is_active
+        response = await self.call_raw("SearchUsers", request, timeout=timeout)
+        return UserSearchPage(
+            users=await offload(self.protobuf_to_model_list, response.users),
+            next_after_id=response.next_after_id or None
+        )
@@ -0,0 +1,75 @@
+"""
+Per-method gRPC message compression policy, shared by BaseGrpcClient (requests) and the
+servers (responses).
+
+gRPC core does the compressing; the policy only decides, per message, whether to ask for it.
+"""
+import os
+import random
+from dataclasses import dataclass, field
+from typing import FrozenSet, Optional
+
+import grpc
+
+from app.compression import compress, record_compression, skipped_counter
+
+_ALGORITHMS = {
+    "gzip": grpc.Compression.Gzip,
+    "deflate": grpc.Compression.Deflate,
+}
+
+
+@dataclass
+class CompressionPolicy:
+    """
+    Compress messages of at least min_bytes with gzip or deflate ("none" disables it).
+
+    methods limits the policy to those method names (e.g. GetUsers); empty means every
+    method. A sample_rate fraction of compressed messages is compressed again locally to
+    measure the ratio and CPU cost (see app.compression).
+    """
+    algorithm: str = "none"
+    min_bytes: int = 1024
+    methods: FrozenSet[str] = field(default_factory=frozenset)
+    sample_rate: float = 0.01
+
+    @classmethod
+    def from_env(cls, prefix: str, default_algorithm: str = "gzip") -> "CompressionPolicy":
+        """Policy from <prefix>_COMPRESSION, _COMPRESSION_MIN_BYTES, _COMPRESSION_METHODS and _COMPRESSION_SAMPLE_RATE."""
+        algorithm = os.getenv(f"{prefix}_COMPRESSION", default_algorithm).lower()
+        if algorithm != "none" and algorithm not in _ALGORITHMS:
+            raise ValueError(f"{prefix}_COMPRESSION must be gzip, deflate or none, got {algorithm!r}")
+        methods = os.getenv(f"{prefix}_COMPRESSION_METHODS", "")
+        return cls(
+            algorithm=algorithm,
+            min_bytes=int(os.getenv(f"{prefix}_COMPRESSION_MIN_BYTES", "1024")),
+            methods=frozenset(name.strip() for name in methods.split(",") if name.strip()),
+            sample_rate=float(os.getenv(f"{prefix}_COMPRESSION_SAMPLE_RATE", "0.01")),
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.algorithm in _ALGORITHMS
+
+    @property
+    def compression(self) -> grpc.Compression:
+        return _ALGORITHMS.get(self.algorithm, grpc.Compression.NoCompression)
+
+    def applies_to(self, method: str) -> bool:
+        """Whether method ("GetUsers" or "/user.UserService/GetUsers") is covered."""
+        return self.enabled and (not self.methods or method.rsplit("/", 1)[-1] in self.methods)
+
+    def compression_for(self, method: str, message, layer: str) -> Optional[grpc.Compression]:
+        """Compression to request for this message, or None to send it uncompressed."""
+        if not self.applies_to(method):
+            return None
+        size = message.ByteSize()
+        if size < self.min_bytes:
+            skipped_counter.inc(layer=layer, reason="below_threshold")
+            return None
+        measured = None
+        if self.sample_rate > 0 and random.random() < self.sample_rate:
+            compressed, seconds = compress(message.SerializeToString(), self.algorithm)
+            measured = (len(compressed), seconds)
+        record_compression(layer, self.algorithm, size, measured)
+        return self.compression
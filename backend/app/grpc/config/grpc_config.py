@@ -5,3 +5,16 @@ import os
 class GrpcServicesConfig:
     user_service_host: str = os.getenv("USER_SERVICE_HOST", "localhost")
     user_service_port: int = int(os.getenv("USER_SERVICE_PORT", "5001"))
+
+
+@dataclass
+class AdaptiveDeadlineConfig:
+    """Default deadlines learned from observed latency: multiplier x p99, clamped to [min, max]."""
+    enabled: bool = os.getenv("GRPC_ADAPTIVE_DEADLINES", "true").lower() == "true"
+    multiplier: float = float(os.getenv("GRPC_DEADLINE_P99_MULTIPLIER", "3"))
+    min_seconds: float = float(os.getenv("GRPC_DEADLINE_MIN_SECONDS", "0.1"))
+    max_seconds: float = float(os.getenv("GRPC_DEADLINE_MAX_SECONDS", "10"))
+    min_samples: int = int(os.getenv("GRPC_DEADLINE_MIN_SAMPLES", "50"))
+    window_seconds: float = float(os.getenv("GRPC_LATENCY_WINDOW_SECONDS", "60"))
+    refresh_seconds: float = float(os.getenv("GRPC_DEADLINE_REFRESH_SECONDS", "1"))
+    relative_accuracy: float = 0.01
@@ -0,0 +1,94 @@
+"""
+Side-port HTTP server for a gRPC service's operational endpoints.
+
+  GET /metrics                 Prometheus metrics of the process
+  GET /admin/profile?seconds=  sampling profile (see app.observability.profiler), requires
+                               Authorization: Bearer <ADMIN_TOKEN>
+
+Served by http.server on its own threads, so profiling works even when every gRPC worker
+thread is busy.
+"""
+import json
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+from urllib.parse import parse_qs, urlsplit
+
+from app.observability.metrics import registry
+from app.observability.profiler import (
+    admin_token_matches, profile_options, profiler, ProfilerBusy, ProfilerConfig
+)
+
+
+class AdminRequestHandler(BaseHTTPRequestHandler):
+    config = ProfilerConfig()
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        if url.path == "/metrics":
+            self._send(200, registry.render_prometheus(), "text/plain; version=0.0.4")
+        elif url.path == "/admin/profile" and self.config.admin_token:
+            self._profile({name: values[-1] for name, values in parse_qs(url.query).items()})
+        else:
+            self._send_json(404, {"detail": "Not Found"})
+
+    def _profile(self, params: dict):
+        if not admin_token_matches(self.headers.get("Authorization"), self.config):
+            self._send_json(401, {"detail": "Invalid admin token"})
+            return
+        try:
+            options = profile_options(
+                float(params.get("seconds", "10")),
+                float(params.get("interval_ms", "10")),
+                int(params.get("allocations", "0")),
+                params.get("idle", "false").lower() == "true",
+                self.config
+            )
+        except ValueError as e:
+            self._send_json(422, {"detail": str(e)})
+            return
+        try:
+            result = profiler.profile(**options)
+        except ProfilerBusy as e:
+            self._send_json(409, {"detail": str(e)})
+            return
+        if params.get("format") == "collapsed":
+            self._send(200, result.collapsed(), "text/plain; charset=utf-8")
+        else:
+            self._send_json(200, result.to_dict())
+
+    def _send_json(self, status: int, body: dict):
+        self._send(status, json.dumps(body), "application/json")
+
+    def _send(self, status: int, body: str, content_type: str):
+        data = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        logging.debug(f"Admin server: {format % args}")
+
+
+class AdminServer:
+    """Runs the admin HTTP server on a daemon thread."""
+
+    def __init__(self, port: int, host: str = "0.0.0.0"):
+        self.httpd = ThreadingHTTPServer((host, port), AdminRequestHandler)
+        self.httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def port(self) -> int:
+        return self.httpd.server_address[1]
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="admin-server", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
@@ -1,21 +1,93 @@
 import signal
 import threading
 import logging
+import time
+from typing import Callable, List, Optional
+
+from app.grpc.servers.health import HealthServicer
+from app.grpc.servers.interceptors import InFlightInterceptor
 
 class GracefulGRPCServer:
-    def __init__(self, server, name="gRPC server"):
+    """
+    Runs a gRPC server until SIGINT/SIGTERM, then drains it.
+
+    Drain sequence:
+      1. health reports NOT_SERVING, so health-checking load balancers and clients stop
+         routing new calls here; on_draining callbacks end long-lived streams; wait
+         drain_delay seconds for clients to notice
+      2. server.stop(grace_period): sends GOAWAY, rejects new RPCs and lets in-flight ones
+         finish until the deadline, then cancels what is left
+      3. on_stopped callbacks (e.g. closing the DB pool) and a drained/aborted report
+
+    A second signal skips the remaining grace period.
+    """
+
+    def __init__(
+        self,
+        server,
+        name="gRPC server",
+        grace_period: float = 30.0,
+        drain_delay: float = 0.0,
+        health: Optional[HealthServicer] = None,
+        in_flight: Optional[InFlightInterceptor] = None,
+        on_draining: Optional[List[Callable[[], None]]] = None,
+        on_stopped: Optional[List[Callable[[], None]]] = None
+    ):
         self.server = server
         self.name = name
+        self.grace_period = grace_period
+        self.drain_delay = drain_delay
+        self.health = health
+        self.in_flight = in_flight
+        self.on_draining = on_draining or []
+        self.on_stopped = on_stopped or []
         self.stop_event = threading.Event()
 
     def _handle_sigterm(self, *_):
+        if self.stop_event.is_set():
+            logging.info(f"Received second termination signal, stopping {self.name} now")
+            self.server.stop(grace=None)
+            return
         logging.info(f"Received termination signal, shutting down {self.name} gracefully...")
         self.stop_event.set()
-        self.server.stop(grace=None)
+
+    def drain(self):
+        """Stop accepting work, wait for in-flight RPCs up to the grace period and clean up."""
+        started = time.monotonic()
+        if self.health is not None:
+            self.health.enter_graceful_shutdown()
+        self._run_callbacks(self.on_draining)
+        if self.drain_delay > 0:
+            logging.info(f"{self.name} reporting NOT_SERVING, waiting {self.drain_delay}s before GOAWAY")
+            time.sleep(self.drain_delay)
+
+        completed_before = self.in_flight.completed if self.in_flight else 0
+        if self.in_flight:
+            logging.info(f"Draining {self.in_flight.active} in-flight RPCs (grace period {self.grace_period}s)")
+        self.server.stop(grace=self.grace_period).wait()
+        self._run_callbacks(self.on_stopped)
+
+        elapsed = time.monotonic() - started
+        if self.in_flight:
+            drained = self.in_flight.completed - completed_before
+            aborted = self.in_flight.active
+            logging.info(
+                f"{self.name} drained in {elapsed:.2f}s: {drained} RPCs completed, {aborted} aborted"
+            )
+        else:
+            logging.info(f"{self.name} drained in {elapsed:.2f}s")
+
+    def _run_callbacks(self, callbacks: List[Callable[[], None]]):
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                logging.warning(f"{self.name} shutdown callback failed: {e}")
 
     def start_and_wait(self):
         self.server.start()
         signal.signal(signal.SIGINT, self._handle_sigterm)
         signal.signal(signal.SIGTERM, self._handle_sigterm)
         self.stop_event.wait()
+        self.drain()
         logging.info(f"{self.name} stopped.")
@@ -0,0 +1,69 @@
+import threading
+from typing import Dict
+
+import grpc
+
+from generated import health_pb2
+from generated import health_pb2_grpc
+
+SERVING = health_pb2.HealthCheckResponse.SERVING
+NOT_SERVING = health_pb2.HealthCheckResponse.NOT_SERVING
+SERVICE_UNKNOWN = health_pb2.HealthCheckResponse.SERVICE_UNKNOWN
+
+HEALTH_SERVICE_PREFIX = "/grpc.health.v1.Health/"
+
+# How often Watch streams re-check whether their caller went away
+_WATCH_POLL_SECONDS = 1.0
+
+
+class HealthServicer(health_pb2_grpc.HealthServicer):
+    """
+    grpc.health.v1 implementation whose statuses can be flipped during shutdown.
+
+    The empty service name reports the server as a whole.
+    """
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._statuses: Dict[str, int] = {"": SERVING}
+        self._shutting_down = False
+
+    def set(self, service: str, status: int):
+        with self._condition:
+            if self._shutting_down:
+                return
+            self._statuses[service] = status
+            self._condition.notify_all()
+
+    def enter_graceful_shutdown(self):
+        """Report NOT_SERVING for every service from now on and end open Watch streams."""
+        with self._condition:
+            self._shutting_down = True
+            for service in self._statuses:
+                self._statuses[service] = NOT_SERVING
+            self._condition.notify_all()
+
+    def Check(self, request, context):
+        with self._condition:
+            status = self._statuses.get(request.service)
+        if status is None:
+            context.set_code(grpc.StatusCode.NOT_FOUND)
+            context.set_details(f"Unknown service {request.service!r}")
+            return health_pb2.HealthCheckResponse()
+        return health_pb2.HealthCheckResponse(status=status)
+
+    def Watch(self, request, context):
+        last_status = None
+        while context.is_active():
+            with self._condition:
+                status = self._statuses.get(request.service, SERVICE_UNKNOWN)
+                if status == last_status and not self._shutting_down:
+                    self._condition.wait(_WATCH_POLL_SECONDS)
+                    status = self._statuses.get(request.service, SERVICE_UNKNOWN)
+                shutting_down = self._shutting_down
+            if status != last_status:
+                last_status = status
+                yield health_pb2.HealthCheckResponse(status=status)
+            if shutting_down:
+                # Watchers have seen NOT_SERVING; don't hold the drain open until the grace period ends
+                return
@@ -1,5 +1,15 @@
 import grpc
 import logging
+import threading
+import time
+from app.grpc.compression import CompressionPolicy
+from app.observability.sql import current_query_stats, profile_queries
+from app.observability.tracing import tracer, SPAN_KIND_SERVER, STATUS_ERROR
+
+
+def _sql_summary() -> str:
+    stats = current_query_stats()
+    return f" | {stats}" if stats is not None else ""
 
 class LoggingInterceptor(grpc.ServerInterceptor):
     def intercept_service(self, continuation, handler_call_details):
@@ -10,7 +20,7 @@ class LoggingInterceptor(grpc.ServerInterceptor):
         def log_unary_unary(request, context):
             logging.info(f"gRPC call: {handler_call_details.method} | request: {request}")
             response = handler.unary_unary(request, context)
-            logging.info(f"gRPC response: {handler_call_details.method} | response: {response}")
+            logging.info(f"gRPC response: {handler_call_details.method} | response: {response}{_sql_summary()}")
             return response
 
         def log_unary_stream(request, context):
@@ -22,7 +32,7 @@ class LoggingInterceptor(grpc.ServerInterceptor):
         def log_stream_unary(request_iterator, context):
             logging.info(f"gRPC call: {handler_call_details.method} | streaming request")
             response = handler.stream_unary(request_iterator, context)
-            logging.info(f"gRPC response: {handler_call_details.method} | response: {response}")
+            logging.info(f"gRPC response: {handler_call_details.method} | response: {response}{_sql_summary()}")
             return response
 
         def log_stream_stream(request_iterator, context):
@@ -56,3 +66,212 @@ class LoggingInterceptor(grpc.ServerInterceptor):
                 response_serializer=handler.response_serializer,
             )
         return handler
+
+
+def _wrap_handler(handler, wrap_unary_response, wrap_stream_response):
+    """
+    Rebuild a method handler with its behavior wrapped.
+
+    wrap_unary_response wraps unary_unary/stream_unary behaviors, wrap_stream_response wraps
+    the generator behaviors of unary_stream/stream_stream.
+    """
+    if handler.unary_unary:
+        return grpc.unary_unary_rpc_method_handler(
+            wrap_unary_response(handler.unary_unary),
+            request_deserializer=handler.request_deserializer,
+            response_serializer=handler.response_serializer,
+        )
+    if handler.unary_stream:
+        return grpc.unary_stream_rpc_method_handler(
+            wrap_stream_response(handler.unary_stream),
+            request_deserializer=handler.request_deserializer,
+            response_serializer=handler.response_serializer,
+        )
+    if handler.stream_unary:
+        return grpc.stream_unary_rpc_method_handler(
+            wrap_unary_response(handler.stream_unary),
+            request_deserializer=handler.request_deserializer,
+            response_serializer=handler.response_serializer,
+        )
+    if handler.stream_stream:
+        return grpc.stream_stream_rpc_method_handler(
+            wrap_stream_response(handler.stream_stream),
+            request_deserializer=handler.request_deserializer,
+            response_serializer=handler.response_serializer,
+        )
+    return handler
+
+
+class TracingInterceptor(grpc.ServerInterceptor):
+    """
+    Continues the caller's trace with a server span per RPC.
+
+    intercept_service runs on the server's polling thread when the call arrives, before the
+    call is queued for the thread pool, so the span starts at arrival and a child
+    grpc.server.queue span shows how long the call waited for a worker thread.
+    """
+
+    def intercept_service(self, continuation, handler_call_details):
+        handler = continuation(handler_call_details)
+        if handler is None or not tracer.enabled:
+            return handler
+
+        method = handler_call_details.method
+        parent = tracer.extract(handler_call_details.invocation_metadata)
+        arrived_ns = time.time_ns()
+
+        def start_span():
+            span = tracer.start_span(f"grpc.server {method}", SPAN_KIND_SERVER, parent=parent, start_ns=arrived_ns)
+            if span.is_recording:
+                started_ns = time.time_ns()
+                span.set_attribute("rpc.method", method)
+                span.set_attribute("rpc.queue_wait_ms", (started_ns - arrived_ns) / 1e6)
+                queue_span = tracer.start_span("grpc.server.queue", parent=span.context, start_ns=arrived_ns)
+                queue_span.end(started_ns)
+            return span
+
+        def finish_span(span, context):
+            code = context.code()
+            if span.is_recording and code is not None:
+                span.set_attribute("rpc.grpc.status_code", code.name)
+                if code != grpc.StatusCode.OK:
+                    details = context.details() or b""
+                    span.set_status(STATUS_ERROR, details.decode() if isinstance(details, bytes) else details)
+
+        def wrap_unary_response(behavior):
+            def traced(request, context):
+                with tracer.use_span(start_span()) as span:
+                    response = behavior(request, context)
+                    finish_span(span, context)
+                    return response
+            return traced
+
+        def wrap_stream_response(behavior):
+            def traced(request, context):
+                with tracer.use_span(start_span()) as span:
+                    yield from behavior(request, context)
+                    finish_span(span, context)
+            return traced
+
+        return _wrap_handler(handler, wrap_unary_response, wrap_stream_response)
+
+
+class SqlProfilingInterceptor(grpc.ServerInterceptor):
+    """
+    Opens a SQL profiling scope per RPC so statement count, database time and rows are
+    attributed to the method. Must run outside LoggingInterceptor for the access log to
+    include them.
+    """
+
+    def intercept_service(self, continuation, handler_call_details):
+        handler = continuation(handler_call_details)
+        if handler is None:
+            return None
+
+        method = handler_call_details.method
+
+        def wrap_unary_response(behavior):
+            def profiled(request, context):
+                with profile_queries(method):
+                    return behavior(request, context)
+            return profiled
+
+        def wrap_stream_response(behavior):
+            def profiled(request, context):
+                with profile_queries(method):
+                    yield from behavior(request, context)
+            return profiled
+
+        return _wrap_handler(handler, wrap_unary_response, wrap_stream_response)
+
+
+class InFlightInterceptor(grpc.ServerInterceptor):
+    """
+    Counts RPCs whose handlers are running, so shutdown can report drained vs aborted calls.
+
+    Health checks are not counted: Watch streams are long-lived by design.
+    """
+
+    def __init__(self, exclude_prefixes=("/grpc.health.v1.Health/",)):
+        self.exclude_prefixes = tuple(exclude_prefixes)
+        self._lock = threading.Lock()
+        self._active = 0
+        self._completed = 0
+
+    @property
+    def active(self) -> int:
+        return self._active
+
+    @property
+    def completed(self) -> int:
+        return self._completed
+
+    def _enter(self):
+        with self._lock:
+            self._active += 1
+
+    def _exit(self):
+        with self._lock:
+            self._active -= 1
+            self._completed += 1
+
+    def intercept_service(self, continuation, handler_call_details):
+        handler = continuation(handler_call_details)
+        if handler is None or handler_call_details.method.startswith(self.exclude_prefixes):
+            return handler
+
+        def wrap_unary_response(behavior):
+            def counted(request, context):
+                self._enter()
+                try:
+                    return behavior(request, context)
+                finally:
+                    self._exit()
+            return counted
+
+        def wrap_stream_response(behavior):
+            def counted(request, context):
+                self._enter()
+                try:
+                    yield from behavior(request, context)
+                finally:
+                    self._exit()
+            return counted
+
+        return _wrap_handler(handler, wrap_unary_response, wrap_stream_response)
+
+
+class CompressionInterceptor(grpc.ServerInterceptor):
+    """
+    Compresses responses of the methods covered by a CompressionPolicy once they reach its
+    size threshold. Streams are compressed message by message.
+    """
+
+    def __init__(self, policy: CompressionPolicy):
+        self.policy = policy
+
+    def intercept_service(self, continuation, handler_call_details):
+        handler = continuation(handler_call_details)
+        method = handler_call_details.method
+        if handler is None or not self.policy.applies_to(method):
+            return handler
+
+        def wrap_unary_response(behavior):
+            def compressed(request, context):
+                response = behavior(request, context)
+                compression = self.policy.compression_for(method, response, "grpc_server")
+                if compression is not None:
+                    context.set_compression(compression)
+                return response
+            return compressed
+
+        def wrap_stream_response(behavior):
+            def compressed(request, context):
+                context.set_compression(self.policy.compression)
+                for response in behavior(request, context):
+                    if self.policy.compression_for(method, response, "grpc_server") is None:
+                        context.disable_next_message_compression()
+                    yield response
+            return compressed
+
+        return _wrap_handler(handler, wrap_unary_response, wrap_stream_response)
@@ -1,6 +1,7 @@
+import logging
 from logging.config import fileConfig
 
-from sqlalchemy import engine_from_config
+from sqlalchemy import create_engine
 from sqlalchemy import pool
 
 from alembic import context
@@ -11,7 +12,7 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from database.connection import UserBase
 from database.config import user_db_config
-from database.models import User
+from database.models import User, pg_trgm_available
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
@@ -21,9 +22,15 @@ config = context.config
 # This line sets up loggers basically.
 if config.config_file_name is not None:
     fileConfig(config.config_file_name)
+logger = logging.getLogger("alembic.env")
 
-# Set the database URL from our config
+# Set the database URL from our config. Sharded deployments list every shard in
+# USER_DATABASE_SHARD_URLS and each one is migrated in turn.
 config.set_main_option('sqlalchemy.url', user_db_config.database_url)
+shard_urls = user_db_config.shard_urls
+if getattr(config.cmd_opts, "autogenerate", False):
+    # Shards share one schema; compare against the first only
+    shard_urls = shard_urls[:1]
 
 # add your model's MetaData object here
 # for 'autogenerate' support
@@ -44,41 +51,51 @@ def run_migrations_offline() -> None:
     we don't even need a DBAPI to be available.
 
     Calls to context.execute() here emit the given string to the
-    script output.
+    script output, once per shard.
 
     """
-    url = config.get_main_option("sqlalchemy.url")
-    context.configure(
-        url=url,
-        target_metadata=target_metadata,
-        literal_binds=True,
-        dialect_opts={"paramstyle": "named"},
-    )
+    for index, url in enumerate(shard_urls):
+        context.configure(
+            url=url,
+            target_metadata=target_metadata,
+            literal_binds=True,
+            dialect_opts={"paramstyle": "named"},
+        )
 
-    with context.begin_transaction():
-        context.run_migrations()
+        with context.begin_transaction():
+            if len(shard_urls) > 1:
+                context.execute(f"-- shard {index}")
+            context.run_migrations()
 
 
 def run_migrations_online() -> None:
     """Run migrations in 'online' mode.
 
     In this scenario we need to create an Engine
-    and associate a connection with the context.
+    and associate a connection with the context,
+    for every shard.
 
     """
-    connectable = engine_from_config(
-        config.get_section(config.config_ini_section, {}),
-        prefix="sqlalchemy.",
-        poolclass=pool.NullPool,
-    )
-
-    with connectable.connect() as connection:
-        context.configure(
-            connection=connection, target_metadata=target_metadata
-        )
-
-        with context.begin_transaction():
-            context.run_migrations()
+    for index, url in enumerate(shard_urls):
+        if len(shard_urls) > 1:
+            logger.info(f"Migrating shard {index}")
+        connectable = create_engine(url, poolclass=pool.NullPool)
+
+        with connectable.connect() as connection:
+            trgm_available = pg_trgm_available(connection)
+
+            def include_object(object, name, type_, reflected, compare_to):
+                # Trigram indexes exist only where pg_trgm does (see revision 7c4e1f9a3b2d)
+                if type_ == "index" and object.info.get("requires_extension") == "pg_trgm":
+                    return trgm_available
+                return True
+
+            context.configure(
+                connection=connection, target_metadata=target_metadata, include_object=include_object
+            )
+
+            with context.begin_transaction():
+                context.run_migrations()
 
 
 if context.is_offline_mode():
@@ -0,0 +1,58 @@
+"""Add user search indexes
+
+Revision ID: 7c4e1f9a3b2d
+Revises: 2e6b7d9bf682
+Create Date: 2026-10-19 10:12:45.318204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c4e1f9a3b2d'
+down_revision: Union[str, None] = '2e6b7d9bf682'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _pg_trgm_available() -> bool:
+    bind = op.get_bind()
+    return bind.execute(
+        sa.text("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")
+    ).scalar() is not None
+
+
+def upgrade() -> None:
+    op.create_index(
+        'ix_users_name_pattern', 'users', [sa.text('lower(name) text_pattern_ops')]
+    )
+    op.create_index(
+        'ix_users_email_pattern', 'users', [sa.text('lower(email) text_pattern_ops')]
+    )
+    op.create_index(
+        'ix_users_active_id', 'users', ['id'],
+        postgresql_where=sa.text('is_active'), sqlite_where=sa.text('is_active')
+    )
+
+    # Substring search needs trigram indexes; without pg_trgm it falls back to a scan
+    if _pg_trgm_available():
+        op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        op.create_index(
+            'ix_users_name_trgm', 'users', [sa.text('lower(name) gin_trgm_ops')],
+            postgresql_using='gin'
+        )
+        op.create_index(
+            'ix_users_email_trgm', 'users', [sa.text('lower(email) gin_trgm_ops')],
+            postgresql_using='gin'
+        )
+
+
+def downgrade() -> None:
+    op.execute('DROP INDEX IF EXISTS ix_users_email_trgm')
+    op.execute('DROP INDEX IF EXISTS ix_users_name_trgm')
+    op.drop_index('ix_users_active_id', table_name='users')
+    op.drop_index('ix_users_email_pattern', table_name='users')
+    op.drop_index('ix_users_name_pattern', table_name='users')
@@ -0,0 +1,30 @@
+"""Add user id allocator for sharded deployments
+
+Revision ID: b3f5a8d1c6e4
+Revises: 7c4e1f9a3b2d
+Create Date: 2026-10-19 15:41:07.512993
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b3f5a8d1c6e4'
+down_revision: Union[str, None] = '7c4e1f9a3b2d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('user_id_allocator',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sqlite_autoincrement=True
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('user_id_allocator')
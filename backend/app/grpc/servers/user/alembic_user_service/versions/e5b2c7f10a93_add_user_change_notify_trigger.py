@@ -0,0 +1,59 @@
+"""Add user change notify trigger
+
+Revision ID: e5b2c7f10a93
+Revises: d91c2e7a4f60
+Create Date: 2026-10-19 19:48:12.604417
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5b2c7f10a93'
+down_revision: Union[str, None] = 'd91c2e7a4f60'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# pg_notify on commit of every change to users, for the WatchUsers change feed. version
+# matches User.version: updated_at (created_at if never updated) in microseconds.
+NOTIFY_FUNCTION = """
+CREATE OR REPLACE FUNCTION notify_user_change() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        PERFORM pg_notify('user_events', json_build_object('op', TG_OP, 'id', OLD.id)::text);
+        RETURN OLD;
+    END IF;
+    PERFORM pg_notify('user_events', json_build_object(
+        'op', TG_OP,
+        'id', NEW.id,
+        'name', NEW.name,
+        'email', NEW.email,
+        'is_active', NEW.is_active,
+        'version', round(extract(epoch FROM coalesce(NEW.updated_at, NEW.created_at)) * 1000000)::bigint
+    )::text);
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql
+"""
+
+
+def upgrade() -> None:
+    # LISTEN/NOTIFY is PostgreSQL only; other databases use the in-process event source
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.execute(NOTIFY_FUNCTION)
+    op.execute(
+        'CREATE TRIGGER users_notify_change AFTER INSERT OR UPDATE OR DELETE ON users '
+        'FOR EACH ROW EXECUTE FUNCTION notify_user_change()'
+    )
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.execute('DROP TRIGGER IF EXISTS users_notify_change ON users')
+    op.execute('DROP FUNCTION IF EXISTS notify_user_change()')
@@ -0,0 +1,234 @@
+import logging
+import queue
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Sequence, Tuple, Union
+
+from generated import user_pb2
+from app.grpc.servers.user.database.connection import user_db
+from app.grpc.servers.user.database import queries
+from app.grpc.servers.user.database.models import User
+from app.observability.metrics import registry, SIZE_BUCKETS
+
+logger = logging.getLogger(__name__)
+
+batch_size_histogram = registry.histogram(
+    "user_batch_size", "Items processed per micro-batch", buckets=SIZE_BUCKETS
+)
+batch_queue_delay_histogram = registry.histogram(
+    "user_batch_queue_delay_seconds", "Time an item waited before its batch started"
+)
+batch_duration_histogram = registry.histogram(
+    "user_batch_duration_seconds", "Time spent processing one micro-batch"
+)
+create_user_commit_histogram = registry.histogram(
+    "user_create_commit_seconds", "Insert plus commit time of one group-committed CreateUser transaction"
+)
+
+
+def load_users(user_ids: Iterable[int], caller: Optional[Hashable] = None) -> Dict[int, user_pb2.User]:
+    """Users by id, found with one WHERE id IN (...) query per shard the ids live on."""
+    ids_by_shard = defaultdict(set)
+    for user_id in user_ids:
+        shard = user_db.shard_for_id(user_id)
+        if shard is not None:
+            ids_by_shard[shard].add(user_id)
+
+    def load(connection, shard):
+        return connection.execute(queries.select_users_by_ids, {"user_ids": list(ids_by_shard[shard])}).all()
+
+    found = {}
+    if ids_by_shard:
+        for rows in user_db.scatter(load, shards=sorted(ids_by_shard), caller=caller):
+            found.update((row[0], queries.row_to_user(row)) for row in rows)
+    return found
+
+
+class MicroBatcher:
+    """
+    Gathers items submitted from many handler threads and processes them together.
+
+    A batch is flushed when max_batch_size items are waiting or window_seconds after its
+    first item arrived, whichever comes first. process_batch receives the items in arrival
+    order and returns one result (or Exception instance) per item.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        process_batch: Callable[[List[Any]], Sequence[Any]],
+        window_seconds: float,
+        max_batch_size: int,
+        max_concurrent_batches: int = 2
+    ):
+        self.name = name
+        self.process_batch = process_batch
+        self.window_seconds = window_seconds
+        self.max_batch_size = max_batch_size
+        self._queue: "queue.SimpleQueue" = queue.SimpleQueue()
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_concurrent_batches, thread_name_prefix=f"{name}-batch"
+        )
+        self._closed = False
+        self._collector = threading.Thread(target=self._collect, name=f"{name}-collector", daemon=True)
+        self._collector.start()
+
+    def submit(self, item: Any) -> Future:
+        """Queue an item; the returned future resolves to its result."""
+        if self._closed:
+            raise RuntimeError(f"{self.name} batcher is closed")
+        future: Future = Future()
+        self._queue.put((item, future, time.monotonic()))
+        return future
+
+    def close(self):
+        """Flush what is queued and stop accepting items."""
+        self._closed = True
+        self._queue.put(None)
+        self._collector.join()
+        self._executor.shutdown(wait=True)
+
+    def _collect(self):
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            batch = [first]
+            deadline = first[2] + self.window_seconds
+            stop = False
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                try:
+                    entry = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if entry is None:
+                    stop = True
+                    break
+                batch.append(entry)
+            self._executor.submit(self._run, batch)
+            if stop:
+                return
+
+    def _run(self, batch: List[tuple]):
+        started = time.monotonic()
+        for _, _, enqueued_at in batch:
+            batch_queue_delay_histogram.observe(started - enqueued_at, batcher=self.name)
+        batch_size_histogram.observe(len(batch), batcher=self.name)
+
+        try:
+            results = self.process_batch([item for item, _, _ in batch])
+        except Exception as e:
+            logger.exception(f"{self.name} batch of {len(batch)} failed")
+            results = [e] * len(batch)
+        finally:
+            batch_duration_histogram.observe(time.monotonic() - started, batcher=self.name)
+
+        for (_, future, _), result in zip(batch, results):
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+
+class GetUserBatcher(MicroBatcher):
+    """Serves concurrent GetUser lookups with one WHERE id IN (...) query per shard and batch."""
+
+    def __init__(self, window_seconds: float, max_batch_size: int):
+        super().__init__("get_user", self._load_users, window_seconds, max_batch_size)
+
+    def get_user(self, user_id: int) -> Optional[user_pb2.User]:
+        """Blocking lookup; None when the user doesn't exist."""
+        return self.submit(user_id).result()
+
+    def _load_users(self, user_ids: List[int]) -> List[Optional[user_pb2.User]]:
+        found = load_users(user_ids)
+        return [found.get(user_id) for user_id in user_ids]
+
+
+class CreateUserBatcher(MicroBatcher):
+    """
+    Group commit for CreateUser: concurrent signups share one multi-row INSERT and commit.
+
+    Rows go in with ON CONFLICT (email) DO NOTHING, so a duplicate email only fails its own
+    caller: its row is missing from RETURNING and its result is None. Within a batch the
+    first request for an email wins. Any other error fails the shard's whole INSERT; its rows
+    are then inserted one by one, so only the rows that fail on their own get the error.
+    """
+
+    def __init__(self, window_seconds: float, max_batch_size: int):
+        super().__init__("create_user", self._insert_users, window_seconds, max_batch_size)
+
+    def create_user(self, name: str, email: str) -> Optional[user_pb2.User]:
+        """Blocking insert; None when the email is already taken."""
+        return self.submit((name, email)).result()
+
+    def _insert_users(self, items: List[Tuple[str, str]]) -> List[Optional[user_pb2.User]]:
+        emails_by_shard: Dict[int, Dict[str, str]] = defaultdict(dict)
+        for name, email in items:
+            # setdefault keeps the first name per email: later duplicates lose to it
+            emails_by_shard[user_db.shard_for_key(email)].setdefault(email, name)
+
+        def insert(connection, shard):
+            names_by_email = emails_by_shard[shard]
+            try:
+                return self._insert_shard(connection, shard, names_by_email)
+            except Exception as e:
+                connection.rollback()
+                if len(names_by_email) == 1:
+                    return {email: e for email in names_by_email}
+                logger.warning(
+                    f"create_user batch of {len(names_by_email)} rows failed on shard {shard}: {e}; "
+                    f"inserting them one by one"
+                )
+                return self._insert_rows(connection, shard, names_by_email)
+
+        created: Dict[str, Union[user_pb2.User, Exception]] = {}
+        for shard_created in user_db.scatter(insert, shards=sorted(emails_by_shard), read_only=False):
+            created.update(shard_created)
+
+        results = []
+        for _, email in items:
+            result = created.get(email)
+            # Each created row goes to exactly one caller; every request for a failed row fails
+            results.append(result if isinstance(result, Exception) else created.pop(email, None))
+        return results
+
+    @classmethod
+    def _insert_rows(
+        cls, connection, shard: int, names_by_email: Dict[str, str]
+    ) -> Dict[str, Union[user_pb2.User, Exception]]:
+        """Insert each row in its own transaction; a failing row maps to its error."""
+        created: Dict[str, Union[user_pb2.User, Exception]] = {}
+        for email, name in names_by_email.items():
+            try:
+                created.update(cls._insert_shard(connection, shard, {email: name}))
+            except Exception as e:
+                connection.rollback()
+                created[email] = e
+        return created
+
+    @staticmethod
+    def _insert_shard(connection, shard: int, names_by_email: Dict[str, str]) -> Dict[str, user_pb2.User]:
+        started = time.monotonic()
+        rows = []
+        for email, name in names_by_email.items():
+            row = {"name": name, "email": email, "is_active": True}
+            if user_db.shard_count > 1:
+                row["id"] = queries.allocate_user_id(connection, shard)
+            rows.append(row)
+
+        insert = queries.DIALECT_INSERTS[connection.dialect.name]
+        statement = (
+            insert(User)
+            .values(rows)
+            .on_conflict_do_nothing(index_elements=[User.email])
+            .returning(*queries.USER_COLUMNS)
+        )
+        # RETURNING order isn't guaranteed; emails are unique, so key by them
+        created = {row.email: queries.row_to_user(row) for row in connection.execute(statement)}
+        connection.commit()
+        create_user_commit_histogram.observe(time.monotonic() - started)
+        return created
@@ -1,9 +1,24 @@
+import contextvars
 import os
+import threading
+import time
 from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import contextmanager
-from sqlalchemy import create_engine
+from typing import Callable, Dict, Hashable, Iterable, List, Optional, TypeVar
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import OperationalError
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from app.observability.sql import SqlProfiler
+from .sharding import SHARD_ID_STRIDE, shard_for_id, shard_for_key
+from app.observability.tracing import tracer, current_span, SPAN_KIND_CLIENT, STATUS_ERROR
+
+T = TypeVar("T")
+
+# Connections per engine; also sizes the scatter-gather thread pool per shard
+POOL_SIZE = 10
 
 class BaseDatabaseConfig(ABC):
     """Base database configuration class."""
@@ -11,12 +26,48 @@ class BaseDatabaseConfig(ABC):
     def __init__(self, service_name: str):
         self.service_name = service_name
         self.database_url = self._get_database_url()
+        # Unsharded deployments are a single shard at database_url
+        self.shard_urls = self._get_shard_urls() or [self.database_url]
+        self.replica_urls = self._get_replica_urls()
+        self.read_your_writes_seconds = self._get_float_setting("READ_YOUR_WRITES_SECONDS", 5.0)
+        self.replica_retry_seconds = self._get_float_setting("REPLICA_RETRY_SECONDS", 30.0)
+        self.profile_queries = self._get_bool_setting("PROFILE_QUERIES", False)
+        self.slow_query_ms = self._get_float_setting("SLOW_QUERY_MS", 0.0)
+        self.slow_query_explain_rate = self._get_float_setting("SLOW_QUERY_EXPLAIN_RATE", 0.0)
+
+        if len(self.shard_urls) > SHARD_ID_STRIDE:
+            raise ValueError(f"At most {SHARD_ID_STRIDE} shards are supported, got {len(self.shard_urls)}")
+        if len(self.shard_urls) > 1 and self.replica_urls:
+            raise ValueError("Read replicas are only supported for unsharded databases")
 
     @abstractmethod
     def _get_database_url(self) -> str:
         """Get database URL from environment variables."""
         pass
 
+    def _get_replica_urls(self) -> List[str]:
+        """Get read replica URLs. Services without replicas return an empty list."""
+        return []
+
+    def _get_shard_urls(self) -> List[str]:
+        """Get shard URLs in shard order. Unsharded services return an empty list."""
+        return []
+
+    def _get_float_setting(self, name: str, default: float) -> float:
+        """Read a numeric <SERVICE>_DB_<NAME> setting from the environment."""
+        return float(os.getenv(f"{self.service_name.upper()}_DB_{name}", str(default)))
+
+    def _get_bool_setting(self, name: str, default: bool) -> bool:
+        """Read a true/false <SERVICE>_DB_<NAME> setting from the environment."""
+        return os.getenv(f"{self.service_name.upper()}_DB_{name}", str(default)).lower() == "true"
+
+    @staticmethod
+    def _parse_url_list(value: Optional[str]) -> List[str]:
+        """Split a comma separated list of database URLs."""
+        if not value:
+            return []
+        return [url.strip() for url in value.split(",") if url.strip()]
+
     def _build_url_from_components(self, service_prefix: str) -> str:
         """Build URL from individual environment variable components."""
         user = os.getenv(f"{service_prefix}_DB_USER", "postgres")
@@ -27,22 +78,186 @@ class BaseDatabaseConfig(ABC):
 
         return f"postgresql://{user}:{password}@{host}:{port}/{database}"
 
+class ReplicaSelector:
+    """Round-robin selection over read replicas, skipping ones that recently failed."""
+
+    def __init__(self, engines: List[Engine], retry_seconds: float):
+        self.engines = engines
+        self.retry_seconds = retry_seconds
+        self._lock = threading.Lock()
+        self._next = 0
+        self._unhealthy_until: Dict[int, float] = {}
+
+    def candidates(self) -> List[Engine]:
+        """Healthy replicas in round-robin order, starting after the last one used."""
+        now = time.monotonic()
+        with self._lock:
+            start = self._next
+            self._next = (self._next + 1) % len(self.engines)
+            order = [(start + i) % len(self.engines) for i in range(len(self.engines))]
+            return [
+                self.engines[i] for i in order
+                if self._unhealthy_until.get(i, 0.0) <= now
+            ]
+
+    def mark_unhealthy(self, engine: Engine):
+        """Take a replica out of rotation for retry_seconds."""
+        with self._lock:
+            self._unhealthy_until[self.engines.index(engine)] = time.monotonic() + self.retry_seconds
+
+class ReadYourWritesTracker:
+    """Remembers recent writers so their follow-up reads can be pinned to the primary."""
+
+    _PRUNE_THRESHOLD = 1024
+
+    def __init__(self, window_seconds: float):
+        self.window_seconds = window_seconds
+        self._lock = threading.Lock()
+        self._last_write: Dict[Hashable, float] = {}
+
+    def record_write(self, caller: Optional[Hashable]):
+        if caller is None or self.window_seconds <= 0:
+            return
+        now = time.monotonic()
+        with self._lock:
+            self._last_write[caller] = now
+            if len(self._last_write) > self._PRUNE_THRESHOLD:
+                cutoff = now - self.window_seconds
+                self._last_write = {k: t for k, t in self._last_write.items() if t > cutoff}
+
+    def is_pinned(self, caller: Optional[Hashable]) -> bool:
+        if caller is None:
+            return False
+        with self._lock:
+            last_write = self._last_write.get(caller)
+        return last_write is not None and time.monotonic() - last_write < self.window_seconds
+
+def _start_statement_span(conn, cursor, statement, parameters, context, executemany):
+    parent = current_span()
+    if parent is None or not parent.is_recording:
+        return
+    operation = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "SQL"
+    context._trace_span = tracer.start_span(
+        f"sql {operation}",
+        kind=SPAN_KIND_CLIENT,
+        parent=parent.context,
+        attributes={
+            "db.system": conn.dialect.name,
+            "db.statement": statement[:2000],
+            "db.executemany": executemany,
+        }
+    )
+
+
+def _end_statement_span(conn, cursor, statement, parameters, context, executemany):
+    span = getattr(context, "_trace_span", None)
+    if span is not None:
+        if cursor.rowcount is not None and cursor.rowcount >= 0:
+            span.set_attribute("db.rowcount", cursor.rowcount)
+        span.end()
+
+
+def _fail_statement_span(exception_context):
+    span = getattr(exception_context.execution_context, "_trace_span", None)
+    if span is not None:
+        span.set_status(STATUS_ERROR, str(exception_context.original_exception))
+        span.end()
+
 class BaseDatabaseConnection:
     """Base database connection class."""
 
     def __init__(self, config: BaseDatabaseConfig):
         self.config = config
-        self.engine = create_engine(
-            config.database_url,
-            pool_size=10  # Connection pool size
+        self.shards = [self._create_engine(url) for url in config.shard_urls]
+        # Shard 0; the only database when unsharded
+        self.engine = self.shards[0]
+        self.replicas = ReplicaSelector(
+            [self._create_engine(url) for url in config.replica_urls],
+            config.replica_retry_seconds
         )
+        self.read_your_writes = ReadYourWritesTracker(config.read_your_writes_seconds)
         self.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
         self.Base = declarative_base()
+        self._tracing_installed = False
+        self._profiler: Optional[SqlProfiler] = None
+        self._scatter_pool = (
+            ThreadPoolExecutor(max_workers=POOL_SIZE * len(self.shards), thread_name_prefix="shard-scatter")
+            if len(self.shards) > 1 else None
+        )
+
+    @property
+    def engines(self) -> List[Engine]:
+        """Every shard followed by every replica."""
+        return self.shards + self.replicas.engines
+
+    @property
+    def shard_count(self) -> int:
+        return len(self.shards)
+
+    def shard_for_key(self, key: str) -> int:
+        """Shard that owns rows with this natural key (e.g. an email address)."""
+        return shard_for_key(key, self.shard_count)
+
+    def shard_for_id(self, row_id: int) -> Optional[int]:
+        """Shard encoded in a row id, None if the id can't exist."""
+        return shard_for_id(row_id, self.shard_count)
+
+    def install_tracing(self):
+        """Emit a child span for every SQL statement run inside a sampled trace."""
+        if self._tracing_installed:
+            return
+        self._tracing_installed = True
+        for engine in self.engines:
+            event.listen(engine, "before_cursor_execute", _start_statement_span)
+            event.listen(engine, "after_cursor_execute", _end_statement_span)
+            event.listen(engine, "handle_error", _fail_statement_span)
+
+    def install_profiling(self) -> bool:
+        """
+        Attribute SQL statements to the current RPC and log slow ones, when configured.
+
+        Nothing is hooked unless PROFILE_QUERIES is on or SLOW_QUERY_MS is set; returns
+        whether profiling is active so callers can skip their per-RPC scope otherwise.
+        """
+        if not self.config.profile_queries and self.config.slow_query_ms <= 0:
+            return False
+        if self._profiler is None:
+            self._profiler = SqlProfiler(
+                slow_query_seconds=self.config.slow_query_ms / 1000,
+                explain_sample_rate=self.config.slow_query_explain_rate
+            )
+            for engine in self.engines:
+                self._profiler.install(engine)
+        return True
+
+    def _create_engine(self, url: str) -> Engine:
+        return create_engine(
+            url,
+            pool_size=POOL_SIZE  # Connection pool size
+        )
+
+    def _use_replica(self, read_only: bool, caller: Optional[Hashable]) -> bool:
+        return read_only and bool(self.replicas.engines) and not self.read_your_writes.is_pinned(caller)
 
     @contextmanager
-    def get_db_session(self):
-        """Context manager for database sessions."""
-        db = self.SessionLocal()
+    def get_db_session(self, read_only: bool = False, caller: Optional[Hashable] = None, shard: int = 0):
+        """
+        Context manager for database sessions.
+
+        Args:
+            read_only: Route the session to a healthy read replica when one is configured
+            caller: Identity of the requester, used for read-your-writes pinning
+            shard: Shard to open the session on
+        """
+        if self._use_replica(read_only, caller):
+            connection = self._connect_replica()
+            db = self.SessionLocal(bind=connection)
+        elif shard:
+            connection = None
+            db = self.SessionLocal(bind=self.shards[shard])
+        else:
+            connection = None
+            db = self.SessionLocal()
         try:
             yield db
             db.commit()
@@ -51,6 +266,80 @@ class BaseDatabaseConnection:
             raise
         finally:
             db.close()
+            if connection is not None:
+                connection.close()
+
+        if not read_only:
+            self.read_your_writes.record_write(caller)
+
+    @contextmanager
+    def get_db_connection(self, read_only: bool = False, caller: Optional[Hashable] = None, shard: int = 0):
+        """
+        Context manager for a Core connection, without the ORM session and unit of work.
+
+        Routing is the same as get_db_session. Meant for hot read paths that execute
+        select() statements and consume plain row tuples.
+        """
+        if self._use_replica(read_only, caller):
+            connection = self._connect_replica()
+        else:
+            connection = self.shards[shard].connect()
+        try:
+            yield connection
+            connection.commit()
+        except Exception:
+            connection.rollback()
+            raise
+        finally:
+            connection.close()
+
+        if not read_only:
+            self.read_your_writes.record_write(caller)
+
+    def scatter(
+        self,
+        fn: Callable[..., T],
+        shards: Optional[Iterable[int]] = None,
+        read_only: bool = True,
+        caller: Optional[Hashable] = None
+    ) -> List[T]:
+        """
+        Run fn(connection, shard) on every shard (or the given ones) in parallel.
+
+        Returns the results in shard order. A single shard runs inline on the calling thread;
+        otherwise each shard gets its own connection on the scatter pool, with the caller's
+        contextvars (trace and SQL profiling scope) copied over.
+        """
+        shards = list(range(self.shard_count) if shards is None else shards)
+        if len(shards) == 1:
+            return [self._run_on_shard(fn, shards[0], read_only, caller)]
+        futures = [
+            self._scatter_pool.submit(
+                contextvars.copy_context().run, self._run_on_shard, fn, shard, read_only, caller
+            )
+            for shard in shards
+        ]
+        return [future.result() for future in futures]
+
+    def _run_on_shard(self, fn: Callable[..., T], shard: int, read_only: bool, caller: Optional[Hashable]) -> T:
+        with self.get_db_connection(read_only=read_only, caller=caller, shard=shard) as connection:
+            return fn(connection, shard)
+
+    def _connect_replica(self):
+        """Connect to the first replica that accepts a connection, else the primary."""
+        for engine in self.replicas.candidates():
+            try:
+                return engine.connect()
+            except OperationalError:
+                self.replicas.mark_unhealthy(engine)
+        return self.engine.connect()
+
+    def dispose(self):
+        """Close every pooled connection, e.g. once the server has drained."""
+        if self._scatter_pool is not None:
+            self._scatter_pool.shutdown(wait=False)
+        for engine in self.engines:
+            engine.dispose()
 
     def get_db(self):
         """Dependency for FastAPI to get database session."""
@@ -17,4 +17,12 @@ class UserServiceDatabaseConfig(BaseDatabaseConfig):
         # Build URL from individual components
         return self._build_url_from_components("USER")
 
+    def _get_replica_urls(self):
+        """Get read replica URLs from a comma separated USER_DATABASE_REPLICA_URLS."""
+        return self._parse_url_list(os.getenv("USER_DATABASE_REPLICA_URLS"))
+
+    def _get_shard_urls(self):
+        """Get shard URLs, in shard order, from a comma separated USER_DATABASE_SHARD_URLS."""
+        return self._parse_url_list(os.getenv("USER_DATABASE_SHARD_URLS"))
+
 user_db_config = UserServiceDatabaseConfig()
@@ -12,3 +12,4 @@ user_db = UserDatabaseConnection()
 
 UserBase = user_db.Base
 get_user_db_session = user_db.get_db_session
+get_user_db_connection = user_db.get_db_connection
@@ -1,7 +1,21 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, DDL, Index, LargeBinary, event, text
 from sqlalchemy.sql import func
 from .connection import UserBase
 
+
+def pg_trgm_available(bind) -> bool:
+    """Trigram indexes need the pg_trgm extension, which not every PostgreSQL install ships."""
+    if bind.dialect.name != "postgresql":
+        return False
+    return bind.execute(
+        text("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")
+    ).scalar() is not None
+
+
+def _if_pg_trgm(ddl, target, bind, **kw) -> bool:
+    return pg_trgm_available(bind)
+
+
 class User(UserBase):
     __tablename__ = "users"
 
@@ -11,3 +25,79 @@ class User(UserBase):
     is_active = Column(Boolean, default=True, nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+    __table_args__ = (
+        # Case-insensitive prefix search (LIKE 'abc%') for SearchUsers
+        Index(
+            "ix_users_name_pattern",
+            func.lower(name).label("lower_name"),
+            postgresql_ops={"lower_name": "text_pattern_ops"}
+        ),
+        Index(
+            "ix_users_email_pattern",
+            func.lower(email).label("lower_email"),
+            postgresql_ops={"lower_email": "text_pattern_ops"}
+        ),
+        # Keyset scans over active users only
+        Index(
+            "ix_users_active_id",
+            id,
+            postgresql_where=is_active,
+            sqlite_where=is_active
+        ),
+        # Substring search (LIKE '%abc%'); without pg_trgm it falls back to a scan
+        Index(
+            "ix_users_name_trgm",
+            func.lower(name).label("lower_name"),
+            postgresql_using="gin",
+            postgresql_ops={"lower_name": "gin_trgm_ops"},
+            info={"requires_extension": "pg_trgm"}
+        ).ddl_if(callable_=_if_pg_trgm),
+        Index(
+            "ix_users_email_trgm",
+            func.lower(email).label("lower_email"),
+            postgresql_using="gin",
+            postgresql_ops={"lower_email": "gin_trgm_ops"},
+            info={"requires_extension": "pg_trgm"}
+        ).ddl_if(callable_=_if_pg_trgm),
+    )
+
+
+event.listen(
+    User.__table__,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(callable_=_if_pg_trgm)
+)
+
+
+class UserIdAllocator(UserBase):
+    """
+    Per-shard id sequence for sharded deployments; rows are deleted right after allocation.
+
+    sqlite_autoincrement keeps SQLite from reusing the ids of deleted rows, as PostgreSQL
+    sequences already don't.
+    """
+    __tablename__ = "user_id_allocator"
+    __table_args__ = {"sqlite_autoincrement": True}
+
+    id = Column(Integer, primary_key=True)
+
+
+class IdempotencyKey(UserBase):
+    """
+    Outcome of a request sent with an idempotency key, replayed to retries until expires_at.
+
+    A row is 'pending' while the first request runs and 'completed' once its response (gRPC
+    status code, details and serialized response message) is stored.
+    """
+    __tablename__ = "idempotency_keys"
+
+    method = Column(String(100), primary_key=True)
+    key = Column(String(255), primary_key=True)
+    request_hash = Column(String(64), nullable=False)
+    status = Column(String(16), nullable=False)
+    response_code = Column(Integer)
+    response_details = Column(String(1024))
+    response = Column(LargeBinary)
+    claimed_at = Column(DateTime(timezone=True), nullable=False)
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
@@ -0,0 +1,113 @@
+"""
+Lean read path for the user service.
+
+Statements are built once at import time and select only the columns that end up in
+user_pb2.User, so SQLAlchemy reuses their compiled form and rows come back as plain
+tuples instead of identity-mapped ORM objects.
+"""
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from sqlalchemy import bindparam, delete, func, insert, or_, select
+from sqlalchemy.dialects import postgresql, sqlite
+
+from generated import user_pb2
+from .models import User, UserIdAllocator
+from .sharding import global_id
+
+# Proto field name -> selected column. Rows come back in this order, which row_to_user relies on.
+USER_FIELDS = {
+    "id": User.id,
+    "name": User.name,
+    "email": User.email,
+    "is_active": User.is_active,
+    # Rows are never updated without bumping updated_at, so it doubles as the row version
+    "version": func.coalesce(User.updated_at, User.created_at).label("version"),
+}
+USER_COLUMNS = tuple(USER_FIELDS.values())
+
+# INSERT constructs with ON CONFLICT support, by dialect name
+DIALECT_INSERTS = {
+    "postgresql": postgresql.insert,
+    "sqlite": sqlite.insert,
+}
+
+select_user_by_id = select(*USER_COLUMNS).where(User.id == bindparam("user_id"))
+
+select_users_by_ids = select(*USER_COLUMNS).where(
+    User.id.in_(bindparam("user_ids", expanding=True))
+)
+
+select_users_page = (
+    select(*USER_COLUMNS)
+    .order_by(User.id)
+    .limit(bindparam("limit"))
+    .offset(bindparam("offset"))
+)
+
+select_users_after = (
+    select(*USER_COLUMNS)
+    .where(User.id > bindparam("after_id"))
+    .order_by(User.id)
+    .limit(bindparam("limit"))
+)
+
+select_all_users = select(*USER_COLUMNS).order_by(User.id)
+
+count_users = select(func.count()).select_from(User)
+
+allocate_local_id = insert(UserIdAllocator).returning(UserIdAllocator.id)
+release_local_id = delete(UserIdAllocator).where(UserIdAllocator.id == bindparam("local_id"))
+
+
+def allocate_user_id(db, shard: int) -> int:
+    """Allocate a globally unique user id on a shard, inside the caller's transaction."""
+    local_id = db.execute(allocate_local_id).scalar_one()
+    db.execute(release_local_id, {"local_id": local_id})
+    return global_id(local_id, shard)
+
+
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def search_users_statement(query: str, match: int, is_active, after_id: int, limit: int):
+    """
+    Keyset-paginated search over lower(name)/lower(email).
+
+    Prefix matches are served by the text_pattern_ops indexes, substring matches by the
+    pg_trgm indexes and is_active=true listings by the partial ix_users_active_id index.
+    """
+    statement = select(*USER_COLUMNS).where(User.id > after_id)
+
+    if query:
+        needle = _escape_like(query.lower())
+        pattern = f"%{needle}%" if match == user_pb2.SEARCH_MATCH_SUBSTRING else f"{needle}%"
+        statement = statement.where(or_(
+            func.lower(User.name).like(pattern, escape="\\"),
+            func.lower(User.email).like(pattern, escape="\\")
+        ))
+
+    if is_active is not None:
+        # Plain boolean predicates so the planner can match the partial index's WHERE is_active
+        statement = statement.where(User.is_active if is_active else ~User.is_active)
+
+    return statement.order_by(User.id).limit(limit)
+
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def to_version(value: Optional[datetime]) -> int:
+    """Microseconds since the epoch; naive timestamps (SQLite) are UTC."""
+    if value is None:
+        return 0
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return (value - _EPOCH) // timedelta(microseconds=1)
+
+
+def row_to_user(row) -> user_pb2.User:
+    """Map a USER_COLUMNS row tuple to user_pb2.User."""
+    id_, name, email, is_active, version = row
+    return user_pb2.User(id=id_, name=name, email=email, is_active=is_active, version=to_version(version))
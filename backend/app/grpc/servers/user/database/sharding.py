@@ -0,0 +1,37 @@
+"""
+Deterministic shard map for horizontally partitioned tables.
+
+Rows are placed by hashing a natural key (e.g. the email address), so every row with the
+same key lands on the same shard and a per-shard UNIQUE constraint on that key is globally
+unique. Ids encode their shard in the low digits (id = local_id * SHARD_ID_STRIDE + shard),
+so lookups by id go straight to one shard and ids from different shards never collide.
+
+The map depends on the number of shards: changing it requires rebalancing existing rows.
+"""
+import hashlib
+from typing import Optional
+
+# Upper bound on the number of shards. Ids stay 32-bit (protobuf int32, GraphQL Int), which
+# leaves 2**31 / SHARD_ID_STRIDE ids per shard.
+SHARD_ID_STRIDE = 64
+
+
+def shard_for_key(key: str, shard_count: int) -> int:
+    """Shard owning rows with this natural key."""
+    if shard_count == 1:
+        return 0
+    digest = hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big") % shard_count
+
+
+def shard_for_id(row_id: int, shard_count: int) -> Optional[int]:
+    """Shard encoded in an id, or None when the id can't belong to any shard."""
+    if shard_count == 1:
+        return 0
+    shard = row_id % SHARD_ID_STRIDE
+    return shard if shard < shard_count else None
+
+
+def global_id(local_id: int, shard: int) -> int:
+    """Id for the local_id-th row allocated on a shard."""
+    return local_id * SHARD_ID_STRIDE + shard
@@ -0,0 +1,219 @@
+"""
+Change feed behind WatchUsers: user create/update/delete events with resumable positions.
+
+Every event gets the next sequence number of the hub's epoch (random, new per process) and
+is kept in a ring buffer of the last buffer_size events. A subscriber that reconnects with
+the epoch and sequence of the last event it received gets everything after it from the
+buffer. A new subscriber (no epoch), or one the buffer no longer reaches back far enough
+for, or one with a different epoch (another replica, or this one restarted), gets a RESET
+event instead and must drop everything it cached: whatever it cached before subscribing
+may have changed unseen. Streams send a HEARTBEAT when nothing happened for
+heartbeat_seconds.
+
+Events come from one of two sources:
+
+- notify: a trigger on the users table (Alembic revision e5b2c7f10a93) sends pg_notify on
+  the user_events channel for every committed insert, update and delete, whichever process
+  or tool made it. PgNotifyListener LISTENs on every shard and feeds the hub. When a LISTEN
+  connection drops, notifications sent meanwhile are lost, so the hub emits a RESET.
+- local: the servicer publishes the users it creates itself. Only correct when this
+  process is the only writer (single node, SQLite).
+"""
+import json
+import logging
+import secrets
+import select
+import threading
+import time
+from collections import deque
+from typing import Deque, Iterator, List, Optional
+
+import grpc
+from sqlalchemy.engine import Engine
+
+from generated import user_pb2
+from app.observability.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "user_events"
+
+SOURCE_NOTIFY = "notify"
+SOURCE_LOCAL = "local"
+
+# How often streams re-check whether their caller went away
+_POLL_SECONDS = 1.0
+
+_OPERATIONS = {
+    "INSERT": user_pb2.USER_EVENT_CREATED,
+    "UPDATE": user_pb2.USER_EVENT_UPDATED,
+    "DELETE": user_pb2.USER_EVENT_DELETED,
+}
+
+events_counter = registry.counter("user_events_published_total", "User change events published, by type")
+watch_streams_gauge = registry.gauge("user_watch_streams", "Open WatchUsers streams")
+
+
+class UserEventHub:
+    """Sequences user change events and fans them out to WatchUsers streams."""
+
+    def __init__(
+        self,
+        source: str = SOURCE_LOCAL,
+        buffer_size: int = 10000,
+        heartbeat_seconds: float = 15.0,
+        max_streams: int = 32
+    ):
+        self.source = source
+        self.epoch = secrets.token_hex(8)
+        self.heartbeat_seconds = heartbeat_seconds
+        self.max_streams = max_streams
+        self._condition = threading.Condition()
+        self._buffer: Deque[user_pb2.UserEvent] = deque(maxlen=max(buffer_size, 1))
+        self._sequence = 0
+        self._streams = 0
+        self._closed = False
+        self.listener: Optional["PgNotifyListener"] = None
+
+    @property
+    def local(self) -> bool:
+        """Whether the servicer has to publish its own writes."""
+        return self.source == SOURCE_LOCAL
+
+    def publish(self, event_type: int, user: Optional[user_pb2.User] = None):
+        with self._condition:
+            self._sequence += 1
+            event = user_pb2.UserEvent(type=event_type, epoch=self.epoch, sequence=self._sequence, user=user)
+            self._buffer.append(event)
+            self._condition.notify_all()
+        events_counter.inc(type=user_pb2.UserEventType.Name(event_type))
+
+    def reset(self):
+        """Tell every subscriber that events were lost."""
+        self.publish(user_pb2.USER_EVENT_RESET)
+
+    def publish_notification(self, payload: str):
+        """Publish a user_events notification sent by the users table trigger."""
+        data = json.loads(payload)
+        event_type = _OPERATIONS[data.pop("op")]
+        self.publish(event_type, user_pb2.User(**data))
+
+    def close(self):
+        """End open streams and refuse new ones, e.g. when the server starts draining."""
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        if self.listener is not None:
+            self.listener.stop()
+
+    def _covers(self, sequence: int) -> bool:
+        # The buffer holds the contiguous sequences (self._sequence - len, self._sequence]
+        return self._sequence - len(self._buffer) <= sequence <= self._sequence
+
+    def _after(self, sequence: int) -> List[user_pb2.UserEvent]:
+        events = []
+        for event in reversed(self._buffer):
+            if event.sequence <= sequence:
+                break
+            events.append(event)
+        events.reverse()
+        return events
+
+    def stream(self, request: user_pb2.WatchUsersRequest, context) -> Iterator[user_pb2.UserEvent]:
+        """WatchUsers: the events after the requested position, then new ones as they happen."""
+        with self._condition:
+            if self._closed:
+                context.set_code(grpc.StatusCode.UNAVAILABLE)
+                context.set_details("The server is shutting down")
+                return
+            if self._streams >= self.max_streams:
+                context.set_code(grpc.StatusCode.RESOURCE_EXHAUSTED)
+                context.set_details(f"At most {self.max_streams} WatchUsers streams can be open")
+                return
+            self._streams += 1
+            watch_streams_gauge.set(self._streams)
+            resume = request.epoch == self.epoch and self._covers(request.after_sequence)
+            position = request.after_sequence if resume else self._sequence
+            # A resuming subscriber learns nothing was lost; a new or lost one has to start over
+            first_type = user_pb2.USER_EVENT_HEARTBEAT if resume else user_pb2.USER_EVENT_RESET
+        try:
+            yield user_pb2.UserEvent(type=first_type, epoch=self.epoch, sequence=position)
+            last_sent = time.monotonic()
+            while context.is_active():
+                with self._condition:
+                    events = self._after(position)
+                    if not events and not self._closed:
+                        self._condition.wait(min(_POLL_SECONDS, self.heartbeat_seconds))
+                        events = self._after(position)
+                    closed = self._closed
+                for event in events:
+                    yield event
+                    position = event.sequence
+                if events:
+                    last_sent = time.monotonic()
+                elif time.monotonic() - last_sent >= self.heartbeat_seconds:
+                    yield user_pb2.UserEvent(type=user_pb2.USER_EVENT_HEARTBEAT, epoch=self.epoch, sequence=position)
+                    last_sent = time.monotonic()
+                if closed:
+                    return
+        finally:
+            with self._condition:
+                self._streams -= 1
+                watch_streams_gauge.set(self._streams)
+
+
+class PgNotifyListener:
+    """LISTENs on the user_events channel of every engine and publishes what arrives."""
+
+    def __init__(self, hub: UserEventHub, engines: List[Engine], retry_seconds: float = 1.0):
+        self.hub = hub
+        self.engines = engines
+        self.retry_seconds = retry_seconds
+        self._stopped = threading.Event()
+        self._threads: List[threading.Thread] = []
+
+    def start(self):
+        for shard, engine in enumerate(self.engines):
+            thread = threading.Thread(
+                target=self._listen, args=(engine,), name=f"user-events-listener-{shard}", daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self):
+        self._stopped.set()
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+    def _listen(self, engine: Engine):
+        failed = False
+        while not self._stopped.is_set():
+            dbapi_connection = None
+            try:
+                # Detached: the connection stays out of the pool and is closed when we're done
+                connection = engine.raw_connection()
+                dbapi_connection = connection.driver_connection
+                connection.detach()
+                dbapi_connection.autocommit = True
+                with dbapi_connection.cursor() as cursor:
+                    cursor.execute(f"LISTEN {CHANNEL}")
+                if failed:
+                    logger.warning(f"LISTEN {CHANNEL} re-established; notifications may have been lost")
+                    self.hub.reset()
+                    failed = False
+                while not self._stopped.is_set():
+                    if not select.select([dbapi_connection], [], [], _POLL_SECONDS)[0]:
+                        continue
+                    dbapi_connection.poll()
+                    while dbapi_connection.notifies:
+                        self.hub.publish_notification(dbapi_connection.notifies.pop(0).payload)
+            except Exception as e:
+                if self._stopped.is_set():
+                    break
+                failed = True
+                logger.warning(f"LISTEN {CHANNEL} failed: {e}; retrying in {self.retry_seconds}s")
+                self._stopped.wait(self.retry_seconds)
+            finally:
+                if dbapi_connection is not None:
+                    dbapi_connection.close()
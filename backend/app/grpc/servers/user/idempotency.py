@@ -0,0 +1,241 @@
+"""
+Idempotency keys: retries of a request that carries the same key get the first attempt's response.
+
+The first request with a key claims it by inserting a 'pending' row. When its handler
+returns, the gRPC status, details and serialized response are stored on that row. Later
+requests with the key replay the stored response without running the handler. Requests
+that arrive while the key is still pending poll the row until it completes, so concurrent
+duplicates wait for the first one instead of racing it.
+
+Keys are scoped per method, live on the shard their key hashes to and expire ttl_seconds
+after they were claimed. A claim still pending after pending_timeout_seconds (e.g. the
+server died mid-request) is taken over by the next request with the key.
+"""
+import hashlib
+import logging
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Optional, Tuple, Type
+
+import grpc
+from sqlalchemy import bindparam, delete, select, update
+
+from app.grpc.servers.user.database.connection import user_db
+from app.grpc.servers.user.database import queries
+from app.grpc.servers.user.database.models import IdempotencyKey
+from app.observability.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+PENDING = "pending"
+COMPLETED = "completed"
+
+MAX_KEY_LENGTH = 255
+
+# Outcomes worth retrying are not stored: the key is released so a retry runs the handler again
+_RETRYABLE_CODES = frozenset({
+    grpc.StatusCode.UNKNOWN,
+    grpc.StatusCode.INTERNAL,
+    grpc.StatusCode.UNAVAILABLE,
+    grpc.StatusCode.ABORTED,
+    grpc.StatusCode.DEADLINE_EXCEEDED,
+    grpc.StatusCode.RESOURCE_EXHAUSTED,
+    grpc.StatusCode.CANCELLED,
+})
+_CODES_BY_VALUE = {code.value[0]: code for code in grpc.StatusCode}
+
+_POLL_INITIAL_SECONDS = 0.01
+_POLL_MAX_SECONDS = 0.2
+
+idempotent_requests_counter = registry.counter(
+    "user_idempotent_requests_total", "Requests carrying an idempotency key, by outcome"
+)
+
+# Bind names must differ from column names for UPDATE ... SET to accept them
+_key_matches = (IdempotencyKey.method == bindparam("key_method")) & (IdempotencyKey.key == bindparam("key_value"))
+
+select_key = select(
+    IdempotencyKey.request_hash,
+    IdempotencyKey.status,
+    IdempotencyKey.response_code,
+    IdempotencyKey.response_details,
+    IdempotencyKey.response,
+    IdempotencyKey.claimed_at,
+    IdempotencyKey.expires_at,
+).where(_key_matches)
+
+complete_key = update(IdempotencyKey).where(_key_matches).values(
+    status=COMPLETED,
+    response_code=bindparam("response_code"),
+    response_details=bindparam("response_details"),
+    response=bindparam("response"),
+)
+
+release_key = delete(IdempotencyKey).where(_key_matches & (IdempotencyKey.status == PENDING))
+
+purge_expired_keys = delete(IdempotencyKey).where(IdempotencyKey.expires_at < bindparam("now"))
+
+
+def _as_utc(value: datetime) -> datetime:
+    # SQLite hands timestamps back naive; they were written as UTC
+    return value if value.tzinfo is not None else value.replace(tzinfo=timezone.utc)
+
+
+class IdempotencyStore:
+    """Runs handlers at most once per (method, idempotency key) and replays their responses."""
+
+    def __init__(self, ttl_seconds: float, pending_timeout_seconds: float, purge_interval_seconds: float = 60.0):
+        self.ttl = timedelta(seconds=ttl_seconds)
+        self.pending_timeout = timedelta(seconds=pending_timeout_seconds)
+        self.purge_interval_seconds = purge_interval_seconds
+        self._next_purge = time.monotonic() + purge_interval_seconds
+        self._purge_lock = threading.Lock()
+
+    def run(
+        self,
+        method: str,
+        key: str,
+        request,
+        context,
+        handler: Callable,
+        response_class: Type
+    ):
+        """Call handler(request, context) unless the key already has (or is producing) a response."""
+        if len(key) > MAX_KEY_LENGTH:
+            context.set_code(grpc.StatusCode.INVALID_ARGUMENT)
+            context.set_details(f"Idempotency key is longer than {MAX_KEY_LENGTH} characters")
+            return response_class()
+
+        self._maybe_purge()
+        request_hash = hashlib.sha256(request.SerializeToString(deterministic=True)).hexdigest()
+        shard = user_db.shard_for_key(key)
+        params = {"key_method": method, "key_value": key}
+
+        # Wait for a pending first attempt until our own deadline, or the pending timeout without one
+        time_remaining = context.time_remaining()
+        wait_seconds = time_remaining if time_remaining is not None else self.pending_timeout.total_seconds()
+        give_up_at = time.monotonic() + wait_seconds
+        poll_seconds = _POLL_INITIAL_SECONDS
+
+        while True:
+            claimed, row = self._claim(params, request_hash, shard)
+            if claimed:
+                break
+            if row is None:
+                # Released or purged between our INSERT and SELECT; claim again
+                continue
+            if row.request_hash != request_hash:
+                idempotent_requests_counter.inc(method=method, outcome="mismatch")
+                context.set_code(grpc.StatusCode.INVALID_ARGUMENT)
+                context.set_details("Idempotency key was already used for a different request")
+                return response_class()
+            if row.status == COMPLETED:
+                idempotent_requests_counter.inc(method=method, outcome="replayed")
+                if row.response_code:
+                    context.set_code(_CODES_BY_VALUE[row.response_code])
+                    context.set_details(row.response_details or "")
+                return response_class.FromString(row.response or b"")
+            if time.monotonic() + poll_seconds > give_up_at:
+                idempotent_requests_counter.inc(method=method, outcome="in_progress")
+                context.set_code(grpc.StatusCode.ABORTED)
+                context.set_details("A request with this idempotency key is still in progress")
+                return response_class()
+            time.sleep(poll_seconds)
+            poll_seconds = min(poll_seconds * 2, _POLL_MAX_SECONDS)
+
+        idempotent_requests_counter.inc(method=method, outcome="executed")
+        try:
+            response = handler(request, context)
+        except BaseException:
+            self._release(params, shard)
+            raise
+
+        code = context.code()
+        if code in _RETRYABLE_CODES:
+            self._release(params, shard)
+        else:
+            details = context.details()
+            # The sync server's context hands details back as bytes; the column holds text
+            if isinstance(details, bytes):
+                details = details.decode("utf-8")
+            self._complete(params, shard, code, details, response)
+        return response
+
+    def _claim(self, params: dict, request_hash: str, shard: int) -> Tuple[bool, Optional[tuple]]:
+        """Claim the key; returns (True, None) on success, else (False, the existing row or None)."""
+        now = datetime.now(timezone.utc)
+        claim = {
+            "request_hash": request_hash,
+            "status": PENDING,
+            "claimed_at": now,
+            "expires_at": now + self.ttl,
+        }
+        with user_db.get_db_connection(shard=shard) as connection:
+            insert = queries.DIALECT_INSERTS[connection.dialect.name]
+            result = connection.execute(
+                insert(IdempotencyKey)
+                .values(method=params["key_method"], key=params["key_value"], **claim)
+                .on_conflict_do_nothing()
+            )
+            if result.rowcount == 1:
+                return True, None
+
+            row = connection.execute(select_key, params).first()
+            if row is None:
+                return False, None
+            expired = _as_utc(row.expires_at) <= now
+            abandoned = row.status == PENDING and _as_utc(row.claimed_at) <= now - self.pending_timeout
+            if not (expired or abandoned):
+                return False, row
+
+            # Take the key over; the claimed_at check makes sure only one request does
+            taken = connection.execute(
+                update(IdempotencyKey)
+                .where(_key_matches & (IdempotencyKey.claimed_at == row.claimed_at))
+                .values(**claim, response_code=None, response_details=None, response=None),
+                params
+            )
+            if taken.rowcount == 1:
+                logger.info(f"Took over {'expired' if expired else 'abandoned'} idempotency key {params['key_value']!r} of {params['key_method']}")
+                return True, None
+            return False, None
+
+    def _complete(self, params: dict, shard: int, code: Optional[grpc.StatusCode], details: Optional[str], response):
+        stored_code = code.value[0] if code is not None else 0
+        with user_db.get_db_connection(shard=shard) as connection:
+            connection.execute(complete_key, {
+                **params,
+                "response_code": stored_code,
+                "response_details": details if stored_code else None,
+                "response": response.SerializeToString(),
+            })
+
+    def _release(self, params: dict, shard: int):
+        try:
+            with user_db.get_db_connection(shard=shard) as connection:
+                connection.execute(release_key, params)
+        except Exception as e:
+            # The claim then blocks retries until pending_timeout, after which it is taken over
+            logger.warning(f"Failed to release idempotency key {params['key_value']!r} of {params['key_method']}: {e}")
+
+    def _maybe_purge(self):
+        if time.monotonic() < self._next_purge or not self._purge_lock.acquire(blocking=False):
+            return
+        self._next_purge = time.monotonic() + self.purge_interval_seconds
+        threading.Thread(target=self._purge, name="idempotency-purge", daemon=True).start()
+
+    def _purge(self):
+        try:
+            purged = user_db.scatter(
+                lambda connection, shard: connection.execute(
+                    purge_expired_keys, {"now": datetime.now(timezone.utc)}
+                ).rowcount,
+                read_only=False
+            )
+            if sum(purged):
+                logger.info(f"Purged {sum(purged)} expired idempotency keys")
+        except Exception as e:
+            logger.warning(f"Purging expired idempotency keys failed: {e}")
+        finally:
+            self._purge_lock.release()
@@ -1,44 +1,145 @@
 import grpc
 from concurrent import futures
+import heapq
 import logging
 import os
+from itertools import islice
+from operator import itemgetter
+from typing import Optional
 
 from generated import user_pb2
 from generated import user_pb2_grpc
-from app.grpc.servers.interceptors import LoggingInterceptor
+from generated import health_pb2_grpc
+from app.grpc.compression import CompressionPolicy
+from app.grpc.servers.admin import AdminServer
+from app.grpc.servers.interceptors import (
+    CompressionInterceptor, InFlightInterceptor, LoggingInterceptor, SqlProfilingInterceptor, TracingInterceptor
+)
 from app.grpc.servers.graceful_server import GracefulGRPCServer
-from app.grpc.servers.user.database.connection import get_user_db_session
+from app.grpc.servers.health import HealthServicer, SERVING
+from app.grpc.servers.user.batching import CreateUserBatcher, GetUserBatcher, load_users
+from app.grpc.servers.user.events import PgNotifyListener, SOURCE_LOCAL, SOURCE_NOTIFY, UserEventHub
+from app.grpc.servers.user.idempotency import IdempotencyStore
+from app.grpc.servers.user.database.connection import get_user_db_session, get_user_db_connection, user_db
 from app.grpc.servers.user.database.models import User
+from app.grpc.servers.user.database import queries
+from app.observability.tracing import configure_tracing, tracer
+from sqlalchemy import text
 from sqlalchemy.exc import IntegrityError
 
+# Below this many rows the planner estimate is replaced by an exact COUNT(*), which is cheap anyway
+COUNT_ESTIMATE_MIN_ROWS = 10000
+
+SEARCH_DEFAULT_LIMIT = 20
+SEARCH_MAX_LIMIT = 100
+
+BATCH_GET_MAX_IDS = 100
+
+
+def caller_identity(context) -> Optional[str]:
+    """Identify the end user for read-your-writes pinning (x-caller-id metadata); None isn't pinned."""
+    for key, value in context.invocation_metadata() or ():
+        if key == "x-caller-id":
+            return value or None
+    return None
+
+
+def idempotency_key(context) -> Optional[str]:
+    """Key from the idempotency-key metadata, if the caller sent one."""
+    for key, value in context.invocation_metadata() or ():
+        if key == "idempotency-key":
+            return value or None
+    return None
+
 
 class UserServiceServicer(user_pb2_grpc.UserServiceServicer):
-    def __init__(self):
-        pass
+    def __init__(
+        self,
+        get_user_batcher: Optional[GetUserBatcher] = None,
+        create_user_batcher: Optional[CreateUserBatcher] = None,
+        idempotency: Optional[IdempotencyStore] = None,
+        events: Optional[UserEventHub] = None
+    ):
+        self.get_user_batcher = get_user_batcher
+        self.create_user_batcher = create_user_batcher
+        self.idempotency = idempotency
+        self.events = events
 
     def GetUser(self, request, context):
-        with get_user_db_session() as db:
-            user = db.query(User).filter(User.id == request.id).first()
-            if not user:
-                context.set_code(grpc.StatusCode.NOT_FOUND)
-                context.set_details("User not found")
-                return user_pb2.User()
+        user = self._find_user(request.id, caller_identity(context))
+        if user is None:
+            context.set_code(grpc.StatusCode.NOT_FOUND)
+            context.set_details("User not found")
+            return user_pb2.User()
+        return user
+
+    def GetUserIfModified(self, request, context):
+        user = self._find_user(request.id, caller_identity(context))
+        if user is None:
+            context.set_code(grpc.StatusCode.NOT_FOUND)
+            context.set_details("User not found")
+            return user_pb2.GetUserIfModifiedResponse()
+        if request.known_version and user.version == request.known_version:
+            return user_pb2.GetUserIfModifiedResponse(not_modified=True)
+        return user_pb2.GetUserIfModifiedResponse(user=user)
+
+    def BatchGetUsers(self, request, context):
+        # dict.fromkeys drops duplicates but keeps the request order
+        user_ids = list(dict.fromkeys(request.ids))
+        if len(user_ids) > BATCH_GET_MAX_IDS:
+            context.set_code(grpc.StatusCode.INVALID_ARGUMENT)
+            context.set_details(f"At most {BATCH_GET_MAX_IDS} ids can be requested at once")
+            return user_pb2.BatchGetUsersResponse()
+        found = load_users(user_ids, caller=caller_identity(context))
+        return user_pb2.BatchGetUsersResponse(users=[found[user_id] for user_id in user_ids if user_id in found])
+
+    def _find_user(self, user_id: int, caller) -> Optional[user_pb2.User]:
+        # Callers pinned to the primary after a write bypass the (replica-routed) batcher
+        if self.get_user_batcher and not user_db.read_your_writes.is_pinned(caller):
+            return self.get_user_batcher.get_user(user_id)
 
-            return user_pb2.User(
-                id=user.id,
-                name=user.name,
-                email=user.email,
-                is_active=user.is_active
-            )
+        shard = user_db.shard_for_id(user_id)
+        if shard is None:
+            return None
+        with get_user_db_connection(read_only=True, caller=caller, shard=shard) as connection:
+            row = connection.execute(queries.select_user_by_id, {"user_id": user_id}).first()
+        return queries.row_to_user(row) if row is not None else None
 
     def CreateUser(self, request, context):
-        with get_user_db_session() as db:
+        key = idempotency_key(context)
+        if key and self.idempotency:
+            return self.idempotency.run("CreateUser", key, request, context, self._create_user, user_pb2.User)
+        return self._create_user(request, context)
+
+    def _create_user(self, request, context):
+        user = self._insert_user(request, context)
+        # With the notify source the users table trigger publishes it instead
+        if user.id and self.events is not None and self.events.local:
+            self.events.publish(user_pb2.USER_EVENT_CREATED, user)
+        return user
+
+    def _insert_user(self, request, context):
+        caller = caller_identity(context)
+        if self.create_user_batcher:
+            user = self.create_user_batcher.create_user(request.name, request.email)
+            user_db.read_your_writes.record_write(caller)
+            if user is None:
+                context.set_code(grpc.StatusCode.ALREADY_EXISTS)
+                context.set_details("User with this email already exists")
+                return user_pb2.User()
+            return user
+
+        # Hashing by email keeps each address on one shard, where the unique index enforces it
+        shard = user_db.shard_for_key(request.email)
+        with get_user_db_session(caller=caller, shard=shard) as db:
             try:
                 db_user = User(
                     name=request.name,
                     email=request.email,
                     is_active=True
                 )
+                if user_db.shard_count > 1:
+                    db_user.id = queries.allocate_user_id(db, shard)
                 db.add(db_user)
                 db.flush()
 
@@ -46,47 +147,219 @@ class UserServiceServicer(user_pb2_grpc.UserServiceServicer):
                     id=db_user.id,
                     name=db_user.name,
                     email=db_user.email,
-                    is_active=db_user.is_active
+                    is_active=db_user.is_active,
+                    version=queries.to_version(db_user.updated_at or db_user.created_at)
                 )
             except IntegrityError:
+                # The failed flush leaves the transaction unusable; end it before the session commits
+                db.rollback()
                 context.set_code(grpc.StatusCode.ALREADY_EXISTS)
                 context.set_details("User with this email already exists")
                 return user_pb2.User()
 
+    def WatchUsers(self, request, context):
+        if self.events is None:
+            context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+            context.set_details("The user change feed is disabled (USER_WATCH_SOURCE=off)")
+            return
+        yield from self.events.stream(request, context)
+
     def GetUsers(self, request, context):
-        with get_user_db_session() as db:
-            query = db.query(User)
+        include_total = request.include_total != user_pb2.TOTAL_COUNT_NONE
+        estimate = request.include_total == user_pb2.TOTAL_COUNT_ESTIMATE
+        sharded = user_db.shard_count > 1
 
-            if request.limit > 0:
-                query = query.offset(request.offset).limit(request.limit)
+        def fetch(connection, shard):
+            if request.limit > 0 and request.after_id > 0:
+                rows = connection.execute(
+                    queries.select_users_after, {"after_id": request.after_id, "limit": request.limit}
+                ).all()
+            elif request.limit > 0:
+                # Sharded, every shard returns its first offset+limit rows and the merge applies the offset
+                page = (
+                    {"limit": request.offset + request.limit, "offset": 0} if sharded
+                    else {"limit": request.limit, "offset": request.offset}
+                )
+                rows = connection.execute(queries.select_users_page, page).all()
+            else:
+                rows = connection.execute(queries.select_all_users).all()
+            return rows, self._count_users(connection, estimate) if include_total else None
 
-            users = query.all()
+        results = user_db.scatter(fetch, caller=caller_identity(context))
+        rows = heapq.merge(*(shard_rows for shard_rows, _ in results), key=itemgetter(0))
+        if sharded and request.limit > 0:
+            offset = 0 if request.after_id > 0 else request.offset
+            rows = islice(rows, offset, offset + request.limit)
 
-            pb_users = [
-                user_pb2.User(
-                    id=user.id,
-                    name=user.name,
-                    email=user.email,
-                    is_active=user.is_active
-                )
-                for user in users
-            ]
+        response = user_pb2.GetUsersResponse(users=[queries.row_to_user(row) for row in rows])
+        if include_total:
+            response.total_count = sum(count for _, (count, _) in results)
+            response.total_is_estimate = any(is_estimate for _, (_, is_estimate) in results)
+        return response
 
-            return user_pb2.GetUsersResponse(users=pb_users)
+    def SearchUsers(self, request, context):
+        # A negative limit would reach SQL as LIMIT -n
+        limit = max(min(request.limit or SEARCH_DEFAULT_LIMIT, SEARCH_MAX_LIMIT), 1)
+        statement = queries.search_users_statement(
+            request.query,
+            request.match,
+            request.is_active if request.HasField("is_active") else None,
+            request.after_id,
+            # One extra row tells us whether another page exists
+            limit + 1
+        )
+        shard_rows = user_db.scatter(
+            lambda connection, shard: connection.execute(statement).all(),
+            caller=caller_identity(context)
+        )
+        # Ids are ordered within each shard, so a merge gives the global keyset order
+        rows = list(islice(heapq.merge(*shard_rows, key=itemgetter(0)), limit + 1))
 
+        response = user_pb2.SearchUsersResponse(users=[queries.row_to_user(row) for row in rows[:limit]])
+        if len(rows) > limit:
+            response.next_after_id = rows[limit - 1].id
+        return response
 
-def serve():
-    port = int(os.getenv("USER_SERVICE_PORT", "5001"))
+    def _count_users(self, connection, estimate: bool):
+        """Total number of users as (count, is_estimate)."""
+        if estimate and connection.dialect.name == "postgresql":
+            # reltuples is maintained by VACUUM/ANALYZE and is -1 for never analyzed tables
+            reltuples = connection.execute(
+                text("SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(:table)"),
+                {"table": User.__tablename__}
+            ).scalar()
+            if reltuples is not None and reltuples >= COUNT_ESTIMATE_MIN_ROWS:
+                return reltuples, True
+        return connection.execute(queries.count_users).scalar(), False
+
+
+def create_get_user_batcher() -> Optional[GetUserBatcher]:
+    """GetUser micro-batcher configured from the environment; disabled unless a window is set."""
+    window_ms = float(os.getenv("USER_GET_USER_BATCH_WINDOW_MS", "0"))
+    if window_ms <= 0:
+        return None
+    max_batch_size = int(os.getenv("USER_GET_USER_BATCH_MAX_SIZE", "64"))
+    logging.info(f"GetUser micro-batching enabled: window={window_ms}ms max_batch_size={max_batch_size}")
+    return GetUserBatcher(window_ms / 1000, max_batch_size)
+
+
+def create_create_user_batcher() -> Optional[CreateUserBatcher]:
+    """CreateUser group-commit batcher configured from the environment; disabled unless a window is set."""
+    window_ms = float(os.getenv("USER_CREATE_USER_BATCH_WINDOW_MS", "0"))
+    if window_ms <= 0:
+        return None
+    max_batch_size = int(os.getenv("USER_CREATE_USER_BATCH_MAX_SIZE", "128"))
+    logging.info(f"CreateUser group commit enabled: window={window_ms}ms max_batch_size={max_batch_size}")
+    return CreateUserBatcher(window_ms / 1000, max_batch_size)
+
+
+def create_idempotency_store() -> Optional[IdempotencyStore]:
+    """Idempotency key store configured from the environment; a TTL of 0 disables it."""
+    ttl_seconds = float(os.getenv("USER_IDEMPOTENCY_KEY_TTL_SECONDS", "86400"))
+    if ttl_seconds <= 0:
+        return None
+    pending_timeout_seconds = float(os.getenv("USER_IDEMPOTENCY_PENDING_TIMEOUT_SECONDS", "30"))
+    return IdempotencyStore(ttl_seconds, pending_timeout_seconds)
+
+
+def create_user_event_hub() -> Optional[UserEventHub]:
+    """
+    WatchUsers change feed configured from the environment.
+
+    USER_WATCH_SOURCE is notify (LISTEN to the users table trigger), local (this process's
+    own writes), auto (notify on PostgreSQL, else local) or off.
+    """
+    source = os.getenv("USER_WATCH_SOURCE", "auto").lower()
+    if source == "off":
+        return None
+    if source == "auto":
+        source = SOURCE_NOTIFY if user_db.engine.dialect.name == "postgresql" else SOURCE_LOCAL
+    hub = UserEventHub(
+        source=source,
+        buffer_size=int(os.getenv("USER_WATCH_BUFFER_SIZE", "10000")),
+        heartbeat_seconds=float(os.getenv("USER_WATCH_HEARTBEAT_SECONDS", "15")),
+        max_streams=int(os.getenv("USER_WATCH_MAX_STREAMS", "32"))
+    )
+    if source == SOURCE_NOTIFY:
+        hub.listener = PgNotifyListener(hub, user_db.shards)
+        hub.listener.start()
+    logging.info(f"WatchUsers change feed enabled: source={source} epoch={hub.epoch}")
+    return hub
+
+
+def create_server(
+    port: int,
+    health: Optional[HealthServicer] = None,
+    in_flight: Optional[InFlightInterceptor] = None,
+    events: Optional[UserEventHub] = None
+) -> grpc.Server:
+    """
+    Build the User gRPC server (not started) listening on the given port.
+
+    The grpc.health.v1 service is always registered; pass health/in_flight to drive and
+    observe them during shutdown, and events to close the change feed's streams then.
+    """
+    interceptors = [LoggingInterceptor()]
+    compression = CompressionPolicy.from_env("USER_GRPC")
+    if compression.enabled:
+        interceptors.append(CompressionInterceptor(compression))
+    if user_db.install_profiling():
+        interceptors.insert(0, SqlProfilingInterceptor())
+    if tracer.enabled:
+        interceptors.insert(0, TracingInterceptor())
+        user_db.install_tracing()
+    if in_flight is not None:
+        interceptors.insert(0, in_flight)
+    events = events or create_user_event_hub()
+    # Every open WatchUsers stream holds a handler thread for as long as it lasts
     server = grpc.server(
-        futures.ThreadPoolExecutor(max_workers=10),
-        interceptors=[LoggingInterceptor()]
+        futures.ThreadPoolExecutor(max_workers=10 + (events.max_streams if events else 0)),
+        interceptors=interceptors
+    )
+    servicer = UserServiceServicer(
+        get_user_batcher=create_get_user_batcher(),
+        create_user_batcher=create_create_user_batcher(),
+        idempotency=create_idempotency_store(),
+        events=events
     )
-    user_pb2_grpc.add_UserServiceServicer_to_server(UserServiceServicer(), server)
+    user_pb2_grpc.add_UserServiceServicer_to_server(servicer, server)
+
+    health = health or HealthServicer()
+    health.set("user.UserService", SERVING)
+    health_pb2_grpc.add_HealthServicer_to_server(health, server)
+
+    server.add_insecure_port(f'[::]:{port}')
+    return server
+
+
+def serve():
+    port = int(os.getenv("USER_SERVICE_PORT", "5001"))
+    configure_tracing("user-service")
+    health = HealthServicer()
+    in_flight = InFlightInterceptor()
+    events = create_user_event_hub()
+    server = create_server(port, health=health, in_flight=in_flight, events=events)
     listen_addr = f'[::]:{port}'
-    server.add_insecure_port(listen_addr)
+
+    on_stopped = [user_db.dispose, tracer.exporter.shutdown]
+    admin_port = int(os.getenv("USER_SERVICE_ADMIN_PORT", "0"))
+    if admin_port:
+        admin = AdminServer(admin_port)
+        admin.start()
+        on_stopped.append(admin.stop)
+        logging.info(f"Serving /metrics and /admin/profile on port {admin.port}")
 
     logging.info(f"Starting User gRPC server on {listen_addr}")
-    GracefulGRPCServer(server, name="User gRPC server").start_and_wait()
+    GracefulGRPCServer(
+        server,
+        name="User gRPC server",
+        grace_period=float(os.getenv("USER_SERVICE_SHUTDOWN_GRACE_SECONDS", "30")),
+        drain_delay=float(os.getenv("USER_SERVICE_SHUTDOWN_DRAIN_DELAY_SECONDS", "0")),
+        health=health,
+        in_flight=in_flight,
+        on_draining=[events.close] if events else None,
+        on_stopped=on_stopped
+    ).start_and_wait()
 
 
 if __name__ == '__main__':
@@ -0,0 +1,221 @@
+"""
+Production launcher for the BFF: `python -m app.launcher` (from the backend directory).
+
+Runs BFF_WORKERS uvicorn worker processes (default: one per CPU) sharing one listening
+socket, each with a uvloop event loop and the httptools HTTP parser. Every worker connects
+its gRPC channels during lifespan startup, before it accepts connections.
+
+Workers are recycled to cap memory growth: after BFF_MAX_REQUESTS requests plus a random
+0..BFF_MAX_REQUESTS_JITTER a worker asks the supervisor to replace it and keeps serving.
+The supervisor starts the replacement and stops the old worker (gracefully, finishing its
+in-flight requests) only once the replacement has started up, one worker at a time, so
+there are never fewer than BFF_WORKERS workers accepting. SIGHUP rolls every worker the
+same way. Workers publish their metrics through METRICS_MULTIPROC_DIR, so /metrics on any of
+them covers all of them, and map one user cache file (USER_CACHE_PATH), so they share it.
+"""
+import glob
+import logging
+import os
+import random
+import tempfile
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, List, Optional, Set, Tuple
+
+import uvicorn
+# Multiprocess.keep_subprocess_alive/handle_hup and Process need uvicorn >= 0.30 (pinned in pyproject.toml)
+from uvicorn._subprocess import spawn
+from uvicorn.supervisors.multiprocess import Multiprocess, Process
+
+logger = logging.getLogger("uvicorn.error")
+
+RECYCLE = "recycle"
+READY = "ready"
+
+
+@dataclass
+class LauncherConfig:
+    host: str = os.getenv("BFF_HOST", "0.0.0.0")
+    port: int = int(os.getenv("BFF_PORT", "8000"))
+    # 0 means one worker per CPU
+    workers: int = int(os.getenv("BFF_WORKERS", "0"))
+    # 0 disables recycling
+    max_requests: int = int(os.getenv("BFF_MAX_REQUESTS", "0"))
+    max_requests_jitter: int = int(os.getenv("BFF_MAX_REQUESTS_JITTER", "0"))
+    # How long a replacement worker gets to start up before the recycle is abandoned
+    startup_timeout_seconds: float = float(os.getenv("BFF_WORKER_STARTUP_TIMEOUT_SECONDS", "60"))
+    limit_concurrency: int = int(os.getenv("BFF_LIMIT_CONCURRENCY", "1000"))
+    graceful_timeout_seconds: int = int(os.getenv("BFF_GRACEFUL_TIMEOUT_SECONDS", "30"))
+
+    @property
+    def worker_count(self) -> int:
+        return self.workers if self.workers > 0 else (os.cpu_count() or 1)
+
+
+class WorkerServer(uvicorn.Server):
+    """
+    uvicorn.Server run in each worker. Tells the supervisor when it has started up and,
+    after its (jittered) request limit, that it wants to be replaced.
+    """
+
+    def __init__(self, config: uvicorn.Config, messages, max_requests: int = 0, max_requests_jitter: int = 0):
+        super().__init__(config)
+        self.messages = messages
+        self.max_requests = max_requests
+        self.max_requests_jitter = max_requests_jitter
+        self.request_limit = 0
+        self.recycle_requested = False
+
+    def run(self, sockets=None):
+        # Runs in the worker process, so every worker draws its own limit
+        if self.max_requests > 0:
+            self.request_limit = self.max_requests + random.randint(0, max(self.max_requests_jitter, 0))
+        return super().run(sockets=sockets)
+
+    async def startup(self, sockets=None):
+        await super().startup(sockets=sockets)
+        if not self.should_exit:
+            self.messages.put((READY, os.getpid()))
+
+    async def on_tick(self, counter: int) -> bool:
+        total = self.server_state.total_requests
+        if self.request_limit and not self.recycle_requested and total >= self.request_limit:
+            self.recycle_requested = True
+            logger.info(f"Worker [{os.getpid()}] served {total} requests, asking to be replaced")
+            self.messages.put((RECYCLE, os.getpid()))
+        return await super().on_tick(counter)
+
+
+class RollingSupervisor(Multiprocess):
+    """
+    uvicorn's Multiprocess supervisor with rolling worker replacement: one recycle at a time,
+    and the old worker is only terminated after its replacement reported READY.
+    """
+
+    def __init__(self, config: uvicorn.Config, target, sockets, messages, startup_timeout_seconds: float):
+        super().__init__(config, target, sockets)
+        self.messages = messages
+        self.startup_timeout_seconds = startup_timeout_seconds
+        self.recycle_queue: Deque[int] = deque()
+        self.ready: Set[int] = set()
+        # (old worker, its replacement, when the replacement was started)
+        self.replacement: Optional[Tuple[Process, Process, float]] = None
+        self.retiring: List[Process] = []
+
+    def keep_subprocess_alive(self):
+        super().keep_subprocess_alive()
+        if self.should_exit.is_set():
+            return
+        while not self.messages.empty():
+            kind, pid = self.messages.get()
+            if kind == RECYCLE:
+                self.recycle_queue.append(pid)
+            else:
+                self.ready.add(pid)
+        self._roll()
+        for process in list(self.retiring):
+            if not process.process.is_alive():
+                process.join()
+                self.retiring.remove(process)
+
+    def _roll(self):
+        if self.replacement is None:
+            while self.recycle_queue:
+                old = next((p for p in self.processes if p.pid == self.recycle_queue[0]), None)
+                self.recycle_queue.popleft()
+                if old is not None:
+                    new = Process(self.config, self.target, self.sockets)
+                    new.start()
+                    self.replacement = (old, new, time.monotonic())
+                    return
+            return
+
+        old, new, started = self.replacement
+        if new.pid in self.ready:
+            self.ready.discard(new.pid)
+            self.replacement = None
+            if old in self.processes:
+                self.processes[self.processes.index(old)] = new
+                self._retire(old)
+                logger.info(f"Replaced worker [{old.pid}] with [{new.pid}]")
+            else:
+                # The old worker died meanwhile and was already restarted
+                self._retire(new)
+        elif not new.process.is_alive() or time.monotonic() - started > self.startup_timeout_seconds:
+            logger.warning(f"Replacement worker [{new.pid}] did not start up; keeping [{old.pid}] for now")
+            self.replacement = None
+            self._retire(new)
+            self.recycle_queue.append(old.pid)
+
+    def _retire(self, process: Process):
+        process.terminate()
+        self.retiring.append(process)
+
+    def handle_hup(self):
+        logger.info("Received SIGHUP, replacing workers one at a time.")
+        self.recycle_queue.extend(process.pid for process in self.processes)
+
+    def terminate_all(self):
+        super().terminate_all()
+        if self.replacement is not None:
+            self.replacement[1].terminate()
+            self.retiring.append(self.replacement[1])
+        for process in self.retiring:
+            process.terminate()
+
+    def join_all(self):
+        super().join_all()
+        for process in self.retiring:
+            process.join()
+
+
+def _prepare_metrics_dir() -> str:
+    """Shared directory for worker metrics, emptied of a previous run's files."""
+    directory = os.getenv("METRICS_MULTIPROC_DIR") or tempfile.mkdtemp(prefix="bff-metrics-")
+    os.makedirs(directory, exist_ok=True)
+    for path in glob.glob(os.path.join(directory, "*.json")):
+        os.remove(path)
+    return directory
+
+
+def _prepare_cache_path() -> str:
+    """File for the workers' shared user cache; a previous run's file is discarded."""
+    path = os.getenv("USER_CACHE_PATH") or os.path.join(tempfile.mkdtemp(prefix="bff-cache-"), "users.cache")
+    if os.path.exists(path):
+        os.remove(path)
+    return path
+
+
+def main():
+    config = LauncherConfig()
+    # Inherited by the spawned workers; read when main.py is imported
+    os.environ["METRICS_MULTIPROC_DIR"] = _prepare_metrics_dir()
+    os.environ["USER_CACHE_PATH"] = _prepare_cache_path()
+
+    uvicorn_config = uvicorn.Config(
+        "main:app",
+        host=config.host,
+        port=config.port,
+        workers=config.worker_count,
+        loop="uvloop",
+        http="httptools",
+        lifespan="on",
+        limit_concurrency=config.limit_concurrency,
+        timeout_graceful_shutdown=config.graceful_timeout_seconds,
+    )
+    messages = spawn.SimpleQueue()
+    server = WorkerServer(uvicorn_config, messages, config.max_requests, config.max_requests_jitter)
+    logger.info(f"Starting {config.worker_count} BFF workers on {config.host}:{config.port}")
+    socket = uvicorn_config.bind_socket()
+    RollingSupervisor(
+        uvicorn_config,
+        target=server.run,
+        sockets=[socket],
+        messages=messages,
+        startup_timeout_seconds=config.startup_timeout_seconds
+    ).run()
+
+
+if __name__ == "__main__":
+    main()
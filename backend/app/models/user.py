@@ -1,3 +1,6 @@
+from datetime import datetime
+from enum import Enum
+from typing import List, Optional
 from pydantic import BaseModel
 import strawberry
 
@@ -10,6 +13,60 @@ class User(BaseModel):
     name: str
     email: str
     is_active: bool = True
+    updated_at: Optional[datetime] = None
+
+@strawberry.enum
+class TotalCountMode(str, Enum):
+    EXACT = "exact"
+    ESTIMATE = "estimate"
+
+@strawberry.enum
+class SearchMatchMode(str, Enum):
+    PREFIX = "prefix"
+    SUBSTRING = "substring"
+
+class UserPage(BaseModel):
+    users: List[User]
+    total_count: Optional[int] = None
+    total_is_estimate: bool = False
+
+class UserSearchPage(BaseModel):
+    users: List[User]
+    next_after_id: Optional[int] = None
+
+class UserLookup(BaseModel):
+    id: int
+    found: bool
+    user: Optional[User] = None
+
+class UserBatch(BaseModel):
+    """Multi-get result: one entry per distinct requested id, in request order"""
+    results: List[UserLookup]
+
+class ExportFormat(str, Enum):
+    NDJSON = "ndjson"
+    CSV = "csv"
+
+class ExportStatus(str, Enum):
+    PENDING = "pending"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+class UserExportCreate(BaseModel):
+    format: ExportFormat = ExportFormat.NDJSON
+
+class UserExport(BaseModel):
+    """A background export of the users table to a gzip-compressed file"""
+    id: str
+    format: ExportFormat
+    status: ExportStatus = ExportStatus.PENDING
+    rows: int = 0
+    size_bytes: Optional[int] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    error: Optional[str] = None
 
 @strawberry.type
 class UserType:
@@ -22,3 +79,14 @@ class UserType:
 class UserInput:
     name: str
     email: str
+
+@strawberry.type
+class UserConnection:
+    nodes: List[UserType]
+    total_count: Optional[int] = None
+    total_is_estimate: bool = False
+
+@strawberry.type
+class UserSearchResult:
+    users: List[UserType]
+    next_after_id: Optional[int] = None
@@ -0,0 +1,143 @@
+"""
+Event-loop health for the BFF: scheduling lag and detection of blocking calls.
+
+REST handlers and GraphQL resolvers share one asyncio loop, so any synchronous work on it
+(converting a large list of messages, a blocking library call) delays every other request.
+
+- A task sleeps for interval_seconds in a loop and records how much later than asked it
+  woke up as event_loop_lag_seconds. An idle loop shows ~0; a loop that is busy or blocked
+  shows the delay every request scheduled at that moment also saw.
+- A watchdog thread checks that the task keeps waking up. When it hasn't for more than
+  blocked_threshold_seconds, the loop is stuck in one callback: the watchdog logs that
+  thread's current stack (and the task it is running) once per stall, and the task logs
+  how long the stall lasted when the loop comes back.
+
+Both cost one timer callback per interval; the watchdog never touches the loop.
+
+offload() runs list conversions of at least offload_min_items items in a worker thread
+instead of on the loop.
+"""
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from dataclasses import dataclass
+from typing import Callable, Optional, Sequence, TypeVar
+
+from app.observability.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+loop_lag_histogram = registry.histogram(
+    "event_loop_lag_seconds", "How late the event loop ran a timer scheduled interval seconds ahead",
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+)
+loop_blocked_counter = registry.counter(
+    "event_loop_blocked_total", "Times the event loop was blocked longer than the threshold"
+)
+offloaded_counter = registry.counter(
+    "event_loop_offloaded_total", "Conversions run in a worker thread because of their size, by function"
+)
+
+
+@dataclass
+class LoopMonitorConfig:
+    # 0 disables the monitor
+    interval_seconds: float = float(os.getenv("LOOP_MONITOR_INTERVAL_SECONDS", "0.1"))
+    blocked_threshold_seconds: float = float(os.getenv("LOOP_BLOCKED_THRESHOLD_SECONDS", "0.5"))
+    # 0 keeps every conversion on the loop
+    offload_min_items: int = int(os.getenv("LOOP_OFFLOAD_MIN_ITEMS", "500"))
+
+
+class LoopMonitor:
+    """Lag sampling task plus blocked-loop watchdog thread for the running loop."""
+
+    def __init__(self, config: Optional[LoopMonitorConfig] = None):
+        self.config = config or LoopMonitorConfig()
+        self._task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread_id: Optional[int] = None
+        self._heartbeat = 0.0
+        # Heartbeat of the stall already reported, so each stall is logged once
+        self._reported: Optional[float] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.config.interval_seconds > 0
+
+    def start(self):
+        """Start monitoring the running loop; call from a coroutine on it."""
+        if not self.enabled or self._task is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._heartbeat = time.monotonic()
+        self._stopped.clear()
+        self._task = asyncio.create_task(self._sample(), name="event-loop-monitor")
+        self._watchdog = threading.Thread(target=self._watch, name="event-loop-watchdog", daemon=True)
+        self._watchdog.start()
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._stopped.set()
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        await asyncio.to_thread(self._watchdog.join)
+        self._task = None
+        self._watchdog = None
+
+    async def _sample(self):
+        interval = self.config.interval_seconds
+        while True:
+            expected = time.monotonic() + interval
+            await asyncio.sleep(interval)
+            now = time.monotonic()
+            lag = max(now - expected, 0.0)
+            loop_lag_histogram.observe(lag)
+            if self._reported == self._heartbeat:
+                logger.warning(f"Event loop was blocked for {now - self._heartbeat:.3f}s")
+            self._heartbeat = now
+
+    def _watch(self):
+        # Wait at most the interval between heartbeats plus the threshold
+        allowed = self.config.interval_seconds + self.config.blocked_threshold_seconds
+        while not self._stopped.wait(min(self.config.blocked_threshold_seconds / 2, 0.1)):
+            heartbeat = self._heartbeat
+            if time.monotonic() - heartbeat <= allowed or self._reported == heartbeat:
+                continue
+            self._reported = heartbeat
+            loop_blocked_counter.inc()
+            logger.warning(
+                f"Event loop blocked for more than {self.config.blocked_threshold_seconds:g}s"
+                f"{self._describe_running()}"
+            )
+
+    def _describe_running(self) -> str:
+        """The running task's name and the loop thread's stack, for the blocked-loop log."""
+        frame = sys._current_frames().get(self._loop_thread_id)
+        if frame is None:
+            return ""
+        task = asyncio.current_task(self._loop)
+        running = f" in task {task.get_name()}" if task is not None else ""
+        return f"{running}, at:\n{''.join(traceback.format_stack(frame))}"
+
+
+async def offload(convert: Callable[[Sequence], T], items: Sequence, min_items: Optional[int] = None) -> T:
+    """convert(items), in a worker thread when there are at least min_items items."""
+    if min_items is None:
+        min_items = loop_monitor.config.offload_min_items
+    if min_items <= 0 or len(items) < min_items:
+        return convert(items)
+    offloaded_counter.inc(function=getattr(convert, "__name__", "convert"))
+    return await asyncio.to_thread(convert, items)
+
+
+loop_monitor = LoopMonitor()
@@ -0,0 +1,202 @@
+import bisect
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+DEFAULT_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024)
+
+
+def _label_key(labels: Dict[str, object]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(key: LabelKey, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(key) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in pairs) + "}"
+
+
+class Counter:
+    """Monotonically increasing value per label set."""
+
+    type_name = "counter"
+
+    def __init__(self, name: str, description: str):
+        self.name = name
+        self.description = description
+        self._lock = threading.Lock()
+        self._values: Dict[LabelKey, float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(_label_key(labels), 0)
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {"values": [[list(map(list, k)), v] for k, v in self._values.items()]}
+
+    def render(self, snapshot: Dict) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(tuple(map(tuple, k)))} {v}"
+            for k, v in snapshot["values"]
+        ]
+
+
+class Gauge(Counter):
+    """Value that can go up and down per label set."""
+
+    type_name = "gauge"
+
+    def set(self, value: float, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram:
+    """Cumulative bucket histogram per label set, in the Prometheus layout."""
+
+    type_name = "histogram"
+
+    def __init__(self, name: str, description: str, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.description = description
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        # label key -> [bucket counts..., +Inf count, sum]
+        self._values: Dict[LabelKey, List[float]] = {}
+
+    def observe(self, value: float, **labels):
+        key = _label_key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                series = self._values[key] = [0] * (len(self.buckets) + 2)
+            series[index] += 1
+            series[-1] += value
+
+    def count(self, **labels) -> int:
+        series = self._values.get(_label_key(labels))
+        return int(sum(series[:-1])) if series else 0
+
+    def total(self, **labels) -> float:
+        series = self._values.get(_label_key(labels))
+        return series[-1] if series else 0.0
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {
+                "buckets": list(self.buckets),
+                "values": [[list(map(list, k)), list(v)] for k, v in self._values.items()],
+            }
+
+    def render(self, snapshot: Dict) -> List[str]:
+        lines = []
+        bounds = [str(b) for b in snapshot["buckets"]] + ["+Inf"]
+        for k, series in snapshot["values"]:
+            key = tuple(map(tuple, k))
+            cumulative = 0
+            for bound, count in zip(bounds, series[:-1]):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_format_labels(key, ('le', bound))} {cumulative}")
+            lines.append(f"{self.name}_count{_format_labels(key)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(key)} {series[-1]}")
+        return lines
+
+
+class MetricsRegistry:
+    """Process-wide collection of metrics, rendered in the Prometheus text format."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics: Dict[str, object] = {}
+
+    def _get_or_create(self, cls, name: str, description: str, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, description, **kwargs)
+            elif type(metric) is not cls:
+                raise ValueError(f"Metric {name} already registered as {metric.type_name}")
+            return metric
+
+    def counter(self, name: str, description: str) -> Counter:
+        return self._get_or_create(Counter, name, description)
+
+    def gauge(self, name: str, description: str) -> Gauge:
+        return self._get_or_create(Gauge, name, description)
+
+    def histogram(self, name: str, description: str, buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._get_or_create(Histogram, name, description, buckets=buckets)
+
+    def snapshot(self) -> Dict[str, Dict]:
+        """JSON-serialisable copy of every metric's current values."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return {
+            metric.name: {"type": metric.type_name, "description": metric.description, **metric.snapshot()}
+            for metric in metrics
+        }
+
+    def render_prometheus(self) -> str:
+        return render_snapshot(self.snapshot())
+
+
+_METRIC_TYPES = {cls.type_name: cls for cls in (Counter, Gauge, Histogram)}
+
+
+def render_snapshot(snapshot: Dict[str, Dict]) -> str:
+    """Prometheus text format of a MetricsRegistry.snapshot() (or a merge of several)."""
+    lines = []
+    for name, metric_snapshot in snapshot.items():
+        cls = _METRIC_TYPES[metric_snapshot["type"]]
+        kwargs = {"buckets": metric_snapshot["buckets"]} if cls is Histogram else {}
+        metric = cls(name, metric_snapshot["description"], **kwargs)
+        lines.append(f"# HELP {name} {metric.description}")
+        lines.append(f"# TYPE {name} {metric.type_name}")
+        lines.extend(metric.render(metric_snapshot))
+    return "\n".join(lines) + "\n"
+
+
+def merge_snapshots(snapshots: Sequence[Dict[str, Dict]]) -> Dict[str, Dict]:
+    """
+    Sum registry snapshots of several processes: counters and histogram buckets add up per
+    label set. Gauges can't be summed meaningfully; give them a distinguishing label (e.g.
+    pid) before merging. Histograms whose buckets differ from the first seen are skipped.
+    """
+    merged: Dict[str, Dict] = {}
+    for snapshot in snapshots:
+        for name, metric_snapshot in snapshot.items():
+            target = merged.get(name)
+            if target is None:
+                target = merged[name] = {**metric_snapshot, "values": []}
+                target["_index"] = {}
+            elif target["type"] != metric_snapshot["type"] or target.get("buckets") != metric_snapshot.get("buckets"):
+                continue
+            index = target["_index"]
+            for key, value in metric_snapshot["values"]:
+                position = index.get(str(key))
+                if position is None:
+                    index[str(key)] = len(target["values"])
+                    target["values"].append([key, list(value) if isinstance(value, list) else value])
+                elif isinstance(value, list):
+                    series = target["values"][position][1]
+                    target["values"][position][1] = [a + b for a, b in zip(series, value)]
+                else:
+                    target["values"][position][1] += value
+    for target in merged.values():
+        del target["_index"]
+    return merged
+
+
+registry = MetricsRegistry()
@@ -0,0 +1,144 @@
+"""
+Metrics of all BFF worker processes on one /metrics endpoint.
+
+With several workers every process has its own registry, and a scrape only reaches one of
+them. When METRICS_MULTIPROC_DIR is set (the launcher sets it), each worker writes its
+registry snapshot to <dir>/worker-<pid>.json every interval, and /metrics renders the merge
+of all of them:
+
+- counters and histograms are summed across workers. Those of exited workers are folded
+  into archive.json, so totals don't drop when a worker is recycled
+- gauges are per process and get a pid label; those of exited workers are dropped
+"""
+import asyncio
+import fcntl
+import glob
+import json
+import logging
+import os
+import tempfile
+from typing import Callable, Dict, List, Optional, Tuple
+
+from app.observability.metrics import merge_snapshots, registry, render_snapshot
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_FILE = "archive.json"
+_LOCK_FILE = ".lock"
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _read(path: str) -> Optional[Dict]:
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def _write(path: str, snapshot: Dict):
+    """Atomically replace path. The temp file is unique, so concurrent writers never share one."""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(snapshot, f)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def _without_gauges(snapshot: Dict) -> Dict:
+    return {name: metric for name, metric in snapshot.items() if metric["type"] != "gauge"}
+
+
+def _label_gauges(snapshot: Dict, pid: int) -> Dict:
+    labelled = {}
+    for name, metric in snapshot.items():
+        if metric["type"] == "gauge":
+            metric = {**metric, "values": [
+                [sorted(key + [["pid", str(pid)]]), value] for key, value in metric["values"]
+            ]}
+        labelled[name] = metric
+    return labelled
+
+
+class MultiprocessMetrics:
+    """Publishes this worker's metrics to a shared directory and merges everyone's."""
+
+    def __init__(self, directory: str, interval_seconds: float = 1.0, refresh: Optional[Callable[[], object]] = None):
+        self.directory = directory
+        self.interval_seconds = interval_seconds
+        self.refresh = refresh
+        self.pid = os.getpid()
+
+    @classmethod
+    def from_env(cls, refresh: Optional[Callable[[], object]] = None) -> Optional["MultiprocessMetrics"]:
+        directory = os.getenv("METRICS_MULTIPROC_DIR")
+        if not directory:
+            return None
+        return cls(directory, float(os.getenv("METRICS_MULTIPROC_INTERVAL_SECONDS", "1")), refresh)
+
+    def _path(self, pid: int) -> str:
+        return os.path.join(self.directory, f"worker-{pid}.json")
+
+    def write(self):
+        """Publish this process's current snapshot."""
+        if self.refresh is not None:
+            self.refresh()
+        _write(self._path(self.pid), registry.snapshot())
+
+    async def run(self):
+        """Publish every interval until cancelled, then once more."""
+        try:
+            while True:
+                await asyncio.to_thread(self.write)
+                await asyncio.sleep(self.interval_seconds)
+        finally:
+            await asyncio.to_thread(self.write)
+
+    def collect(self) -> Dict:
+        """Merged snapshot of all workers, including what exited workers counted.
+
+        Blocking file I/O: call it from a worker thread, not the event loop. It may run
+        while run() is publishing, which is why write() never reuses a temp file.
+        """
+        self.write()
+        with open(os.path.join(self.directory, _LOCK_FILE), "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                archive_path = os.path.join(self.directory, ARCHIVE_FILE)
+                archive = _read(archive_path) or {}
+                exited: List[Tuple[str, Dict]] = []
+                live: List[Dict] = []
+                for path in glob.glob(os.path.join(self.directory, "worker-*.json")):
+                    pid = int(os.path.basename(path)[len("worker-"):-len(".json")])
+                    snapshot = _read(path)
+                    if snapshot is None:
+                        continue
+                    if pid == self.pid or _pid_alive(pid):
+                        live.append(_label_gauges(snapshot, pid))
+                    else:
+                        exited.append((path, _without_gauges(snapshot)))
+                if exited:
+                    archive = merge_snapshots([archive] + [snapshot for _, snapshot in exited])
+                    _write(archive_path, archive)
+                    for path, _ in exited:
+                        os.remove(path)
+                    logger.info(f"Archived metrics of {len(exited)} exited workers")
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+        return merge_snapshots([archive] + live)
+
+    def render_prometheus(self) -> str:
+        """Prometheus text of collect(); blocking like it."""
+        return render_snapshot(self.collect())
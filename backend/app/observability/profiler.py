@@ -0,0 +1,183 @@
+"""
+On-demand sampling profiler, shared by the BFF and the gRPC servers' admin endpoints.
+
+The calling thread (a worker thread, never the event loop) snapshots the Python stack of
+every other thread (sys._current_frames) every interval for the requested number of
+seconds. The asyncio event loop is sampled like any other thread, so coroutine frames
+running on it show up under the loop's _run_once. Samples are returned as collapsed
+stacks ("thread;outer;...;inner count" per line), which flamegraph.pl, speedscope and
+inferno read directly.
+
+Only one profile runs at a time per process. Sampling costs roughly one frame walk per
+thread per interval and nothing when no profile is running.
+
+With allocations=N, tracemalloc runs for the same window (unless it is already tracing)
+and the N source lines whose allocated memory grew most are returned alongside. That
+slows allocations noticeably while it runs.
+"""
+import hmac
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from app.observability.metrics import registry
+
+profiles_counter = registry.counter("profiler_runs_total", "Sampling profiles taken, by outcome")
+
+# Leaf frames of threads blocked waiting for work rather than using CPU
+_IDLE_LEAVES = frozenset({
+    ("selectors.py", "select"),
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("queue.py", "get"),
+    ("thread.py", "_worker"),
+    ("socketserver.py", "serve_forever"),
+    ("_server.py", "_serve"),
+})
+
+
+@dataclass
+class ProfilerConfig:
+    """Admin endpoints require Authorization: Bearer <ADMIN_TOKEN>; without a token they are disabled."""
+    admin_token: str = os.getenv("ADMIN_TOKEN", "")
+    max_seconds: float = float(os.getenv("PROFILER_MAX_SECONDS", "60"))
+    min_interval_seconds: float = 0.001
+
+
+class ProfilerBusy(Exception):
+    """Another profile is already running in this process."""
+
+
+@dataclass
+class Profile:
+    seconds: float
+    interval_seconds: float
+    samples: int = 0
+    stacks: Counter = field(default_factory=Counter)
+    allocations: Optional[List[Dict]] = None
+
+    def collapsed(self) -> str:
+        """Stacks in collapsed ("folded") format, most frequent first."""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def to_dict(self) -> Dict:
+        return {
+            "seconds": self.seconds,
+            "interval_seconds": self.interval_seconds,
+            "samples": self.samples,
+            "collapsed": self.collapsed(),
+            "allocations": self.allocations,
+        }
+
+
+def admin_token_matches(authorization: Optional[str], config: ProfilerConfig) -> bool:
+    """Whether an Authorization header carries the configured admin token."""
+    if not config.admin_token or not authorization:
+        return False
+    scheme, _, token = authorization.partition(" ")
+    return scheme.lower() == "bearer" and hmac.compare_digest(token.strip(), config.admin_token)
+
+
+def profile_options(
+    seconds: float,
+    interval_ms: float,
+    allocations: int,
+    idle: bool,
+    config: ProfilerConfig
+) -> Dict:
+    """Validated keyword arguments for SamplingProfiler.profile; raises ValueError."""
+    if not 0 < seconds <= config.max_seconds:
+        raise ValueError(f"seconds must be in (0, {config.max_seconds:g}]")
+    if interval_ms / 1000 < config.min_interval_seconds:
+        raise ValueError(f"interval_ms must be at least {config.min_interval_seconds * 1000:g}")
+    if not 0 <= allocations <= 1000:
+        raise ValueError("allocations must be in [0, 1000]")
+    return {
+        "seconds": seconds,
+        "interval_seconds": interval_ms / 1000,
+        "allocations": allocations,
+        "include_idle": idle,
+    }
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})"
+
+
+def _is_idle(frame) -> bool:
+    return (os.path.basename(frame.f_code.co_filename), frame.f_code.co_name) in _IDLE_LEAVES
+
+
+class SamplingProfiler:
+    """Samples every thread's stack at a fixed interval; one profile at a time."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+
+    def profile(
+        self,
+        seconds: float,
+        interval_seconds: float = 0.01,
+        allocations: int = 0,
+        include_idle: bool = False
+    ) -> Profile:
+        """Profile the whole process for seconds; blocks the calling thread meanwhile."""
+        if not self._lock.acquire(blocking=False):
+            profiles_counter.inc(outcome="busy")
+            raise ProfilerBusy("A profile is already running")
+        try:
+            result = Profile(seconds=seconds, interval_seconds=interval_seconds)
+            started_tracing = allocations > 0 and not tracemalloc.is_tracing()
+            if started_tracing:
+                tracemalloc.start()
+            before = tracemalloc.take_snapshot() if allocations > 0 else None
+
+            self._sample(result, seconds, interval_seconds, include_idle)
+
+            if before is not None:
+                after = tracemalloc.take_snapshot()
+                if started_tracing:
+                    tracemalloc.stop()
+                result.allocations = [
+                    {
+                        "location": f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+                        "size_diff_bytes": stat.size_diff,
+                        "size_bytes": stat.size,
+                        "count_diff": stat.count_diff,
+                    }
+                    for stat in after.compare_to(before, "lineno")[:allocations]
+                ]
+            profiles_counter.inc(outcome="completed")
+            return result
+        finally:
+            self._lock.release()
+
+    def _sample(self, result: Profile, seconds: float, interval_seconds: float, include_idle: bool):
+        own_id = threading.get_ident()
+        deadline = time.monotonic() + seconds
+        next_sample = time.monotonic()
+        while next_sample < deadline:
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id or (not include_idle and _is_idle(frame)):
+                    continue
+                labels = []
+                while frame is not None:
+                    labels.append(_frame_label(frame))
+                    frame = frame.f_back
+                labels.append(names.get(thread_id, f"thread-{thread_id}").replace(" ", "_"))
+                result.stacks[";".join(reversed(labels))] += 1
+            result.samples += 1
+            next_sample += interval_seconds
+            # Sampling late beats sampling in a burst to catch up
+            time.sleep(max(next_sample - time.monotonic(), 0))
+            next_sample = max(next_sample, time.monotonic())
+
+
+profiler = SamplingProfiler()
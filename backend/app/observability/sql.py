@@ -0,0 +1,183 @@
+"""
+Per-RPC SQL profiling and slow-query logging built on SQLAlchemy cursor events.
+
+An RPC (or any other unit of work) opens a profile_queries() scope; every statement executed
+in that context adds its count, database time and driver rowcount to the scope's QueryStats.
+Statements slower than the configured threshold are logged with their normalised SQL and,
+for a sample of them, the database's query plan.
+"""
+import logging
+import random
+import re
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.observability.metrics import registry, SIZE_BUCKETS
+
+logger = logging.getLogger(__name__)
+
+rpc_sql_statements_histogram = registry.histogram(
+    "rpc_sql_statements", "SQL statements executed per RPC", buckets=SIZE_BUCKETS
+)
+rpc_sql_duration_histogram = registry.histogram(
+    "rpc_sql_duration_seconds", "Total database time per RPC"
+)
+rpc_sql_rows_histogram = registry.histogram(
+    "rpc_sql_rows", "Rows reported by the driver per RPC", buckets=SIZE_BUCKETS
+)
+slow_queries_counter = registry.counter(
+    "sql_slow_queries_total", "Statements slower than the slow-query threshold"
+)
+
+_IN_LIST = re.compile(r"\bIN\s*\((?:%\(\w+\)s|'[^']*'|[^()'])*\)", re.IGNORECASE)
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?\b")
+_WHITESPACE = re.compile(r"\s+")
+
+_EXPLAIN_PREFIXES = {
+    "postgresql": "EXPLAIN ",
+    "sqlite": "EXPLAIN QUERY PLAN ",
+}
+
+
+def normalize_sql(statement: str) -> str:
+    """
+    Reduce a statement to its shape so equivalent queries group together in logs.
+
+    Collapses whitespace, replaces literals with ? and IN lists of any length with IN (...).
+    """
+    statement = _IN_LIST.sub("IN (...)", statement)
+    statement = _STRING_LITERAL.sub("?", statement)
+    statement = _NUMBER_LITERAL.sub("?", statement)
+    return _WHITESPACE.sub(" ", statement).strip()
+
+
+@dataclass
+class QueryStats:
+    """SQL work attributed to one RPC."""
+
+    method: str
+    statements: int = 0
+    db_seconds: float = 0.0
+    rows: int = 0
+
+    def __str__(self) -> str:
+        return f"sql: {self.statements} statements, {self.db_seconds * 1000:.2f} ms, {self.rows} rows"
+
+
+_current_stats: ContextVar = ContextVar("current_query_stats", default=None)
+
+
+def current_query_stats() -> Optional[QueryStats]:
+    """Stats of the profile_queries() scope active in this context, if any."""
+    return _current_stats.get()
+
+
+@contextmanager
+def profile_queries(method: str):
+    """Attribute statements run in this context to `method` and record them as metrics on exit."""
+    stats = QueryStats(method)
+    token = _current_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_stats.reset(token)
+        rpc_sql_statements_histogram.observe(stats.statements, method=method)
+        rpc_sql_duration_histogram.observe(stats.db_seconds, method=method)
+        rpc_sql_rows_histogram.observe(stats.rows, method=method)
+
+
+class SqlProfiler:
+    """
+    Cursor event listeners feeding QueryStats and the slow-query log.
+
+    Args:
+        slow_query_seconds: Log statements taking at least this long; 0 disables the log
+        explain_sample_rate: Fraction of slow SELECTs whose plan is fetched and logged
+    """
+
+    def __init__(self, slow_query_seconds: float = 0.0, explain_sample_rate: float = 0.0):
+        self.slow_query_seconds = slow_query_seconds
+        self.explain_sample_rate = explain_sample_rate
+
+    def install(self, engine: Engine):
+        event.listen(engine, "before_cursor_execute", self._before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", self._after_cursor_execute)
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        context._profile_started = time.perf_counter()
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        started = getattr(context, "_profile_started", None)
+        if started is None:
+            return
+        elapsed = time.perf_counter() - started
+
+        stats = _current_stats.get()
+        if stats is not None:
+            stats.statements += 1
+            stats.db_seconds += elapsed
+            if cursor.rowcount is not None and cursor.rowcount > 0:
+                stats.rows += cursor.rowcount
+
+        if self.slow_query_seconds > 0 and elapsed >= self.slow_query_seconds:
+            self._log_slow_query(conn, cursor, statement, parameters, executemany, elapsed, stats)
+
+    def _log_slow_query(self, conn, cursor, statement, parameters, executemany, elapsed, stats):
+        slow_queries_counter.inc(method=stats.method if stats else "")
+        message = (
+            f"Slow query: {elapsed * 1000:.1f} ms"
+            f" | rpc: {stats.method if stats else '-'}"
+            f" | sql: {normalize_sql(statement)}"
+        )
+        if (
+            not executemany
+            and self.explain_sample_rate > 0
+            and statement.lstrip()[:6].upper() == "SELECT"
+            and random.random() < self.explain_sample_rate
+        ):
+            plan = self._explain(conn, cursor, statement, parameters)
+            if plan:
+                message += f"\n{plan}"
+        logger.warning(message)
+
+    @staticmethod
+    def _explain(conn, cursor, statement, parameters) -> Optional[str]:
+        """
+        Plan of a statement that just ran, fetched on the same DBAPI connection.
+
+        A separate raw cursor is used so the EXPLAIN neither triggers these listeners again
+        nor disturbs the pending results of the profiled statement.
+        """
+        prefix = _EXPLAIN_PREFIXES.get(conn.dialect.name)
+        if prefix is None:
+            return None
+        # On PostgreSQL a failing statement aborts the transaction, so isolate the EXPLAIN
+        use_savepoint = conn.dialect.name == "postgresql"
+        explain_cursor = cursor.connection.cursor()
+        try:
+            if use_savepoint:
+                explain_cursor.execute("SAVEPOINT sql_profiler_explain")
+            explain_cursor.execute(prefix + statement, parameters)
+            plan = "\n".join(
+                "    " + " ".join(str(value) for value in row) for row in explain_cursor.fetchall()
+            )
+            if use_savepoint:
+                explain_cursor.execute("RELEASE SAVEPOINT sql_profiler_explain")
+            return plan
+        except Exception as e:
+            logger.debug(f"EXPLAIN failed for slow query: {e}")
+            if use_savepoint:
+                try:
+                    explain_cursor.execute("ROLLBACK TO SAVEPOINT sql_profiler_explain")
+                except Exception:
+                    pass
+            return None
+        finally:
+            explain_cursor.close()
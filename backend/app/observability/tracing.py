@@ -0,0 +1,408 @@
+"""
+Lightweight distributed tracing shared by the BFF and the gRPC services.
+
+Trace context follows the W3C traceparent format, travels in the `traceparent` HTTP header
+and gRPC metadata key, and is held in a contextvar so nested spans (GraphQL execution,
+gRPC calls, SQL statements) attach to the request that caused them. Sampling is decided
+once at the root (head-based) and propagated in the traceparent flags; an unsampled request
+only carries ids around and never builds or exports span objects. The BFF is the public
+edge: it keeps the trace id of an inbound traceparent but makes its own sampling decision,
+so clients can neither force tracing on nor turn it off.
+"""
+import json
+import logging
+import os
+import random
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Deque, Dict, Iterable, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_SERVER = 2
+SPAN_KIND_CLIENT = 3
+
+STATUS_UNSET = 0
+STATUS_OK = 1
+STATUS_ERROR = 2
+
+TRACEPARENT = "traceparent"
+
+
+@dataclass(frozen=True)
+class SpanContext:
+    trace_id: str
+    span_id: str
+    sampled: bool
+
+    def to_traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-{'01' if self.sampled else '00'}"
+
+    @classmethod
+    def from_traceparent(cls, value: Optional[str]) -> Optional["SpanContext"]:
+        if not value:
+            return None
+        parts = value.strip().split("-")
+        if len(parts) < 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+            return None
+        try:
+            flags = int(parts[3][:2], 16)
+        except ValueError:
+            return None
+        return cls(parts[1], parts[2], bool(flags & 1))
+
+
+def _new_trace_id() -> str:
+    return f"{random.getrandbits(128):032x}"
+
+
+def _new_span_id() -> str:
+    return f"{random.getrandbits(64):016x}"
+
+
+@dataclass
+class Span:
+    name: str
+    context: SpanContext
+    parent_span_id: Optional[str]
+    kind: int = SPAN_KIND_INTERNAL
+    start_ns: int = 0
+    end_ns: int = 0
+    attributes: Dict[str, object] = field(default_factory=dict)
+    status: int = STATUS_UNSET
+    status_message: str = ""
+
+    @property
+    def is_recording(self) -> bool:
+        return True
+
+    def set_attribute(self, key: str, value: object):
+        self.attributes[key] = value
+
+    def set_status(self, status: int, message: str = ""):
+        self.status = status
+        self.status_message = message
+
+    def end(self, end_ns: Optional[int] = None):
+        if not self.end_ns:
+            self.end_ns = end_ns or time.time_ns()
+            tracer.exporter.export([self])
+
+    @property
+    def duration_ms(self) -> float:
+        return (self.end_ns - self.start_ns) / 1e6
+
+
+class NonRecordingSpan:
+    """Carries trace context for unsampled requests; every recording call is a no-op."""
+
+    __slots__ = ("context",)
+    is_recording = False
+
+    def __init__(self, context: SpanContext):
+        self.context = context
+
+    def set_attribute(self, key: str, value: object):
+        pass
+
+    def set_status(self, status: int, message: str = ""):
+        pass
+
+    def end(self, end_ns: Optional[int] = None):
+        pass
+
+
+_current_span: ContextVar = ContextVar("current_span", default=None)
+
+
+def current_span():
+    """The active span (recording or not) in this context, if any."""
+    return _current_span.get()
+
+
+class SpanExporter:
+    """Receives finished spans. Implementations must be thread-safe."""
+
+    def export(self, spans: Sequence[Span]):
+        raise NotImplementedError
+
+    def shutdown(self):
+        pass
+
+
+class NoopSpanExporter(SpanExporter):
+    def export(self, spans: Sequence[Span]):
+        pass
+
+
+class InMemorySpanExporter(SpanExporter):
+    """Keeps the most recent finished spans in memory, e.g. for tests or debug endpoints."""
+
+    def __init__(self, max_spans: int = 10000):
+        self._lock = threading.Lock()
+        self._spans: Deque[Span] = deque(maxlen=max_spans)
+
+    def export(self, spans: Sequence[Span]):
+        with self._lock:
+            self._spans.extend(spans)
+
+    def get_finished_spans(self) -> List[Span]:
+        with self._lock:
+            return list(self._spans)
+
+    def clear(self):
+        with self._lock:
+            self._spans.clear()
+
+
+def _otlp_value(value: object) -> Dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def to_otlp_json(spans: Iterable[Span], service_name: str) -> Dict:
+    """Encode spans as an OTLP/JSON ExportTraceServiceRequest."""
+    return {
+        "resourceSpans": [{
+            "resource": {
+                "attributes": [{"key": "service.name", "value": {"stringValue": service_name}}]
+            },
+            "scopeSpans": [{
+                "scope": {"name": __name__},
+                "spans": [
+                    {
+                        "traceId": span.context.trace_id,
+                        "spanId": span.context.span_id,
+                        "parentSpanId": span.parent_span_id or "",
+                        "name": span.name,
+                        "kind": span.kind,
+                        "startTimeUnixNano": str(span.start_ns),
+                        "endTimeUnixNano": str(span.end_ns),
+                        "attributes": [
+                            {"key": k, "value": _otlp_value(v)} for k, v in span.attributes.items()
+                        ],
+                        "status": {"code": span.status, "message": span.status_message},
+                    }
+                    for span in spans
+                ],
+            }],
+        }]
+    }
+
+
+class FileSpanExporter(SpanExporter):
+    """
+    Appends spans to a file, one OTLP/JSON ExportTraceServiceRequest per line.
+
+    The lines can be replayed into any OTLP/HTTP collector later, so no collector needs to
+    run alongside the services. Spans are buffered and written every flush_every spans.
+    """
+
+    def __init__(self, path: str, service_name: str, flush_every: int = 64):
+        self.path = path
+        self.service_name = service_name
+        self.flush_every = flush_every
+        self._lock = threading.Lock()
+        self._buffer: List[Span] = []
+
+    def export(self, spans: Sequence[Span]):
+        with self._lock:
+            self._buffer.extend(spans)
+            if len(self._buffer) >= self.flush_every:
+                self._flush_locked()
+
+    def flush(self):
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        if not self._buffer:
+            return
+        line = json.dumps(to_otlp_json(self._buffer, self.service_name), separators=(",", ":"))
+        self._buffer = []
+        try:
+            with open(self.path, "a") as f:
+                f.write(line + "\n")
+        except OSError as e:
+            logger.warning(f"Failed to write spans to {self.path}: {e}")
+
+    def shutdown(self):
+        self.flush()
+
+
+@dataclass
+class TracingConfig:
+    sample_rate: float = float(os.getenv("TRACING_SAMPLE_RATE", "0"))
+    exporter: str = os.getenv("TRACING_EXPORTER", "file")
+    file_path: str = os.getenv("TRACING_FILE_PATH", "traces.jsonl")
+
+
+class Tracer:
+    """Creates spans, makes sampling decisions and propagates context."""
+
+    def __init__(self):
+        self.service_name = "unknown"
+        self.sample_rate = 0.0
+        self.exporter: SpanExporter = NoopSpanExporter()
+
+    @property
+    def enabled(self) -> bool:
+        """False when nothing can ever be sampled, so callers can skip tracing entirely."""
+        return self.sample_rate > 0
+
+    def configure(self, service_name: str, sample_rate: float, exporter: SpanExporter):
+        self.exporter.shutdown()
+        self.service_name = service_name
+        self.sample_rate = sample_rate
+        self.exporter = exporter
+
+    def start_span(
+        self,
+        name: str,
+        kind: int = SPAN_KIND_INTERNAL,
+        parent: Optional[SpanContext] = None,
+        attributes: Optional[Dict[str, object]] = None,
+        start_ns: Optional[int] = None,
+        trace_id: Optional[str] = None
+    ):
+        """
+        Start a span under `parent`, or under the current span when no parent is given.
+
+        Root spans are sampled with probability sample_rate; children inherit the decision.
+        trace_id starts a root span in an existing trace (ids from an untrusted caller).
+        """
+        if parent is None and trace_id is None:
+            active = _current_span.get()
+            parent = active.context if active is not None else None
+
+        if parent is None:
+            sampled = self.sample_rate > 0 and random.random() < self.sample_rate
+            trace_id, parent_span_id = trace_id or _new_trace_id(), None
+        else:
+            sampled = parent.sampled
+            trace_id, parent_span_id = parent.trace_id, parent.span_id
+
+        context = SpanContext(trace_id, _new_span_id(), sampled)
+        if not sampled:
+            return NonRecordingSpan(context)
+        return Span(
+            name=name,
+            context=context,
+            parent_span_id=parent_span_id,
+            kind=kind,
+            start_ns=start_ns or time.time_ns(),
+            attributes=dict(attributes) if attributes else {},
+        )
+
+    @contextmanager
+    def use_span(self, span, end_on_exit: bool = True):
+        """Make span current for the block; errors mark it failed."""
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.set_status(STATUS_ERROR, f"{type(e).__name__}: {e}")
+            raise
+        finally:
+            _current_span.reset(token)
+            if end_on_exit:
+                span.end()
+
+    @contextmanager
+    def start_as_current_span(self, name: str, kind: int = SPAN_KIND_INTERNAL, **kwargs):
+        with self.use_span(self.start_span(name, kind, **kwargs)) as span:
+            yield span
+
+    def inject(self, span=None) -> Optional[List[tuple]]:
+        """gRPC metadata carrying the given (or current) span's context."""
+        span = span or _current_span.get()
+        if span is None:
+            return None
+        return [(TRACEPARENT, span.context.to_traceparent())]
+
+    @staticmethod
+    def extract(metadata: Optional[Iterable]) -> Optional[SpanContext]:
+        """Parent context from gRPC invocation metadata or ASGI headers."""
+        for key, value in metadata or ():
+            if isinstance(key, bytes):
+                key, value = key.decode("latin-1"), value.decode("latin-1")
+            if key.lower() == TRACEPARENT:
+                return SpanContext.from_traceparent(value)
+        return None
+
+
+tracer = Tracer()
+
+
+def configure_tracing(
+    service_name: str,
+    config: Optional[TracingConfig] = None,
+    exporter: Optional[SpanExporter] = None
+) -> Tracer:
+    """Configure the process-wide tracer from TRACING_* settings or an explicit exporter."""
+    config = config or TracingConfig()
+    if exporter is None:
+        if config.exporter == "file":
+            exporter = FileSpanExporter(config.file_path, service_name)
+        elif config.exporter == "memory":
+            exporter = InMemorySpanExporter()
+        else:
+            exporter = NoopSpanExporter()
+    tracer.configure(service_name, config.sample_rate, exporter)
+    if tracer.enabled:
+        logger.info(
+            f"Tracing enabled for {service_name}: sample_rate={config.sample_rate} "
+            f"exporter={type(exporter).__name__}"
+        )
+    return tracer
+
+
+class TracingMiddleware:
+    """ASGI middleware that opens a server span per HTTP request."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not tracer.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        # Public callers choose neither the sampling decision nor the parent; only the trace id is kept
+        inbound = tracer.extract(scope.get("headers"))
+        span = tracer.start_span(
+            f"{scope['method']} {scope['path']}",
+            kind=SPAN_KIND_SERVER,
+            trace_id=inbound.trace_id if inbound is not None else None,
+        )
+        status_code = 0
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append((TRACEPARENT.encode(), span.context.to_traceparent().encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        with tracer.use_span(span):
+            await self.app(scope, receive, send_wrapper)
+            if span.is_recording:
+                route = scope.get("route")
+                if route is not None and hasattr(route, "path"):
+                    span.name = f"{scope['method']} {route.path}"
+                span.set_attribute("http.method", scope["method"])
+                span.set_attribute("http.target", scope["path"])
+                span.set_attribute("http.status_code", status_code)
+                span.set_status(STATUS_ERROR if status_code >= 500 else STATUS_OK)
@@ -0,0 +1,42 @@
+import asyncio
+from typing import Optional
+from fastapi import APIRouter, Header, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+from app.observability.profiler import (
+    admin_token_matches, profile_options, profiler, ProfilerBusy, ProfilerConfig
+)
+
+router = APIRouter()
+config = ProfilerConfig()
+
+
+@router.get("/profile", include_in_schema=False)
+async def profile(
+    seconds: float = 10,
+    interval_ms: float = 10,
+    allocations: int = Query(0, description="Also return the top N lines by allocated memory growth"),
+    idle: bool = Query(False, description="Keep samples of threads waiting for work"),
+    format: str = Query("json", pattern="^(json|collapsed)$"),
+    authorization: Optional[str] = Header(None)
+):
+    """
+    Sample every thread (the event loop included) for `seconds` and return collapsed stacks.
+
+    Requires Authorization: Bearer <ADMIN_TOKEN>; disabled (404) when no token is set.
+    """
+    if not config.admin_token:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not admin_token_matches(authorization, config):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+    try:
+        options = profile_options(seconds, interval_ms, allocations, idle, config)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    try:
+        # Sample from a worker thread so the event loop keeps serving (and being sampled)
+        result = await asyncio.to_thread(profiler.profile, **options)
+    except ProfilerBusy as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    if format == "collapsed":
+        return PlainTextResponse(result.collapsed())
+    return result.to_dict()
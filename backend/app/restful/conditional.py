@@ -0,0 +1,99 @@
+"""
+Conditional GET support (ETag / Last-Modified, RFC 9110 section 13) for user resources.
+
+A single user's strong ETag is built from its id and version (updated_at in microseconds),
+so the BFF can hand the version back to the user service and skip the payload entirely when
+it is unchanged. Lists get an ETag hashed from the fields of every user on the page, since
+a newest-timestamp check would miss deleted or reordered rows.
+
+CompressionMiddleware sends these ETags weak (W/"...") to clients that accept compression,
+on 200s and 304s alike. If-None-Match is evaluated with the weak comparison, so either form
+a client holds matches.
+"""
+import hashlib
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Dict, Iterable, Optional
+
+from fastapi import Response
+
+from app.models.user import User
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def _micros(value: datetime) -> int:
+    return (value - _EPOCH) // timedelta(microseconds=1)
+
+
+def user_etag(user_id: int, updated_at: datetime) -> str:
+    return f'"u{user_id}.{_micros(updated_at)}"'
+
+
+def user_validators(user_id: int, updated_at: Optional[datetime]) -> Dict[str, str]:
+    """ETag and Last-Modified headers for one user; none when its version is unknown."""
+    if updated_at is None:
+        return {}
+    return {
+        "ETag": user_etag(user_id, updated_at),
+        "Last-Modified": format_datetime(updated_at.astimezone(timezone.utc), usegmt=True),
+    }
+
+
+def list_etag(users: Iterable[User], *extra: object) -> str:
+    """Strong ETag for a page of users plus anything else sent alongside it (e.g. totals)."""
+    digest = hashlib.sha256()
+    for user in users:
+        version = _micros(user.updated_at) if user.updated_at else 0
+        digest.update(f"{user.id}\x1f{user.name}\x1f{user.email}\x1f{user.is_active}\x1f{version}\x1e".encode())
+    for value in extra:
+        digest.update(f"{value}\x1e".encode())
+    return f'"l{digest.hexdigest()[:32]}"'
+
+
+def _etags(if_none_match: str):
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        # If-None-Match uses the weak comparison: W/ prefixes are ignored
+        yield tag[2:] if tag.startswith("W/") else tag
+
+
+def known_user_version(if_none_match: Optional[str], user_id: int) -> Optional[datetime]:
+    """The version of user_id named by an If-None-Match ETag, if the client sent one."""
+    if not if_none_match:
+        return None
+    prefix = f'"u{user_id}.'
+    for tag in _etags(if_none_match):
+        if tag.startswith(prefix) and tag.endswith('"'):
+            try:
+                return _EPOCH + timedelta(microseconds=int(tag[len(prefix):-1]))
+            except ValueError:
+                return None
+    return None
+
+
+def is_not_modified(headers, etag: Optional[str], updated_at: Optional[datetime] = None) -> bool:
+    """
+    Evaluate If-None-Match, or If-Modified-Since when no If-None-Match was sent.
+
+    Last-Modified only has one-second resolution, so clients should prefer ETags.
+    """
+    if_none_match = headers.get("if-none-match")
+    if if_none_match is not None:
+        return etag is not None and any(tag in ("*", etag) for tag in _etags(if_none_match))
+
+    if_modified_since = headers.get("if-modified-since")
+    if if_modified_since and updated_at is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        return updated_at.replace(microsecond=0) <= since
+    return False
+
+
+def not_modified(headers: Dict[str, str]) -> Response:
+    """304 response carrying the validators the 200 would have had, and no body."""
+    return Response(status_code=304, headers=headers)
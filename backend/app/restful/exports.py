@@ -0,0 +1,44 @@
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Response
+from fastapi.responses import FileResponse
+from app.exports import export_manager
+from app.grpc.clients.grpc_client import get_user_service_client_dependency
+from app.grpc.clients.user_service_client import UserServiceClient
+from app.models.user import ExportStatus, UserExport, UserExportCreate
+
+router = APIRouter()
+
+
+def _get_job(export_id: str) -> UserExport:
+    job = export_manager.get(export_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Export not found")
+    return job
+
+@router.post("", status_code=202)
+async def start_export(
+    response: Response,
+    export: Optional[UserExportCreate] = None,
+    client: UserServiceClient = Depends(get_user_service_client_dependency)
+) -> UserExport:
+    """Start a background export of all users. Poll the Location for its status."""
+    job = await export_manager.start(client, (export or UserExportCreate()).format)
+    response.headers["Location"] = f"/api/users/exports/{job.id}"
+    return job
+
+@router.get("/{export_id}")
+async def get_export(export_id: str) -> UserExport:
+    """Status of an export; once completed it can be downloaded from .../download"""
+    return _get_job(export_id)
+
+@router.get("/{export_id}/download")
+async def download_export(export_id: str):
+    """The export as a gzip-compressed file. Supports Range requests for resuming."""
+    job = _get_job(export_id)
+    if job.status != ExportStatus.COMPLETED:
+        raise HTTPException(status_code=409, detail=f"Export is {job.status.value}")
+    return FileResponse(
+        export_manager.file_path(job),
+        media_type="application/gzip",
+        filename=export_manager.file_name(job)
+    )
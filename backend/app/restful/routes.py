@@ -1,10 +1,21 @@
 from fastapi import APIRouter
 
+from app.grpc.clients.base_client import BaseGrpcClient
+from .admin import router as admin_router
+from .exports import router as export_router
 from .user import router as user_router
 
 router = APIRouter()
+# Before the user routes, so /users/{user_id} doesn't capture "exports"
+router.include_router(export_router, prefix="/users/exports")
 router.include_router(user_router, prefix="/users")
+router.include_router(admin_router, prefix="/admin")
 
 @router.get("/health")
 async def health_check():
     return {"status": "healthy"}
+
+@router.get("/grpc/latency")
+async def grpc_latency():
+    """Learned default deadlines and recent latency quantiles per gRPC method"""
+    return BaseGrpcClient.latency_report()
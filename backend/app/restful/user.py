@@ -1,28 +1,130 @@
-from fastapi import APIRouter, Depends, HTTPException
+from typing import List, Optional, Union
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response
 from app.grpc.clients.grpc_client import get_user_service_client_dependency
-from app.models.user import User, UserCreate
+from app.models.user import (
+    User, UserBatch, UserCreate, UserLookup, UserSearchPage, TotalCountMode, SearchMatchMode
+)
 from app.grpc.clients.user_service_client import UserServiceClient
+from app.restful import conditional
 import grpc
 
 router = APIRouter()
 
+# Bounds the multi-get response; matches the user service's BatchGetUsers limit
+MAX_BATCH_IDS = 100
+# Matches the user service's SearchUsers page size limit
+MAX_SEARCH_LIMIT = 100
+
+
+def _parse_ids(values: List[str]) -> List[int]:
+    """Distinct ids, in order, from ids=1,2,3 and/or repeated ids= parameters."""
+    try:
+        user_ids = [int(part) for value in values for part in value.split(",") if part.strip()]
+    except ValueError:
+        raise HTTPException(status_code=422, detail="ids must be a comma-separated list of integers")
+    if any(not -2**31 <= user_id < 2**31 for user_id in user_ids):
+        raise HTTPException(status_code=422, detail="ids must be 32-bit integers")
+    user_ids = list(dict.fromkeys(user_ids))
+    if len(user_ids) > MAX_BATCH_IDS:
+        raise HTTPException(status_code=422, detail=f"At most {MAX_BATCH_IDS} ids can be requested at once")
+    return user_ids
+
+@router.get("/search")
+async def search_users(
+    q: str = "",
+    match: SearchMatchMode = SearchMatchMode.PREFIX,
+    is_active: Optional[bool] = None,
+    limit: int = Query(20, ge=1, le=MAX_SEARCH_LIMIT),
+    after_id: int = 0,
+    client: UserServiceClient = Depends(get_user_service_client_dependency)
+) -> UserSearchPage:
+    """Search users by name/email. Pass next_after_id as after_id to get the next page."""
+    try:
+        return await client.search_users(q, match=match, is_active=is_active, limit=limit, after_id=after_id)
+    except grpc.RpcError as e:
+        raise HTTPException(status_code=500, detail=f"gRPC error: {e.code().name} - {e.details()}")
+
 @router.get("/{user_id}")
-async def get_user(user_id: int, client: UserServiceClient = Depends(get_user_service_client_dependency)) -> User:
+async def get_user(
+    user_id: int,
+    request: Request,
+    response: Response,
+    client: UserServiceClient = Depends(get_user_service_client_dependency)
+) -> User:
+    """Get a user. Answers If-None-Match / If-Modified-Since with 304 Not Modified."""
     try:
-        return await client.get_user(user_id)
+        known_version = conditional.known_user_version(request.headers.get("if-none-match"), user_id)
+        if known_version is not None:
+            # Let the user service confirm the version instead of shipping the user back
+            user = await client.get_user_if_modified(user_id, known_version)
+            if user is None:
+                return conditional.not_modified(conditional.user_validators(user_id, known_version))
+        else:
+            user = await client.get_user(user_id)
     except grpc.RpcError as e:
         raise HTTPException(status_code=500, detail=f"gRPC error: {e.code().name} - {e.details()}")
 
+    validators = conditional.user_validators(user.id, user.updated_at)
+    if conditional.is_not_modified(request.headers, validators.get("ETag"), user.updated_at):
+        return conditional.not_modified(validators)
+    response.headers.update(validators)
+    return user
+
 @router.post("")
-async def create_user(user: UserCreate, client: UserServiceClient = Depends(get_user_service_client_dependency)) -> User:
+async def create_user(
+    user: UserCreate,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
+    client: UserServiceClient = Depends(get_user_service_client_dependency)
+) -> User:
+    """Create a user. Retries sending the same Idempotency-Key get the original response."""
     try:
-        return await client.create_user(user)
+        return await client.create_user(user, idempotency_key=idempotency_key)
     except grpc.RpcError as e:
         raise HTTPException(status_code=500, detail=f"gRPC error: {e.code().name} - {e.details()}")
 
 @router.get("")
-async def get_users(limit: int = 10, offset: int = 0, client: UserServiceClient = Depends(get_user_service_client_dependency)) -> list[User]:
+async def get_users(
+    request: Request,
+    response: Response,
+    limit: int = 10,
+    offset: int = 0,
+    include_total: Optional[TotalCountMode] = None,
+    ids: Optional[List[str]] = Query(None, description=f"Fetch these user ids instead of a page (at most {MAX_BATCH_IDS})"),
+    client: UserServiceClient = Depends(get_user_service_client_dependency)
+) -> Union[list[User], UserBatch]:
+    """
+    List users. With include_total the total is returned in the X-Total-Count header.
+
+    With ids=1,2,3 the given users are returned instead, in one call to the user service:
+    one result per distinct id, with found=false for ids that don't exist.
+
+    The response carries an ETag; a matching If-None-Match gets 304 Not Modified.
+    """
     try:
-        return await client.get_users(limit=limit, offset=offset)
+        if ids is not None:
+            user_ids = _parse_ids(ids)
+            found = {user.id: user for user in await client.batch_get_users(user_ids)} if user_ids else {}
+            body = UserBatch(results=[
+                UserLookup(id=user_id, found=user_id in found, user=found.get(user_id)) for user_id in user_ids
+            ])
+            etag = conditional.list_etag(found.values(), "missing", *(i for i in user_ids if i not in found))
+        else:
+            if include_total is None:
+                body = await client.get_users(limit=limit, offset=offset)
+            else:
+                page = await client.get_users_page(limit=limit, offset=offset, include_total=include_total)
+                body = page.users
+                response.headers["X-Total-Count"] = str(page.total_count)
+                response.headers["X-Total-Count-Estimated"] = "true" if page.total_is_estimate else "false"
+            etag = conditional.list_etag(
+                body, response.headers.get("X-Total-Count"), response.headers.get("X-Total-Count-Estimated")
+            )
     except grpc.RpcError as e:
         raise HTTPException(status_code=500, detail=f"gRPC error: {e.code().name} - {e.details()}")
+
+    response.headers["ETag"] = etag
+    if conditional.is_not_modified(request.headers, etag):
+        return conditional.not_modified({
+            name: value for name, value in response.headers.items() if name != "content-length"
+        })
+    return body
@@ -0,0 +1,57 @@
+"""
+Compare two benchmark reports produced by benchmarks.run.
+
+Usage (from the backend directory):
+    uv run python -m benchmarks.compare baseline.json candidate.json
+"""
+import argparse
+import json
+
+METRICS = [
+    ("throughput_rps", lambda s: s["throughput_rps"]),
+    ("p50_ms", lambda s: s["latency"]["p50_ms"]),
+    ("p95_ms", lambda s: s["latency"]["p95_ms"]),
+    ("p99_ms", lambda s: s["latency"]["p99_ms"]),
+]
+
+
+def _change(before: float, after: float) -> str:
+    if not before:
+        return "n/a"
+    return f"{(after - before) / before * 100:+.1f}%"
+
+
+def compare(baseline: dict, candidate: dict):
+    print(f"baseline  {baseline['meta']['git_revision'][:12]}  {baseline['meta']['timestamp']}")
+    print(f"candidate {candidate['meta']['git_revision'][:12]}  {candidate['meta']['timestamp']}")
+    print()
+    print(f"{'scenario':16s} {'metric':15s} {'baseline':>10s} {'candidate':>10s} {'change':>8s}")
+    for name, before in baseline["scenarios"].items():
+        after = candidate["scenarios"].get(name)
+        if after is None:
+            continue
+        for metric, value in METRICS:
+            print(
+                f"{name:16s} {metric:15s} {value(before):>10.2f} {value(after):>10.2f} "
+                f"{_change(value(before), value(after)):>8s}"
+            )
+        for layer, summary in before.get("layers", {}).items():
+            if layer in after.get("layers", {}):
+                b, a = summary["per_request_ms"], after["layers"][layer]["per_request_ms"]
+                print(f"{name:16s} {layer + ' ms/req':15s} {b:>10.2f} {a:>10.2f} {_change(b, a):>8s}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    args = parser.parse_args()
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.candidate) as f:
+        candidate = json.load(f)
+    compare(baseline, candidate)
+
+
+if __name__ == "__main__":
+    main()
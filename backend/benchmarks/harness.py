@@ -0,0 +1,169 @@
+"""
+In-process test bed for the benchmarks: a SQLite-backed user service, the BFF app and
+per-layer timing hooks. Nothing here needs Postgres or a network beyond loopback.
+
+setup_environment() must run before any app module is imported, because the database and
+gRPC client configuration are read from the environment at import time.
+"""
+import asyncio
+import os
+import socket
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Dict, List
+
+
+def _free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def setup_environment(work_dir: str) -> int:
+    """Point the user service at a SQLite file and both sides at a free local port."""
+    port = _free_port()
+    os.environ["USER_DATABASE_URL"] = f"sqlite:///{os.path.join(work_dir, 'users.db')}"
+    os.environ["USER_SERVICE_HOST"] = "127.0.0.1"
+    os.environ["USER_SERVICE_PORT"] = str(port)
+    return port
+
+
+class LayerTimings:
+    """Thread-safe collection of per-layer call durations in seconds."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._durations: Dict[str, List[float]] = defaultdict(list)
+        self.enabled = False
+
+    def record(self, layer: str, seconds: float):
+        if self.enabled:
+            with self._lock:
+                self._durations[layer].append(seconds)
+
+    @contextmanager
+    def measure(self, layer: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(layer, time.perf_counter() - start)
+
+    def drain(self) -> Dict[str, List[float]]:
+        with self._lock:
+            durations, self._durations = self._durations, defaultdict(list)
+        return dict(durations)
+
+
+timings = LayerTimings()
+
+
+def seed_users(count: int):
+    """Create the schema and insert `count` users."""
+    from sqlalchemy import insert
+    from app.grpc.servers.user.database.connection import user_db
+    from app.grpc.servers.user.database.models import User
+
+    User.metadata.drop_all(user_db.engine)
+    User.metadata.create_all(user_db.engine)
+    with user_db.engine.begin() as connection:
+        connection.execute(
+            insert(User),
+            [
+                {"name": f"User {i}", "email": f"user{i}@example.com", "is_active": i % 10 != 0}
+                for i in range(1, count + 1)
+            ]
+        )
+
+
+def start_user_server(port: int):
+    """Start the production User gRPC server build in this process."""
+    from app.grpc.servers.user.user_server import create_server
+
+    server = create_server(port)
+    server.start()
+    return server
+
+
+def install_layer_hooks():
+    """Time the GraphQL execution, gRPC client call and SQL statement layers."""
+    from sqlalchemy import event
+    from app.graphql.schema import schema
+    from app.grpc.clients.base_client import BaseGrpcClient
+    from app.grpc.servers.user.database.connection import user_db
+
+    original_call = BaseGrpcClient._call
+
+    async def timed_call(self, *args, **kwargs):
+        with timings.measure("grpc"):
+            return await original_call(self, *args, **kwargs)
+
+    BaseGrpcClient._call = timed_call
+
+    original_execute = schema.execute
+
+    async def timed_execute(*args, **kwargs):
+        with timings.measure("graphql"):
+            return await original_execute(*args, **kwargs)
+
+    schema.execute = timed_execute
+
+    engines = [user_db.engine] + list(user_db.replicas.engines)
+    for engine in engines:
+        @event.listens_for(engine, "before_cursor_execute")
+        def _before(conn, cursor, statement, parameters, context, executemany):
+            context._bench_started = time.perf_counter()
+
+        @event.listens_for(engine, "after_cursor_execute")
+        def _after(conn, cursor, statement, parameters, context, executemany):
+            timings.record("db", time.perf_counter() - context._bench_started)
+
+
+class ASGIDriver:
+    """Minimal in-process HTTP client that calls an ASGI app directly."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def request(self, method: str, path: str, query: str = "", body: bytes = b"", content_type: str = ""):
+        headers = [(b"host", b"benchmark")]
+        if body:
+            headers += [(b"content-type", content_type.encode()), (b"content-length", str(len(body)).encode())]
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": method,
+            "scheme": "http",
+            "path": path,
+            "raw_path": path.encode(),
+            "query_string": query.encode(),
+            "root_path": "",
+            "headers": headers,
+            "client": ("127.0.0.1", 50000),
+            "server": ("benchmark", 80),
+        }
+        request_sent = False
+
+        async def receive():
+            nonlocal request_sent
+            if not request_sent:
+                request_sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            # The client never disconnects early
+            await asyncio.Event().wait()
+
+        status = 0
+        chunks = []
+
+        async def send(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+
+        await self.app(scope, receive, send)
+        return status, b"".join(chunks)
@@ -0,0 +1,101 @@
+"""
+Compare the legacy ORM Query path with the lean Core path used by the user service.
+
+Both variants run the data access and protobuf mapping of GetUser and GetUsers directly,
+without gRPC in between, against a seeded SQLite database.
+
+Usage (from the backend directory):
+    uv run python -m benchmarks.orm_vs_core --iterations 2000 --page-size 1000
+"""
+import argparse
+import json
+import random
+import tempfile
+import time
+
+from benchmarks import harness
+
+
+def build_cases(page_size: int, users: int):
+    from generated import user_pb2
+    from app.grpc.servers.user.database.connection import get_user_db_connection, get_user_db_session
+    from app.grpc.servers.user.database.models import User
+    from app.grpc.servers.user.database import queries
+
+    def orm_get_user():
+        with get_user_db_session(read_only=True) as db:
+            user = db.query(User).filter(User.id == random.randint(1, users)).first()
+            return user_pb2.User(
+                id=user.id, name=user.name, email=user.email, is_active=user.is_active,
+                version=queries.to_version(user.updated_at or user.created_at)
+            )
+
+    def core_get_user():
+        with get_user_db_connection(read_only=True) as connection:
+            row = connection.execute(queries.select_user_by_id, {"user_id": random.randint(1, users)}).first()
+        return queries.row_to_user(row)
+
+    def orm_get_users():
+        with get_user_db_session(read_only=True) as db:
+            rows = db.query(User).order_by(User.id).offset(0).limit(page_size).all()
+            return user_pb2.GetUsersResponse(users=[
+                user_pb2.User(
+                    id=u.id, name=u.name, email=u.email, is_active=u.is_active,
+                    version=queries.to_version(u.updated_at or u.created_at)
+                )
+                for u in rows
+            ])
+
+    def core_get_users():
+        with get_user_db_connection(read_only=True) as connection:
+            rows = connection.execute(queries.select_users_page, {"limit": page_size, "offset": 0})
+            return user_pb2.GetUsersResponse(users=[queries.row_to_user(row) for row in rows])
+
+    return {
+        "get_user": (orm_get_user, core_get_user),
+        f"get_users_{page_size}": (orm_get_users, core_get_users),
+    }
+
+
+def measure(fn, iterations: int) -> dict:
+    for _ in range(min(100, iterations)):
+        fn()
+    durations = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        durations.append(time.perf_counter() - start)
+    durations.sort()
+    return {
+        "mean_us": round(sum(durations) / len(durations) * 1e6, 1),
+        "p50_us": round(durations[len(durations) // 2] * 1e6, 1),
+        "p99_us": round(durations[int(len(durations) * 0.99) - 1] * 1e6, 1),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--users", type=int, default=5000)
+    parser.add_argument("--page-size", type=int, default=1000)
+    args = parser.parse_args(argv)
+    random.seed(1)
+
+    with tempfile.TemporaryDirectory(prefix="bff-bench-") as work_dir:
+        harness.setup_environment(work_dir)
+        harness.seed_users(args.users)
+        results = {}
+        for name, (orm, core) in build_cases(args.page_size, args.users).items():
+            iterations = args.iterations if name == "get_user" else max(1, args.iterations // 20)
+            orm_result, core_result = measure(orm, iterations), measure(core, iterations)
+            results[name] = {
+                "iterations": iterations,
+                "orm": orm_result,
+                "core": core_result,
+                "speedup": round(orm_result["mean_us"] / core_result["mean_us"], 2),
+            }
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+"""
+Benchmark the REST, GraphQL and raw gRPC paths of the BFF against an in-process user service.
+
+Usage (from the backend directory):
+    uv run python -m benchmarks.run --concurrency 32 --requests 2000 --output results.json
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Dict, List
+
+from benchmarks import harness
+
+SCENARIOS = [
+    "rest_get_user",
+    "rest_get_users",
+    "graphql_user",
+    "graphql_users",
+    "grpc_get_user",
+    "grpc_get_users",
+]
+
+LAYERS = ["http", "graphql", "grpc", "db"]
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, int(round(pct / 100 * len(sorted_values))) - 1))
+    return sorted_values[rank]
+
+
+def summarize(durations: List[float]) -> Dict[str, float]:
+    values = sorted(durations)
+    return {
+        "count": len(values),
+        "mean_ms": round(sum(values) / len(values) * 1000, 3) if values else 0.0,
+        "p50_ms": round(percentile(values, 50) * 1000, 3),
+        "p95_ms": round(percentile(values, 95) * 1000, 3),
+        "p99_ms": round(percentile(values, 99) * 1000, 3),
+        "max_ms": round(values[-1] * 1000, 3) if values else 0.0,
+    }
+
+
+def build_scenarios(args) -> Dict[str, Callable[[], Awaitable[bool]]]:
+    from main import app
+    from app.grpc.clients.grpc_client import user_client
+
+    driver = harness.ASGIDriver(app)
+    page_size = args.page_size
+
+    def random_id() -> int:
+        return random.randint(1, args.users)
+
+    async def http(method, path, query="", body=b"", content_type=""):
+        with harness.timings.measure("http"):
+            status, payload = await driver.request(method, path, query, body, content_type)
+        return status == 200 and b'"errors"' not in payload
+
+    async def graphql(query: str):
+        body = json.dumps({"query": query}).encode()
+        return await http("POST", "/graphql", body=body, content_type="application/json")
+
+    async def grpc_get_user():
+        await user_client.get_user(random_id())
+        return True
+
+    async def grpc_get_users():
+        await user_client.get_users(limit=page_size, offset=random.randint(0, max(0, args.users - page_size)))
+        return True
+
+    return {
+        "rest_get_user": lambda: http("GET", f"/api/users/{random_id()}"),
+        "rest_get_users": lambda: http(
+            "GET", "/api/users", f"limit={page_size}&offset={random.randint(0, max(0, args.users - page_size))}"
+        ),
+        "graphql_user": lambda: graphql(f"{{ user(id: {random_id()}) {{ id name email isActive }} }}"),
+        "graphql_users": lambda: graphql("{ users { id name email isActive } }"),
+        "grpc_get_user": grpc_get_user,
+        "grpc_get_users": grpc_get_users,
+    }
+
+
+async def run_scenario(operation: Callable[[], Awaitable[bool]], requests: int, concurrency: int) -> Dict:
+    latencies: List[float] = []
+    errors = 0
+    remaining = requests
+
+    async def worker():
+        nonlocal remaining, errors
+        while remaining > 0:
+            remaining -= 1
+            start = time.perf_counter()
+            try:
+                ok = await operation()
+            except Exception:
+                ok = False
+            latencies.append(time.perf_counter() - start)
+            if not ok:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "duration_s": round(elapsed, 3),
+        "throughput_rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "latency": summarize(latencies),
+    }
+
+
+async def run_all(args) -> Dict:
+    from main import app
+
+    scenarios = build_scenarios(args)
+    results = {}
+    async with app.router.lifespan_context(app):
+        for name in args.scenarios:
+            operation = scenarios[name]
+            harness.timings.enabled = False
+            await run_scenario(operation, args.warmup, args.concurrency)
+            harness.timings.drain()
+
+            harness.timings.enabled = True
+            result = await run_scenario(operation, args.requests, args.concurrency)
+            harness.timings.enabled = False
+
+            layer_durations = harness.timings.drain()
+            result["layers"] = {}
+            for layer in LAYERS:
+                if layer not in layer_durations:
+                    continue
+                summary = summarize(layer_durations[layer])
+                # Average time spent in this layer per benchmark request
+                summary["per_request_ms"] = round(sum(layer_durations[layer]) / result["requests"] * 1000, 3)
+                result["layers"][layer] = summary
+            results[name] = result
+            print(
+                f"{name:16s} {result['throughput_rps']:>9.1f} req/s  "
+                f"p50 {result['latency']['p50_ms']:.2f}ms  p95 {result['latency']['p95_ms']:.2f}ms  "
+                f"p99 {result['latency']['p99_ms']:.2f}ms  errors {result['errors']}",
+                file=sys.stderr
+            )
+    return results
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=32, help="concurrent in-flight requests")
+    parser.add_argument("--requests", type=int, default=2000, help="measured requests per scenario")
+    parser.add_argument("--warmup", type=int, default=200, help="unmeasured requests per scenario")
+    parser.add_argument("--users", type=int, default=1000, help="rows seeded into the users table")
+    parser.add_argument("--page-size", type=int, default=10, help="limit used by the list scenarios")
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=SCENARIOS)
+    parser.add_argument("--seed", type=int, default=1, help="random seed for the request mix")
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    random.seed(args.seed)
+    logging.basicConfig(level=logging.WARNING)
+
+    with tempfile.TemporaryDirectory(prefix="bff-bench-") as work_dir:
+        port = harness.setup_environment(work_dir)
+        harness.seed_users(args.users)
+        harness.install_layer_hooks()
+        server = harness.start_user_server(port)
+        try:
+            results = asyncio.run(run_all(args))
+        finally:
+            server.stop(grace=None)
+
+    report = {
+        "meta": {
+            "git_revision": git_revision(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "params": {k: v for k, v in vars(args).items() if k != "output"},
+        },
+        "scenarios": results,
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
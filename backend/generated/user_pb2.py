@@ -24,23 +24,45 @@ _sym_db = _symbol_database.Default()
 
 
 
-DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x14generated/user.proto\x12\x04user\"B\n\x04User\x12\n\n\x02id\x18\x01 \x01(\x05\x12\x0c\n\x04name\x18\x02 \x01(\t\x12\r\n\x05\x65mail\x18\x03 \x01(\t\x12\x11\n\tis_active\x18\x04 \x01(\x08\"\x1c\n\x0eGetUserRequest\x12\n\n\x02id\x18\x01 \x01(\x05\"0\n\x11\x43reateUserRequest\x12\x0c\n\x04name\x18\x01 \x01(\t\x12\r\n\x05\x65mail\x18\x02 \x01(\t\"0\n\x0fGetUsersRequest\x12\r\n\x05limit\x18\x01 \x01(\x05\x12\x0e\n\x06offset\x18\x02 \x01(\x05\"-\n\x10GetUsersResponse\x12\x19\n\x05users\x18\x01 \x03(\x0b\x32\n.user.User2\xa8\x01\n\x0bUserService\x12+\n\x07GetUser\x12\x14.user.GetUserRequest\x1a\n.user.User\x12\x31\n\nCreateUser\x12\x17.user.CreateUserRequest\x1a\n.user.User\x12\x39\n\x08GetUsers\x12\x15.user.GetUsersRequest\x1a\x16.user.GetUsersResponseb\x06proto3')
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x14generated/user.proto\x12\x04user\"S\n\x04User\x12\n\n\x02id\x18\x01 \x01(\x05\x12\x0c\n\x04name\x18\x02 \x01(\t\x12\r\n\x05\x65mail\x18\x03 \x01(\t\x12\x11\n\tis_active\x18\x04 \x01(\x08\x12\x0f\n\x07version\x18\x05 \x01(\x03\"\x1c\n\x0eGetUserRequest\x12\n\n\x02id\x18\x01 \x01(\x05\"=\n\x18GetUserIfModifiedRequest\x12\n\n\x02id\x18\x01 \x01(\x05\x12\x15\n\rknown_version\x18\x02 \x01(\x03\"K\n\x19GetUserIfModifiedResponse\x12\x14\n\x0cnot_modified\x18\x01 \x01(\x08\x12\x18\n\x04user\x18\x02 \x01(\x0b\x32\n.user.User\"#\n\x14\x42\x61tchGetUsersRequest\x12\x0b\n\x03ids\x18\x01 \x03(\x05\"2\n\x15\x42\x61tchGetUsersResponse\x12\x19\n\x05users\x18\x01 \x03(\x0b\x32\n.user.User\"0\n\x11\x43reateUserRequest\x12\x0c\n\x04name\x18\x01 \x01(\t\x12\r\n\x05\x65mail\x18\x02 \x01(\t\"o\n\x0fGetUsersRequest\x12\r\n\x05limit\x18\x01 \x01(\x05\x12\x0e\n\x06offset\x18\x02 \x01(\x05\x12+\n\rinclude_total\x18\x03 \x01(\x0e\x32\x14.user.TotalCountMode\x12\x10\n\x08\x61\x66ter_id\x18\x04 \x01(\x05\"]\n\x10GetUsersResponse\x12\x19\n\x05users\x18\x01 \x03(\x0b\x32\n.user.User\x12\x13\n\x0btotal_count\x18\x02 \x01(\x03\x12\x19\n\x11total_is_estimate\x18\x03 \x01(\x08\"\x90\x01\n\x12SearchUsersRequest\x12\r\n\x05query\x18\x01 \x01(\t\x12$\n\x05match\x18\x02 \x01(\x0e\x32\x15.user.SearchMatchMode\x12\x16\n\tis_active\x18\x03 \x01(\x08H\x00\x88\x01\x01\x12\r\n\x05limit\x18\x04 \x01(\x05\x12\x10\n\x08\x61\x66ter_id\x18\x05 \x01(\x05\x42\x0c\n\n_is_active\"G\n\x13SearchUsersResponse\x12\x19\n\x05users\x18\x01 \x03(\x0b\x32\n.user.User\x12\x15\n\rnext_after_id\x18\x02 \x01(\x05\":\n\x11WatchUsersRequest\x12\r\n\x05\x65poch\x18\x01 \x01(\t\x12\x16\n\x0e\x61\x66ter_sequence\x18\x02 \x01(\x03\"i\n\tUserEvent\x12!\n\x04type\x18\x01 \x01(\x0e\x32\x13.user.UserEventType\x12\r\n\x05\x65poch\x18\x02 \x01(\t\x12\x10\n\x08sequence\x18\x03 \x01(\x03\x12\x18\n\x04user\x18\x04 \x01(\x0b\x32\n.user.User*W\n\x0eTotalCountMode\x12\x14\n\x10TOTAL_COUNT_NONE\x10\x00\x12\x15\n\x11TOTAL_COUNT_EXACT\x10\x01\x12\x18\n\x14TOTAL_COUNT_ESTIMATE\x10\x02*F\n\x0fSearchMatchMode\x12\x17\n\x13SEARCH_MATCH_PREFIX\x10\x00\x12\x1a\n\x16SEARCH_MATCH_SUBSTRING\x10\x01*\x87\x01\n\rUserEventType\x12\x18\n\x14USER_EVENT_HEARTBEAT\x10\x00\x12\x14\n\x10USER_EVENT_RESET\x10\x01\x12\x16\n\x12USER_EVENT_CREATED\x10\x02\x12\x16\n\x12USER_EVENT_UPDATED\x10\x03\x12\x16\n\x12USER_EVENT_DELETED\x10\x04\x32\xc6\x03\n\x0bUserService\x12+\n\x07GetUser\x12\x14.user.GetUserRequest\x1a\n.user.User\x12T\n\x11GetUserIfModified\x12\x1e.user.GetUserIfModifiedRequest\x1a\x1f.user.GetUserIfModifiedResponse\x12H\n\rBatchGetUsers\x12\x1a.user.BatchGetUsersRequest\x1a\x1b.user.BatchGetUsersResponse\x12\x31\n\nCreateUser\x12\x17.user.CreateUserRequest\x1a\n.user.User\x12\x39\n\x08GetUsers\x12\x15.user.GetUsersRequest\x1a\x16.user.GetUsersResponse\x12\x42\n\x0bSearchUsers\x12\x18.user.SearchUsersRequest\x1a\x19.user.SearchUsersResponse\x12\x38\n\nWatchUsers\x12\x17.user.WatchUsersRequest\x1a\x0f.user.UserEvent0\x01\x62\x06proto3')
 
 _globals = globals()
 _builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
 _builder.BuildTopDescriptorsAndMessages(DESCRIPTOR, 'generated.user_pb2', _globals)
 if not _descriptor._USE_C_DESCRIPTORS:
   DESCRIPTOR._loaded_options = None
+  _globals['_TOTALCOUNTMODE']._serialized_start=1019
+  _globals['_TOTALCOUNTMODE']._serialized_end=1106
+  _globals['_SEARCHMATCHMODE']._serialized_start=1108
+  _globals['_SEARCHMATCHMODE']._serialized_end=1178
+  _globals['_USEREVENTTYPE']._serialized_start=1181
+  _globals['_USEREVENTTYPE']._serialized_end=1316
   _globals['_USER']._serialized_start=30
-  _globals['_USER']._serialized_end=96
-  _globals['_GETUSERREQUEST']._serialized_start=98
-  _globals['_GETUSERREQUEST']._serialized_end=126
-  _globals['_CREATEUSERREQUEST']._serialized_start=128
-  _globals['_CREATEUSERREQUEST']._serialized_end=176
-  _globals['_GETUSERSREQUEST']._serialized_start=178
-  _globals['_GETUSERSREQUEST']._serialized_end=226
-  _globals['_GETUSERSRESPONSE']._serialized_start=228
-  _globals['_GETUSERSRESPONSE']._serialized_end=273
-  _globals['_USERSERVICE']._serialized_start=276
-  _globals['_USERSERVICE']._serialized_end=444
+  _globals['_USER']._serialized_end=113
+  _globals['_GETUSERREQUEST']._serialized_start=115
+  _globals['_GETUSERREQUEST']._serialized_end=143
+  _globals['_GETUSERIFMODIFIEDREQUEST']._serialized_start=145
+  _globals['_GETUSERIFMODIFIEDREQUEST']._serialized_end=206
+  _globals['_GETUSERIFMODIFIEDRESPONSE']._serialized_start=208
+  _globals['_GETUSERIFMODIFIEDRESPONSE']._serialized_end=283
+  _globals['_BATCHGETUSERSREQUEST']._serialized_start=285
+  _globals['_BATCHGETUSERSREQUEST']._serialized_end=320
+  _globals['_BATCHGETUSERSRESPONSE']._serialized_start=322
+  _globals['_BATCHGETUSERSRESPONSE']._serialized_end=372
+  _globals['_CREATEUSERREQUEST']._serialized_start=374
+  _globals['_CREATEUSERREQUEST']._serialized_end=422
+  _globals['_GETUSERSREQUEST']._serialized_start=424
+  _globals['_GETUSERSREQUEST']._serialized_end=535
+  _globals['_GETUSERSRESPONSE']._serialized_start=537
+  _globals['_GETUSERSRESPONSE']._serialized_end=630
+  _globals['_SEARCHUSERSREQUEST']._serialized_start=633
+  _globals['_SEARCHUSERSREQUEST']._serialized_end=777
+  _globals['_SEARCHUSERSRESPONSE']._serialized_start=779
+  _globals['_SEARCHUSERSRESPONSE']._serialized_end=850
+  _globals['_WATCHUSERSREQUEST']._serialized_start=852
+  _globals['_WATCHUSERSREQUEST']._serialized_end=910
+  _globals['_USEREVENT']._serialized_start=912
+  _globals['_USEREVENT']._serialized_end=1017
+  _globals['_USERSERVICE']._serialized_start=1319
+  _globals['_USERSERVICE']._serialized_end=1773
 # @@protoc_insertion_point(module_scope)
@@ -39,6 +39,16 @@ class UserServiceStub(object):
                 request_serializer=generated_dot_user__pb2.GetUserRequest.SerializeToString,
                 response_deserializer=generated_dot_user__pb2.User.FromString,
                 _registered_method=True)
+        self.GetUserIfModified = channel.unary_unary(
+                '/user.UserService/GetUserIfModified',
+                request_serializer=generated_dot_user__pb2.GetUserIfModifiedRequest.SerializeToString,
+                response_deserializer=generated_dot_user__pb2.GetUserIfModifiedResponse.FromString,
+                _registered_method=True)
+        self.BatchGetUsers = channel.unary_unary(
+                '/user.UserService/BatchGetUsers',
+                request_serializer=generated_dot_user__pb2.BatchGetUsersRequest.SerializeToString,
+                response_deserializer=generated_dot_user__pb2.BatchGetUsersResponse.FromString,
+                _registered_method=True)
         self.CreateUser = channel.unary_unary(
                 '/user.UserService/CreateUser',
                 request_serializer=generated_dot_user__pb2.CreateUserRequest.SerializeToString,
@@ -49,6 +59,16 @@ class UserServiceStub(object):
                 request_serializer=generated_dot_user__pb2.GetUsersRequest.SerializeToString,
                 response_deserializer=generated_dot_user__pb2.GetUsersResponse.FromString,
                 _registered_method=True)
+        self.SearchUsers = channel.unary_unary(
+                '/user.UserService/SearchUsers',
+                request_serializer=generated_dot_user__pb2.SearchUsersRequest.SerializeToString,
+                response_deserializer=generated_dot_user__pb2.SearchUsersResponse.FromString,
+                _registered_method=True)
+        self.WatchUsers = channel.unary_stream(
+                '/user.UserService/WatchUsers',
+                request_serializer=generated_dot_user__pb2.WatchUsersRequest.SerializeToString,
+                response_deserializer=generated_dot_user__pb2.UserEvent.FromString,
+                _registered_method=True)
 
 
 class UserServiceServicer(object):
@@ -60,6 +80,18 @@ class UserServiceServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def GetUserIfModified(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def BatchGetUsers(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
     def CreateUser(self, request, context):
         """Missing associated documentation comment in .proto file."""
         context.set_code(grpc.StatusCode.UNIMPLEMENTED)
@@ -72,6 +104,19 @@ class UserServiceServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def SearchUsers(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def WatchUsers(self, request, context):
+        """Change feed of the users table, for invalidating caches of users
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
 
 def add_UserServiceServicer_to_server(servicer, server):
     rpc_method_handlers = {
@@ -80,6 +125,16 @@ def add_UserServiceServicer_to_server(servicer, server):
                     request_deserializer=generated_dot_user__pb2.GetUserRequest.FromString,
                     response_serializer=generated_dot_user__pb2.User.SerializeToString,
             ),
+            'GetUserIfModified': grpc.unary_unary_rpc_method_handler(
+                    servicer.GetUserIfModified,
+                    request_deserializer=generated_dot_user__pb2.GetUserIfModifiedRequest.FromString,
+                    response_serializer=generated_dot_user__pb2.GetUserIfModifiedResponse.SerializeToString,
+            ),
+            'BatchGetUsers': grpc.unary_unary_rpc_method_handler(
+                    servicer.BatchGetUsers,
+                    request_deserializer=generated_dot_user__pb2.BatchGetUsersRequest.FromString,
+                    response_serializer=generated_dot_user__pb2.BatchGetUsersResponse.SerializeToString,
+            ),
             'CreateUser': grpc.unary_unary_rpc_method_handler(
                     servicer.CreateUser,
                     request_deserializer=generated_dot_user__pb2.CreateUserRequest.FromString,
@@ -90,6 +145,16 @@ def add_UserServiceServicer_to_server(servicer, server):
                     request_deserializer=generated_dot_user__pb2.GetUsersRequest.FromString,
                     response_serializer=generated_dot_user__pb2.GetUsersResponse.SerializeToString,
             ),
+            'SearchUsers': grpc.unary_unary_rpc_method_handler(
+                    servicer.SearchUsers,
+                    request_deserializer=generated_dot_user__pb2.SearchUsersRequest.FromString,
+                    response_serializer=generated_dot_user__pb2.SearchUsersResponse.SerializeToString,
+            ),
+            'WatchUsers': grpc.unary_stream_rpc_method_handler(
+                    servicer.WatchUsers,
+                    request_deserializer=generated_dot_user__pb2.WatchUsersRequest.FromString,
+                    response_serializer=generated_dot_user__pb2.UserEvent.SerializeToString,
+            ),
     }
     generic_handler = grpc.method_handlers_generic_handler(
             'user.UserService', rpc_method_handlers)
@@ -128,6 +193,60 @@ class UserService(object):
             metadata,
             _registered_method=True)
 
+    @staticmethod
+    def GetUserIfModified(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/user.UserService/GetUserIfModified',
+            generated_dot_user__pb2.GetUserIfModifiedRequest.SerializeToString,
+            generated_dot_user__pb2.GetUserIfModifiedResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def BatchGetUsers(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/user.UserService/BatchGetUsers',
+            generated_dot_user__pb2.BatchGetUsersRequest.SerializeToString,
+            generated_dot_user__pb2.BatchGetUsersResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
     @staticmethod
     def CreateUser(request,
             target,
@@ -181,3 +300,57 @@ class UserService(object):
             timeout,
             metadata,
             _registered_method=True)
+
+    @staticmethod
+    def SearchUsers(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/user.UserService/SearchUsers',
+            generated_dot_user__pb2.SearchUsersRequest.SerializeToString,
+            generated_dot_user__pb2.SearchUsersResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def WatchUsers(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_stream(
+            request,
+            target,
+            '/user.UserService/WatchUsers',
+            generated_dot_user__pb2.WatchUsersRequest.SerializeToString,
+            generated_dot_user__pb2.UserEvent.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
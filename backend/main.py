@@ -1,20 +1,63 @@
+import asyncio
+import os
 from fastapi import FastAPI
-from strawberry.fastapi import GraphQLRouter
+from fastapi.responses import PlainTextResponse
+from app.caller import CallerIdMiddleware
+from app.compression import CompressionMiddleware
+from app.exports import export_manager
+from app.graphql.batching import BatchingGraphQLRouter
 from app.graphql.schema import schema
 from app.graphql.context_factory import get_context
 from app.restful.routes import router as api_router
 from app.grpc.clients.base_client import BaseGrpcClient
+from app.observability.loop_monitor import loop_monitor
+from app.observability.metrics import registry
+from app.observability.multiprocess import MultiprocessMetrics
+from app.observability.tracing import configure_tracing, tracer, TracingMiddleware
 from contextlib import asynccontextmanager
 
+# Set by the multi-worker launcher; /metrics then covers every worker
+worker_metrics = MultiprocessMetrics.from_env(refresh=BaseGrpcClient.latency_report)
+
 @asynccontextmanager
 async def lifespan(app):
+    # Connect gRPC channels before this worker accepts traffic
+    prewarm_seconds = float(os.getenv("BFF_PREWARM_GRPC_SECONDS", "5"))
+    if prewarm_seconds > 0:
+        await BaseGrpcClient.prewarm_all(timeout=prewarm_seconds)
+    metrics_task = asyncio.create_task(worker_metrics.run()) if worker_metrics else None
+    # Change feeds that keep client caches fresh across replicas (e.g. WatchUsers)
+    watch_tasks = BaseGrpcClient.watch_all()
+    # Event loop lag histogram and blocked-loop stack dumps (LOOP_MONITOR_INTERVAL_SECONDS=0 disables)
+    loop_monitor.start()
     yield
+    await loop_monitor.stop()
+    for task in watch_tasks:
+        task.cancel()
+    await asyncio.gather(*watch_tasks, return_exceptions=True)
+    await export_manager.shutdown()
+    # Let RPCs started by in-flight requests finish before their channels are closed
+    await BaseGrpcClient.drain_all(timeout=float(os.getenv("BFF_SHUTDOWN_DRAIN_SECONDS", "10")))
     await BaseGrpcClient.cleanup_all()
+    tracer.exporter.shutdown()
+    if metrics_task is not None:
+        metrics_task.cancel()
+        await asyncio.gather(metrics_task, return_exceptions=True)
 
 app = FastAPI(title="FastAPI GraphQL gRPC BFF", version="0.1.0", lifespan=lifespan)
 
-# GraphQL endpoint
-graphql_app = GraphQLRouter(schema, context_getter=get_context)
+# Negotiated gzip/deflate for responses of at least HTTP_COMPRESSION_MIN_BYTES
+app.add_middleware(CompressionMiddleware)
+
+# End-user id for read-your-writes pinning in backend services (BFF_CALLER_ID_HEADER)
+app.add_middleware(CallerIdMiddleware)
+
+# Distributed tracing (TRACING_SAMPLE_RATE=0 keeps it off)
+if configure_tracing("bff").enabled:
+    app.add_middleware(TracingMiddleware)
+
+# GraphQL endpoint (also accepts an array of operations per POST)
+graphql_app = BatchingGraphQLRouter(schema, context_getter=get_context)
 app.include_router(graphql_app, prefix="/graphql")
 
 # REST API endpoints
@@ -23,3 +66,13 @@ app.include_router(api_router, prefix="/api")
 @app.get("/")
 def read_root():
     return {"message": "FastAPI GraphQL gRPC BFF is running"}
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus metrics of this process, or of all workers when run by the launcher"""
+    if worker_metrics is not None:
+        body = await asyncio.to_thread(worker_metrics.render_prometheus)
+    else:
+        BaseGrpcClient.latency_report()  # refresh the latency and deadline gauges
+        body = registry.render_prometheus()
+    return PlainTextResponse(body, media_type="text/plain; version=0.0.4")
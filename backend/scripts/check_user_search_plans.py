@@ -0,0 +1,84 @@
+"""
+Verify that SearchUsers queries are planned as index scans.
+
+Runs EXPLAIN against the user service database (USER_DATABASE_URL / USER_DB_* settings)
+after `alembic upgrade head`. Sequential scans are disabled for the check so the result
+doesn't depend on how many rows the table holds: a query that still plans a Seq Scan on
+users, or scans some index other than the one meant for it, has no usable index.
+
+Usage (from the backend directory):
+    uv run python scripts/check_user_search_plans.py
+"""
+import json
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import text
+from generated import user_pb2
+from app.grpc.servers.user.database.connection import user_db
+from app.grpc.servers.user.database.queries import search_users_statement
+
+
+def _plan_nodes(plan):
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from _plan_nodes(child)
+
+
+def _explain(connection, statement):
+    sql = str(statement.compile(connection, compile_kwargs={"literal_binds": True}))
+    result = connection.execute(text(f"EXPLAIN (FORMAT JSON) {sql}")).scalar()
+    plan = result if isinstance(result, list) else json.loads(result)
+    return list(_plan_nodes(plan[0]["Plan"]))
+
+
+def check_search_plans() -> bool:
+    # The indexes each case has to use, one of each group; any other index (e.g. a scan of
+    # the primary key that filters every row) means the intended one isn't usable
+    pattern_indexes = (("ix_users_name_pattern",), ("ix_users_email_pattern",))
+    # users.id has both the primary key and ix_users_id; either is fine
+    id_indexes = (("users_pkey", "ix_users_id"),)
+    cases = {
+        "prefix": (search_users_statement("ali", user_pb2.SEARCH_MATCH_PREFIX, None, 0, 21), pattern_indexes),
+        "prefix, active only": (
+            search_users_statement("ali", user_pb2.SEARCH_MATCH_PREFIX, True, 0, 21), pattern_indexes
+        ),
+        "active listing": (
+            search_users_statement("", user_pb2.SEARCH_MATCH_PREFIX, True, 0, 21), (("ix_users_active_id",),)
+        ),
+        "keyset listing": (search_users_statement("", user_pb2.SEARCH_MATCH_PREFIX, None, 100, 21), id_indexes),
+    }
+
+    ok = True
+    with user_db.engine.connect() as connection:
+        has_trigram_index = connection.execute(
+            text("SELECT 1 FROM pg_indexes WHERE indexname = 'ix_users_name_trgm'")
+        ).scalar() is not None
+        if has_trigram_index:
+            cases["substring"] = (
+                search_users_statement("lic", user_pb2.SEARCH_MATCH_SUBSTRING, None, 0, 21),
+                (("ix_users_name_trgm",), ("ix_users_email_trgm",))
+            )
+        else:
+            print("SKIP substring: pg_trgm indexes are not installed")
+
+        connection.execute(text("SET enable_seqscan = off"))
+        for name, (statement, expected_indexes) in cases.items():
+            nodes = _explain(connection, statement)
+            seq_scans = [n for n in nodes if n["Node Type"] == "Seq Scan" and n.get("Relation Name") == "users"]
+            indexes = {n["Index Name"] for n in nodes if "Index Name" in n}
+            missing = [" or ".join(group) for group in expected_indexes if indexes.isdisjoint(group)]
+
+            passed = not seq_scans and not missing
+            ok = ok and passed
+            used = ', '.join(sorted(indexes)) or 'no index used'
+            print(f"{'PASS' if passed else 'FAIL'} {name}: {used}" + (f" (expected {', '.join(missing)})" if missing else ""))
+        connection.rollback()
+
+    return ok
+
+
+if __name__ == "__main__":
+    sys.exit(0 if check_search_plans() else 1)
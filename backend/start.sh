@@ -41,7 +41,8 @@ case "$1" in
 
   prod)
     echo "🚀 Starting API server..."
-    uv run uvicorn main:app --host 0.0.0.0 --port 8000 --workers 1 --limit-concurrency 1000 &
+    # BFF_WORKERS (default: one per CPU), BFF_MAX_REQUESTS, ... see app/launcher.py
+    uv run python -m app.launcher &
     SERVER_PID=$!
     echo "🚀 Prod API Server (PID: $SERVER_PID) started."
     wait
@@ -0,0 +1,40 @@
+"""
+Test settings: tests run against USER_DATABASE_URL when it is set (e.g. a PostgreSQL
+database migrated with `alembic upgrade head`), else against a throwaway SQLite file.
+Tests that need PostgreSQL skip themselves on SQLite.
+"""
+import os
+import tempfile
+from concurrent import futures
+
+import grpc
+import pytest
+
+# Before anything imports the database connection, which reads the URL once
+os.environ.setdefault("USER_DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/users.db")
+
+from generated import user_pb2_grpc  # noqa: E402
+
+
+@pytest.fixture
+def start_user_service():
+    """Start a UserService server for a servicer on a free port; returns a stub connected to it."""
+    from app.grpc.servers.user.database.connection import user_db
+    from app.grpc.servers.user.database.models import User
+
+    User.metadata.create_all(user_db.engine)
+    started = []
+
+    def start(servicer):
+        server = grpc.server(futures.ThreadPoolExecutor(max_workers=8))
+        user_pb2_grpc.add_UserServiceServicer_to_server(servicer, server)
+        port = server.add_insecure_port("127.0.0.1:0")
+        server.start()
+        channel = grpc.insecure_channel(f"127.0.0.1:{port}")
+        started.append((server, channel))
+        return user_pb2_grpc.UserServiceStub(channel)
+
+    yield start
+    for server, channel in started:
+        channel.close()
+        server.stop(None)
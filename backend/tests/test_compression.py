@@ -0,0 +1,77 @@
+import asyncio
+import gzip
+
+from app.compression import CompressionMiddleware, HttpCompressionConfig, negotiate_encoding
+
+
+def _app(status: int, body: bytes, headers=()):
+    async def app(scope, receive, send):
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": [(b"content-type", b"application/json"), *headers],
+        })
+        await send({"type": "http.response.body", "body": body})
+    return app
+
+
+def _request(app, accept_encoding: str = "gzip", min_bytes: int = 16):
+    middleware = CompressionMiddleware(app, HttpCompressionConfig(enabled=True, min_bytes=min_bytes, level=6))
+    scope = {"type": "http", "method": "GET", "path": "/", "headers": [(b"accept-encoding", accept_encoding.encode())]}
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        messages.append(message)
+
+    asyncio.run(middleware(scope, receive, send))
+    return messages
+
+
+def _headers(message):
+    return {key.decode(): value.decode() for key, value in message["headers"]}
+
+
+def test_negotiate_encoding_honours_q_values():
+    assert negotiate_encoding("gzip, deflate") == "gzip"
+    assert negotiate_encoding("deflate;q=0.5, gzip;q=0.4") == "deflate"
+    assert negotiate_encoding("gzip;q=0, deflate") == "deflate"
+    assert negotiate_encoding("gzip;q=0, *") == "deflate"
+    assert negotiate_encoding("gzip;q=0") is None
+    assert negotiate_encoding("*;q=0") is None
+    assert negotiate_encoding("identity") is None
+
+
+def test_large_body_is_compressed():
+    body = b'{"users": []}' * 100
+    start, message = _request(_app(200, body))
+    assert _headers(start)["content-encoding"] == "gzip"
+    assert gzip.decompress(message["body"]) == body
+
+
+def test_etag_form_matches_on_200_and_304():
+    etag = (b"etag", b'"u1.5"')
+    compressed = _headers(_request(_app(200, b"x" * 100, [etag]))[0])
+    small = _headers(_request(_app(200, b"x", [etag]))[0])
+    not_modified = _headers(_request(_app(304, b"", [etag]))[0])
+    assert compressed["etag"] == small["etag"] == not_modified["etag"] == 'W/"u1.5"'
+    assert "accept-encoding" in not_modified["vary"].lower()
+
+
+def test_etag_stays_strong_without_compression():
+    etag = (b"etag", b'"u1.5"')
+    assert _headers(_request(_app(200, b"x" * 100, [etag]), accept_encoding="identity")[0])["etag"] == '"u1.5"'
+    assert _headers(_request(_app(304, b"", [etag]), accept_encoding="identity")[0])["etag"] == '"u1.5"'
+
+
+def test_pathsend_gets_the_start_message_first():
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"application/gzip")]})
+        await send({"type": "http.response.pathsend", "path": "/tmp/export.ndjson.gz"})
+
+    start, pathsend = _request(app)
+    assert start["type"] == "http.response.start" and "content-encoding" not in _headers(start)
+    assert "accept-encoding" in _headers(start)["vary"].lower()
+    assert pathsend == {"type": "http.response.pathsend", "path": "/tmp/export.ndjson.gz"}
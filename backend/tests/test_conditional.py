@@ -0,0 +1,17 @@
+from datetime import datetime, timezone
+
+from app.restful.conditional import is_not_modified, known_user_version, user_etag
+
+UPDATED_AT = datetime(2026, 1, 2, 3, 4, 5, 678901, tzinfo=timezone.utc)
+
+
+def test_weak_and_strong_etags_both_match():
+    etag = user_etag(1, UPDATED_AT)
+    assert is_not_modified({"if-none-match": etag}, etag)
+    assert is_not_modified({"if-none-match": f"W/{etag}"}, etag)
+    assert not is_not_modified({"if-none-match": '"u1.1"'}, etag)
+
+
+def test_known_user_version_reads_weak_etags():
+    assert known_user_version(f"W/{user_etag(1, UPDATED_AT)}", 1) == UPDATED_AT
+    assert known_user_version(user_etag(2, UPDATED_AT), 1) is None
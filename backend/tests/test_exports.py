@@ -0,0 +1,63 @@
+import asyncio
+import gzip
+import json
+import os
+
+from app.exports import ExportConfig, ExportManager
+from app.models.user import ExportFormat, ExportStatus, User
+
+
+class FakeUserClient:
+    """get_users_after over an in-memory table; blocks forever when block_after is reached."""
+
+    def __init__(self, count: int, block_after: int = None):
+        self.users = [User(id=i, name=f"n{i}", email=f"u{i}@example.com", is_active=True) for i in range(1, count + 1)]
+        self.block_after = block_after
+
+    async def get_users_after(self, after_id, limit, timeout=None):
+        if self.block_after is not None and after_id >= self.block_after:
+            await asyncio.Event().wait()
+        return [user for user in self.users if user.id > after_id][:limit]
+
+
+def _manager(tmp_path) -> ExportManager:
+    return ExportManager(ExportConfig(
+        directory=str(tmp_path), chunk_size=3, chunk_timeout_seconds=5, max_running=1,
+        ttl_seconds=60, compression_level=1
+    ))
+
+
+async def _wait_for(manager, job_id, statuses):
+    for _ in range(200):
+        job = manager.get(job_id)
+        if job.status in statuses:
+            return job
+        await asyncio.sleep(0.01)
+    raise AssertionError(f"export {job_id} is still {job.status}")
+
+
+def test_export_writes_every_user_in_chunks(tmp_path):
+    async def run():
+        manager = _manager(tmp_path)
+        job = await manager.start(FakeUserClient(7), ExportFormat.NDJSON)
+        return manager, await _wait_for(manager, job.id, {ExportStatus.COMPLETED, ExportStatus.FAILED})
+
+    manager, job = asyncio.run(run())
+    assert job.status == ExportStatus.COMPLETED and job.rows == 7
+    with gzip.open(manager.file_path(job), "rt", encoding="utf-8") as f:
+        assert [json.loads(line)["id"] for line in f] == list(range(1, 8))
+    assert job.size_bytes == os.path.getsize(manager.file_path(job))
+
+
+def test_cancelled_export_is_failed_and_leaves_no_partial_file(tmp_path):
+    async def run():
+        manager = _manager(tmp_path)
+        job = await manager.start(FakeUserClient(7, block_after=3), ExportFormat.CSV)
+        await _wait_for(manager, job.id, {ExportStatus.RUNNING})
+        await asyncio.sleep(0.05)
+        await manager.shutdown()
+        return manager.get(job.id)
+
+    job = asyncio.run(run())
+    assert job.status == ExportStatus.FAILED and job.error == "The export was cancelled"
+    assert not [name for name in os.listdir(tmp_path) if name.endswith(".part")]
@@ -0,0 +1,71 @@
+import asyncio
+
+import httpx
+import strawberry
+from fastapi import FastAPI
+from graphql import parse
+
+from app.graphql.batching import BatchingGraphQLRouter, GraphQLBatchingConfig, operation_cost
+
+
+@strawberry.type
+class Query:
+    @strawberry.field
+    def hello(self, name: str = "world") -> str:
+        return f"hello {name}"
+
+
+@strawberry.type
+class Mutation:
+    @strawberry.field
+    def echo(self, value: str) -> str:
+        return value
+
+
+def _post(json, config=None):
+    app = FastAPI()
+    router = BatchingGraphQLRouter(
+        strawberry.Schema(query=Query, mutation=Mutation),
+        batching=config or GraphQLBatchingConfig(max_operations=3, max_cost=10),
+    )
+    app.include_router(router, prefix="/graphql")
+
+    async def post():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.post("/graphql", json=json)
+
+    return asyncio.run(post())
+
+
+def test_operation_cost_expands_fragments():
+    document = parse("query { a { b c } ...F } fragment F on Query { d { e } }")
+    assert operation_cost(document) == 5
+
+
+def test_batch_returns_results_in_order():
+    response = _post([
+        {"query": "{ hello }"},
+        {"query": "query Q($n: String!) { hello(name: $n) }", "variables": {"n": "bff"}},
+        {"query": "mutation { echo(value: \"x\") }"},
+    ])
+    assert response.status_code == 200
+    assert response.json() == [
+        {"data": {"hello": "hello world"}},
+        {"data": {"hello": "hello bff"}},
+        {"data": {"echo": "x"}},
+    ]
+
+
+def test_operation_errors_stay_in_their_result():
+    response = _post([{"query": "{ hello }"}, {"query": "{ missing }"}, {"query": "{"}])
+    first, unknown_field, syntax_error = response.json()
+    assert first == {"data": {"hello": "hello world"}}
+    assert unknown_field["data"] is None and unknown_field["errors"]
+    assert syntax_error["data"] is None and syntax_error["errors"]
+
+
+def test_batch_limits():
+    assert _post([{"query": "{ hello }"}] * 4).status_code == 400
+    assert _post([{"query": "{ hello }"}] * 2, GraphQLBatchingConfig(max_operations=3, max_cost=1)).status_code == 400
+    assert _post({"query": "{ hello }"}).json() == {"data": {"hello": "hello world"}}
@@ -0,0 +1,48 @@
+import uuid
+
+import grpc
+import pytest
+
+from generated import user_pb2
+from app.grpc.servers.user.idempotency import IdempotencyStore
+from app.grpc.servers.user.user_server import UserServiceServicer
+
+
+@pytest.fixture
+def stub(start_user_service):
+    return start_user_service(UserServiceServicer(idempotency=IdempotencyStore(60, 5)))
+
+
+def _create(stub, email: str, key: str):
+    return stub.CreateUser.with_call(
+        user_pb2.CreateUserRequest(name="n", email=email), metadata=[("idempotency-key", key)]
+    )
+
+
+def test_retry_replays_the_created_user(stub):
+    email, key = f"{uuid.uuid4().hex}@example.com", uuid.uuid4().hex
+    first, _ = _create(stub, email, key)
+    retried, _ = _create(stub, email, key)
+    assert first.id and retried == first
+
+
+def test_retry_replays_the_error_details(stub):
+    email = f"{uuid.uuid4().hex}@example.com"
+    stub.CreateUser(user_pb2.CreateUserRequest(name="n", email=email))
+    key = uuid.uuid4().hex
+
+    with pytest.raises(grpc.RpcError) as original:
+        _create(stub, email, key)
+    with pytest.raises(grpc.RpcError) as replayed:
+        _create(stub, email, key)
+
+    assert original.value.code() == replayed.value.code() == grpc.StatusCode.ALREADY_EXISTS
+    assert replayed.value.details() == original.value.details() == "User with this email already exists"
+
+
+def test_key_reused_for_another_request_is_rejected(stub):
+    key = uuid.uuid4().hex
+    _create(stub, f"{uuid.uuid4().hex}@example.com", key)
+    with pytest.raises(grpc.RpcError) as mismatch:
+        _create(stub, f"{uuid.uuid4().hex}@example.com", key)
+    assert mismatch.value.code() == grpc.StatusCode.INVALID_ARGUMENT
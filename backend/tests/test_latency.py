@@ -0,0 +1,56 @@
+from types import SimpleNamespace
+
+import pytest
+
+from app.grpc.clients.latency import AdaptiveDeadlines, LatencySketch, SlidingWindowSketch, latency_key
+from app.grpc.config.grpc_config import AdaptiveDeadlineConfig
+
+
+def test_quantiles_are_within_the_relative_accuracy():
+    sketch = LatencySketch(relative_accuracy=0.01)
+    values = [i / 1000 for i in range(1, 1001)]
+    for value in values:
+        sketch.add(value)
+    for q in (0.5, 0.9, 0.99):
+        exact = values[int(q * (len(values) - 1))]
+        assert sketch.quantile(q) == pytest.approx(exact, rel=0.01)
+
+
+def test_merged_sketches_count_both():
+    a, b = LatencySketch(), LatencySketch()
+    a.add(0.01)
+    b.add(1.0)
+    a.merge(b)
+    assert a.count == 2
+    assert a.quantile(1.0) == pytest.approx(1.0, rel=0.01)
+    assert LatencySketch().quantile(0.5) is None
+
+
+def test_sliding_window_drops_old_slices():
+    window = SlidingWindowSketch(window_seconds=60, slices=6)
+    window.add(5.0, now=0)
+    window.add(0.01, now=30)
+    assert window.merged(now=59).count == 2
+    assert window.merged(now=61).count == 1
+
+
+def test_latency_key_buckets_page_sizes():
+    assert latency_key("GetUser", SimpleNamespace(id=1)) == "GetUser"
+    assert latency_key("GetUsers", SimpleNamespace(limit=0)) == "GetUsers[unbounded]"
+    assert latency_key("GetUsers", SimpleNamespace(limit=10)) == "GetUsers[limit<=10]"
+    assert latency_key("GetUsers", SimpleNamespace(limit=500)) == "GetUsers[limit<=1000]"
+    assert latency_key("GetUsers", SimpleNamespace(limit=5000)) == "GetUsers[limit>1000]"
+
+
+def test_deadline_is_max_until_enough_samples_then_clamped_multiple_of_p99():
+    deadlines = AdaptiveDeadlines("test", AdaptiveDeadlineConfig(
+        enabled=True, multiplier=3, min_seconds=0.1, max_seconds=10, min_samples=10, refresh_seconds=0
+    ))
+    for _ in range(9):
+        deadlines.record("GetUser", 0.2)
+    assert deadlines.default_timeout("GetUser") == 10
+    deadlines.record("GetUser", 0.2)
+    assert deadlines.default_timeout("GetUser") == pytest.approx(0.6, rel=0.02)
+    for _ in range(10):
+        deadlines.record("Fast", 0.001)
+    assert deadlines.default_timeout("Fast") == 0.1
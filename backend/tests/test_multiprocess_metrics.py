@@ -0,0 +1,67 @@
+import json
+import os
+import threading
+
+from app.observability.metrics import merge_snapshots, registry
+from app.observability.multiprocess import ARCHIVE_FILE, MultiprocessMetrics
+
+
+def _counter(values):
+    return {"type": "counter", "description": "", "values": values}
+
+
+def test_merge_snapshots_sums_counters_and_histograms_per_label_set():
+    histogram = {"type": "histogram", "description": "", "buckets": [1.0]}
+    merged = merge_snapshots([
+        {"hits": _counter([[[["route", "a"]], 2]]), "latency": {**histogram, "values": [[[], [1, 0, 0.5]]]}},
+        {"hits": _counter([[[["route", "a"]], 3], [[["route", "b"]], 1]]), "latency": {**histogram, "values": [[[], [0, 2, 4.0]]]}},
+    ])
+    assert merged["hits"]["values"] == [[[["route", "a"]], 5], [[["route", "b"]], 1]]
+    assert merged["latency"]["values"] == [[[], [1, 2, 4.5]]]
+
+
+def test_merge_snapshots_skips_histograms_with_other_buckets():
+    merged = merge_snapshots([
+        {"latency": {"type": "histogram", "description": "", "buckets": [1.0], "values": [[[], [1, 0, 0.5]]]}},
+        {"latency": {"type": "histogram", "description": "", "buckets": [2.0], "values": [[[], [5, 0, 1.0]]]}},
+    ])
+    assert merged["latency"]["values"] == [[[], [1, 0, 0.5]]]
+
+
+def test_exited_workers_are_archived_without_their_gauges(tmp_path):
+    exited_pid = 2 ** 22 + 12345  # above the default pid_max, so never alive
+    with open(tmp_path / f"worker-{exited_pid}.json", "w", encoding="utf-8") as f:
+        json.dump({
+            "test_multiproc_exited_total": _counter([[[], 4]]),
+            "test_multiproc_exited_gauge": {"type": "gauge", "description": "", "values": [[[], 9]]},
+        }, f)
+
+    merged = MultiprocessMetrics(str(tmp_path)).collect()
+
+    assert merged["test_multiproc_exited_total"]["values"] == [[[], 4]]
+    assert "test_multiproc_exited_gauge" not in merged
+    assert not os.path.exists(tmp_path / f"worker-{exited_pid}.json")
+    assert os.path.exists(tmp_path / ARCHIVE_FILE)
+
+
+def test_concurrent_write_and_collect_do_not_race(tmp_path):
+    registry.counter("test_multiproc_writes_total", "Writes in the race test").inc()
+    metrics = MultiprocessMetrics(str(tmp_path))
+    errors = []
+
+    def hammer(action):
+        try:
+            for _ in range(200):
+                action()
+        except Exception as exc:  # pragma: no cover - the failure being tested for
+            errors.append(exc)
+
+    threads = [threading.Thread(target=hammer, args=(action,)) for action in (metrics.write, metrics.collect) * 2]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert metrics.collect()["test_multiproc_writes_total"]["values"] == [[[], 1]]
+    assert sorted(os.listdir(tmp_path)) == [".lock", f"worker-{os.getpid()}.json"]
@@ -0,0 +1,94 @@
+import multiprocessing
+import time
+
+from app.grpc.clients.shared_cache import WAYS, SharedCache
+
+
+def test_put_and_get():
+    cache = SharedCache(None, slots=64)
+    cache.put(1, b"one")
+    assert cache.get(1) == b"one"
+    assert cache.get(2) is None
+
+
+def test_values_larger_than_a_slot_are_not_cached():
+    cache = SharedCache(None, slots=64, slot_size=128)
+    cache.put(1, b"x" * cache.capacity + b"x")
+    assert cache.get(1) is None
+
+
+def test_entries_expire():
+    cache = SharedCache(None, slots=64, ttl_seconds=0.05)
+    cache.put(1, b"one")
+    time.sleep(0.1)
+    assert cache.get(1) is None
+
+
+def test_lower_versions_do_not_replace_higher_ones():
+    cache = SharedCache(None, slots=64)
+    cache.put(1, b"v2", version=2)
+    cache.put(1, b"v1", version=1)
+    assert cache.get(1) == b"v2"
+    cache.put(1, b"v2 again", version=2)
+    assert cache.get(1) == b"v2 again"
+    cache.put(1, b"v3", version=3)
+    assert cache.get(1) == b"v3"
+
+
+def test_tombstone_refuses_puts_until_it_expires():
+    cache = SharedCache(None, slots=64, ttl_seconds=0.05)
+    cache.put(1, b"one", version=1)
+    cache.invalidate(1)
+    assert cache.get(1) is None
+    cache.put(1, b"stale", version=10 ** 12)
+    assert cache.get(1) is None
+    time.sleep(0.1)
+    cache.put(1, b"fresh", version=2)
+    assert cache.get(1) == b"fresh"
+
+
+def test_invalidate_all_drops_entries_and_puts_of_the_old_generation():
+    cache = SharedCache(None, slots=64)
+    cache.put(1, b"one")
+    generation = cache.generation
+    cache.invalidate_all()
+    assert cache.generation == generation + 1
+    assert cache.get(1) is None
+    cache.put(1, b"fetched before", generation=generation)
+    assert cache.get(1) is None
+    cache.put(1, b"fetched after", generation=cache.generation)
+    assert cache.get(1) == b"fetched after"
+
+
+def test_full_bucket_evicts_an_unreferenced_entry():
+    cache = SharedCache(None, slots=WAYS)  # a single bucket
+    for key in range(WAYS):
+        cache.put(key, str(key).encode())
+    assert cache.get(0) == b"0"  # referenced, so the hand passes over it
+    cache.put(WAYS, b"new")
+    assert cache.get(WAYS) == b"new"
+    assert cache.get(0) == b"0"
+    assert sum(cache.get(key) is not None for key in range(WAYS)) == WAYS - 1
+
+
+def _put_from_other_process(path):
+    SharedCache(path, slots=64).put(7, b"from child")
+
+
+def test_file_backed_table_is_shared_across_processes(tmp_path):
+    path = str(tmp_path / "cache")
+    cache = SharedCache(path, slots=64)
+    child = multiprocessing.get_context("fork").Process(target=_put_from_other_process, args=(path,))
+    child.start()
+    child.join(10)
+    assert child.exitcode == 0
+    assert cache.get(7) == b"from child"
+
+
+def test_file_with_other_settings_falls_back_to_a_private_table(tmp_path):
+    path = str(tmp_path / "cache")
+    SharedCache(path, slots=64).put(1, b"one")
+    other = SharedCache(path, slots=128)
+    assert other.get(1) is None
+    other.put(1, b"private")
+    assert SharedCache(path, slots=64).get(1) == b"one"
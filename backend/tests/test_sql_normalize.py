@@ -0,0 +1,17 @@
+from app.observability.sql import normalize_sql
+
+
+def test_literals_become_placeholders():
+    assert normalize_sql("SELECT * FROM users WHERE id = 42 AND email = 'a''b@x.com'") == (
+        "SELECT * FROM users WHERE id = ? AND email = ?"
+    )
+
+
+def test_in_lists_of_any_length_group_together():
+    assert normalize_sql("SELECT id FROM users WHERE id IN (1, 2, 3)") == normalize_sql(
+        "SELECT id FROM users WHERE id in (%(id_1)s)"
+    ) == "SELECT id FROM users WHERE id IN (...)"
+
+
+def test_whitespace_is_collapsed_and_identifiers_with_digits_kept():
+    assert normalize_sql("SELECT  col1\n  FROM t2\tLIMIT 10") == "SELECT col1 FROM t2 LIMIT ?"
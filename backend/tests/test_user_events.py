@@ -0,0 +1,102 @@
+import threading
+
+import grpc
+
+from app.grpc.servers.user.events import UserEventHub
+from generated import user_pb2
+
+
+class FakeContext:
+    def __init__(self):
+        self.active = True
+        self.code = None
+        self.details = None
+
+    def is_active(self):
+        return self.active
+
+    def set_code(self, code):
+        self.code = code
+
+    def set_details(self, details):
+        self.details = details
+
+
+def _publish_created(hub, user_id):
+    hub.publish(user_pb2.USER_EVENT_CREATED, user_pb2.User(id=user_id))
+
+
+def test_new_subscriber_gets_reset_then_new_events():
+    hub = UserEventHub(heartbeat_seconds=60)
+    _publish_created(hub, 1)
+    stream = hub.stream(user_pb2.WatchUsersRequest(), FakeContext())
+
+    first = next(stream)
+    assert (first.type, first.epoch, first.sequence) == (user_pb2.USER_EVENT_RESET, hub.epoch, 1)
+    _publish_created(hub, 2)
+    event = next(stream)
+    assert (event.type, event.sequence, event.user.id) == (user_pb2.USER_EVENT_CREATED, 2, 2)
+    stream.close()
+
+
+def test_resuming_subscriber_gets_what_it_missed():
+    hub = UserEventHub(heartbeat_seconds=60)
+    for user_id in (1, 2, 3):
+        _publish_created(hub, user_id)
+    stream = hub.stream(user_pb2.WatchUsersRequest(epoch=hub.epoch, after_sequence=1), FakeContext())
+
+    first = next(stream)
+    assert (first.type, first.sequence) == (user_pb2.USER_EVENT_HEARTBEAT, 1)
+    assert [next(stream).user.id for _ in range(2)] == [2, 3]
+    stream.close()
+
+
+def test_resume_beyond_the_buffer_or_from_another_epoch_resets():
+    hub = UserEventHub(buffer_size=2, heartbeat_seconds=60)
+    for user_id in (1, 2, 3, 4):
+        _publish_created(hub, user_id)
+
+    for request in (
+        user_pb2.WatchUsersRequest(epoch=hub.epoch, after_sequence=1),
+        user_pb2.WatchUsersRequest(epoch="another", after_sequence=3),
+    ):
+        stream = hub.stream(request, FakeContext())
+        first = next(stream)
+        assert (first.type, first.sequence) == (user_pb2.USER_EVENT_RESET, 4)
+        stream.close()
+
+
+def test_idle_stream_sends_heartbeats():
+    hub = UserEventHub(heartbeat_seconds=0.05)
+    stream = hub.stream(user_pb2.WatchUsersRequest(), FakeContext())
+    next(stream)
+    heartbeat = next(stream)
+    assert (heartbeat.type, heartbeat.sequence) == (user_pb2.USER_EVENT_HEARTBEAT, 0)
+    stream.close()
+
+
+def test_streams_beyond_the_limit_are_refused_and_closed_ones_free_their_slot():
+    hub = UserEventHub(max_streams=1, heartbeat_seconds=60)
+    first = hub.stream(user_pb2.WatchUsersRequest(), FakeContext())
+    next(first)
+
+    context = FakeContext()
+    assert list(hub.stream(user_pb2.WatchUsersRequest(), context)) == []
+    assert context.code == grpc.StatusCode.RESOURCE_EXHAUSTED
+
+    first.close()
+    second = hub.stream(user_pb2.WatchUsersRequest(), FakeContext())
+    assert next(second).type == user_pb2.USER_EVENT_RESET
+    second.close()
+
+
+def test_close_ends_open_streams():
+    hub = UserEventHub(heartbeat_seconds=60)
+    stream = hub.stream(user_pb2.WatchUsersRequest(), FakeContext())
+    next(stream)
+    threading.Timer(0.05, hub.close).start()
+    assert list(stream) == []
+
+    context = FakeContext()
+    assert list(hub.stream(user_pb2.WatchUsersRequest(), context)) == []
+    assert context.code == grpc.StatusCode.UNAVAILABLE
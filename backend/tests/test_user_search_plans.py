@@ -0,0 +1,61 @@
+"""EXPLAIN-based checks that SearchUsers queries are served by their indexes (PostgreSQL only)."""
+import json
+
+import pytest
+from sqlalchemy import text
+
+from generated import user_pb2
+from app.grpc.servers.user.database.connection import user_db
+from app.grpc.servers.user.database.models import User
+from app.grpc.servers.user.database.queries import search_users_statement
+
+pytestmark = pytest.mark.skipif(
+    user_db.engine.dialect.name != "postgresql", reason="USER_DATABASE_URL is not a PostgreSQL database"
+)
+
+
+@pytest.fixture
+def connection():
+    User.metadata.create_all(user_db.engine)
+    with user_db.engine.connect() as connection:
+        # The plan then doesn't depend on how many rows the table holds
+        connection.execute(text("SET enable_seqscan = off"))
+        yield connection
+        connection.rollback()
+
+
+def _plan_nodes(plan):
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from _plan_nodes(child)
+
+
+def _indexes_used(connection, statement) -> set:
+    """Names of the indexes the plan scans; fails on a sequential scan of users."""
+    sql = str(statement.compile(connection, compile_kwargs={"literal_binds": True}))
+    result = connection.execute(text(f"EXPLAIN (FORMAT JSON) {sql}")).scalar()
+    plan = result if isinstance(result, list) else json.loads(result)
+    nodes = list(_plan_nodes(plan[0]["Plan"]))
+    assert not [n for n in nodes if n["Node Type"] == "Seq Scan" and n.get("Relation Name") == "users"]
+    return {n["Index Name"] for n in nodes if "Index Name" in n}
+
+
+@pytest.mark.parametrize("is_active", [None, True])
+def test_prefix_search_uses_pattern_indexes(connection, is_active):
+    statement = search_users_statement("ali", user_pb2.SEARCH_MATCH_PREFIX, is_active, 0, 21)
+    assert {"ix_users_name_pattern", "ix_users_email_pattern"} <= _indexes_used(connection, statement)
+
+
+def test_active_listing_uses_partial_index(connection):
+    statement = search_users_statement("", user_pb2.SEARCH_MATCH_PREFIX, True, 0, 21)
+    assert "ix_users_active_id" in _indexes_used(connection, statement)
+
+
+def test_substring_search_uses_trigram_indexes(connection):
+    installed = connection.execute(
+        text("SELECT 1 FROM pg_indexes WHERE indexname = 'ix_users_name_trgm'")
+    ).scalar()
+    if installed is None:
+        pytest.skip("trigram indexes are not installed (pg_trgm is not available)")
+    statement = search_users_statement("lic", user_pb2.SEARCH_MATCH_SUBSTRING, None, 0, 21)
+    assert {"ix_users_name_trgm", "ix_users_email_trgm"} <= _indexes_used(connection, statement)